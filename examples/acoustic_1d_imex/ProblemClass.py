@@ -12,9 +12,8 @@ r"""
 
 import numpy as np
 import scipy.sparse as sp
-import scipy.sparse.linalg as LA
 
-from pySDC.Problem import ptype
+from pySDC.Problem import ptype_linear
 from pySDC.datatype_classes.mesh import mesh, rhs_imex_mesh
 
 # Sharpclaw imports
@@ -27,7 +26,7 @@ def u_initial(x):
     return np.sin(2.0*np.pi*x)
 #    return np.exp(-0.5*(x-0.5)**2/0.1**2)
 
-class acoustic_1d_imex(ptype):
+class acoustic_1d_imex(ptype_linear):
     """
     Example implementing the forced 1D heat equation with Dirichlet-0 BC in [0,1]
 
@@ -83,9 +82,24 @@ class acoustic_1d_imex(ptype):
         self.solver.setup(solution)
 
 
+    def get_system_matrix(self,factor):
+        """
+        Assembles the 2x2 block system matrix for u and p
+
+        Args:
+            factor: abbrev. for the node-to-node stepsize (or any other factor required)
+        Returns:
+            system matrix in sparse format
+        """
+
+        M1 = sp.hstack( (sp.eye(self.nvars[1]), -factor*self.A) )
+        M2 = sp.hstack( (-factor*self.A, sp.eye(self.nvars[1])) )
+        return sp.vstack( (M1, M2), format='csc' )
+
+
     def solve_system(self,rhs,factor,u0,t):
         """
-        Simple linear solver for (I-dtA)u = rhs
+        Simple linear solver for (I-dtA)u = rhs (with cached factorizations)
 
         Args:
             rhs: right-hand side for the nonlinear system
@@ -96,14 +110,10 @@ class acoustic_1d_imex(ptype):
         Returns:
             solution as mesh
         """
-        
-        M1 = sp.hstack( (sp.eye(self.nvars[1]), -factor*self.A) )
-        M2 = sp.hstack( (-factor*self.A, sp.eye(self.nvars[1])) )
-        M  = sp.vstack( (M1, M2) )
-        
+
         b = np.concatenate( (rhs.values[0,:], rhs.values[1,:]) )
-        
-        sol = LA.spsolve(M, b)
+
+        sol = self.solve_linear(factor,b)
 
         me = mesh(self.nvars)
         me.values[0,:], me.values[1,:] = np.split(sol, 2)
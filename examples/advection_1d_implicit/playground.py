@@ -5,6 +5,7 @@ import numpy as np
 
 from examples.advection_1d_implicit.ProblemClass import advection
 from examples.advection_1d_implicit.TransferClass import mesh_to_mesh_1d_periodic
+# from pySDC.transfer_classes.mesh_to_mesh_fft import mesh_to_mesh_fft # spectral transfer, see below
 from pySDC.datatype_classes.mesh import mesh, rhs_imex_mesh
 from pySDC.sweeper_classes.imex_1st_order import imex_1st_order
 import pySDC.PFASST_stepwise as mp
@@ -48,6 +49,7 @@ if __name__ == "__main__":
     description['sweeper_class'] = imex_1st_order
     description['level_params'] = lparams
     description['transfer_class'] = mesh_to_mesh_1d_periodic
+    # description['transfer_class'] = mesh_to_mesh_fft # spectral transfer, exact for periodic problems
     description['transfer_params'] = tparams
 
     # quickly generate block of steps
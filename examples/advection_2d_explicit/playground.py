@@ -4,7 +4,7 @@ from pySDC import CollocationClasses as collclass
 import numpy as np
 
 from ProblemClass import sharpclaw
-#from examples.sharpclaw_burgers1d.TransferClass import mesh_to_mesh_1d
+#from pySDC.transfer_classes.mesh_to_mesh_nd import mesh_to_mesh_nd
 from pySDC.datatype_classes.mesh import mesh, rhs_imex_mesh
 from pySDC.sweeper_classes.imex_1st_order import imex_1st_order
 import pySDC.Methods as mp
@@ -55,7 +55,7 @@ if __name__ == "__main__":
     description['num_nodes']         = 5
     description['sweeper_class']     = imex_1st_order
     description['level_params']      = lparams
-    #description['transfer_class'] = mesh_to_mesh_1d
+    #description['transfer_class'] = mesh_to_mesh_nd
     #description['transfer_params'] = tparams
 
     # quickly generate block of steps
@@ -1,15 +1,14 @@
 import numpy as np
 import scipy.sparse as sp
-import scipy.sparse.linalg as LA
 
-from pySDC.Problem import ptype
+from pySDC.Problem import ptype_linear
 from pySDC.datatype_classes.mesh import mesh, rhs_imex_mesh
 
 # Sharpclaw imports
 from clawpack import pyclaw
 from clawpack import riemann
 
-class sharpclaw(ptype):
+class sharpclaw(ptype_linear):
     """
     Example implementing the forced 1D heat equation with Dirichlet-0 BC in [0,1]
 
@@ -82,7 +81,7 @@ class sharpclaw(ptype):
 
     def solve_system(self,rhs,factor,u0,t):
         """
-        Simple linear solver for (I-dtA)u = rhs
+        Simple linear solver for (I-dtA)u = rhs (with cached factorizations)
 
         Args:
             rhs: right-hand side for the nonlinear system
@@ -95,7 +94,7 @@ class sharpclaw(ptype):
         """
 
         me = mesh(self.nvars)
-        me.values = LA.spsolve(sp.eye(self.nvars)-factor*self.A,rhs.values)
+        me.values = self.solve_linear(factor,rhs.values)
 
         return me
 
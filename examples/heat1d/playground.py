@@ -9,6 +9,8 @@ from pySDC.datatype_classes.mesh import mesh, rhs_imex_mesh
 from pySDC.sweeper_classes.imex_1st_order import imex_1st_order
 import pySDC.PFASST_blockwise as mp
 # import pySDC.PFASST_stepwise as mp
+# import pySDC.PFASST_parallel as mp
+# import pySDC.Parareal as pr
 # import pySDC.Methods as mp
 from pySDC import Log
 # from pySDC.Stats import grep_stats, sort_stats
@@ -69,6 +71,7 @@ if __name__ == "__main__":
 
     # call main function to get things done...
     uend,stats = mp.run_pfasst(MS,u0=uinit,t0=t0,dt=dt,Tend=Tend)
+    # uend,stats = pr.run_parareal(MS,u0=uinit,t0=t0,dt=dt,Tend=Tend)
 
     # compute exact solution and compare
     uex = P.u_exact(Tend)
@@ -0,0 +1,144 @@
+from __future__ import division
+import numpy as np
+
+
+class node():
+    """
+    Node of the octree, i.e. a cube containing some of the particles
+
+    Attributes:
+        idx: indices of the particles in this cube
+        size: edge length of the cube
+        charge: total charge of the particles in this cube
+        center: center of charge (weighted by the absolute charges)
+        children: list of non-empty sub-cubes (empty for leaves)
+    """
+
+    __slots__ = ('idx','size','charge','center','children')
+
+    def __init__(self,idx,size,pos,q):
+        """
+        Initialization routine
+
+        Args:
+            idx: indices of the particles in this cube
+            size: edge length of the cube
+            pos: positions of all particles, shape (N,3)
+            q: charges of all particles
+        """
+        self.idx = idx
+        self.size = size
+        self.charge = np.sum(q[idx])
+        weights = np.abs(q[idx])
+        if np.sum(weights) > 0:
+            self.center = np.dot(weights,pos[idx])/np.sum(weights)
+        else:
+            self.center = np.mean(pos[idx],axis=0)
+        self.children = []
+
+
+class octree():
+    """
+    Barnes-Hut octree for the (smoothed) Coulomb interaction of particles
+
+    The particles are sorted into a hierarchy of cubes until each cube has at most leaf_size particles. The field at a
+    particle is computed by walking the tree: a cube which appears small enough from the particle (edge length over
+    distance below the opening angle theta) acts as a single charge at its center of charge, otherwise its sub-cubes
+    are visited. Particles in leaves are summed up directly. All particles walk the tree together, so the work per
+    cube is vectorized over the particles which reach it. theta = 0 gives the direct sum, larger values are cheaper
+    and less accurate.
+
+    Attributes:
+        pos: positions of the particles, shape (N,3)
+        q: charges of the particles
+        leaf_size: maximal number of particles in a leaf
+        max_depth: maximal depth of the tree (for particles at the same position)
+        root: root node
+    """
+
+    def __init__(self,pos,q,leaf_size=16,max_depth=32):
+        """
+        Initialization routine, builds the tree
+
+        Args:
+            pos: positions of the particles, shape (N,3)
+            q: charges of the particles
+            leaf_size: maximal number of particles in a leaf
+            max_depth: maximal depth of the tree (for particles at the same position)
+        """
+        self.pos = pos
+        self.q = q
+        self.leaf_size = leaf_size
+        self.max_depth = max_depth
+
+        lower = np.min(pos,axis=0)
+        upper = np.max(pos,axis=0)
+        size = max(np.max(upper-lower),np.finfo(float).eps)
+
+        self.root = self.__build(np.arange(len(q)),(lower+upper)/2,size,0)
+
+    def __build(self,idx,mid,size,depth):
+        """
+        Recursive routine to build the tree
+
+        Args:
+            idx: indices of the particles in this cube
+            mid: geometric center of the cube
+            size: edge length of the cube
+            depth: depth of the cube in the tree
+        Returns:
+            node for this cube
+        """
+        me = node(idx,size,self.pos,self.q)
+
+        if len(idx) > self.leaf_size and depth < self.max_depth:
+            # number of the octant for each particle
+            above = self.pos[idx] > mid
+            octant = above[:,0] + 2*above[:,1] + 4*above[:,2]
+            for o in range(8):
+                sub = idx[octant == o]
+                if len(sub) > 0:
+                    shift = np.array([o & 1, (o >> 1) & 1, (o >> 2) & 1]) - 1/2
+                    me.children.append(self.__build(sub,mid+shift*size/2,size/2,depth+1))
+
+        return me
+
+    def get_field(self,theta,sig):
+        """
+        Routine to compute the field at all particles
+
+        Args:
+            theta: opening angle
+            sig: smoothing parameter of the interaction
+        Returns:
+            field at each particle, shape (N,3)
+        """
+
+        field = np.zeros(np.shape(self.pos))
+
+        # walk the tree, together with the particles for which the cube still has to be looked at
+        stack = [(self.root,np.arange(len(self.q)))]
+        while stack:
+            cube, targets = stack.pop()
+
+            if not cube.children:
+                # leaf: direct sum (the contribution of a particle to itself vanishes)
+                diff = self.pos[targets,np.newaxis,:] - self.pos[np.newaxis,cube.idx,:]
+                dist2 = np.sum(diff**2,axis=2) + sig**2
+                field[targets] += np.einsum('ij,ijk->ik',self.q[cube.idx]/dist2**(3/2),diff)
+                continue
+
+            # cube far enough away: use its total charge at the center of charge
+            diff = self.pos[targets] - cube.center
+            dist2 = np.sum(diff**2,axis=1)
+            far = cube.size**2 < theta**2*dist2
+            if np.any(far):
+                field[targets[far]] += cube.charge*diff[far]/(dist2[far]+sig**2)[:,np.newaxis]**(3/2)
+
+            # everyone else has to look at the sub-cubes
+            near = targets[~far]
+            if len(near) > 0:
+                for child in cube.children:
+                    stack.append((child,near))
+
+        return field
@@ -1,17 +1,30 @@
 from __future__ import division
+import importlib
 import numpy as np
 
 from pySDC.Problem import ptype
-from pySDC.datatype_classes.particles import particles, fields, acceleration
+from examples.penningtrap.BarnesHut import octree
 
 class penningtrap(ptype):
     """
     Example implementing a single particle in a penning trap
 
+    All routines work on the particle data as arrays of shape (nparts,3), the particle-particle interactions are
+    computed in tiles of tile_size x tile_size pairs to bound the memory. With an opening angle theta, a Barnes-Hut
+    tree is used for the interactions instead (e.g. small theta on the fine level, larger theta on the coarse level).
+
     Attributes:
         nparts: number of particles (needs to be 1 here)
+        dtype_acc: acceleration data type matching dtype_u
+        tile_size: number of particles per tile for the interactions (can be set via the problem parameters)
+        theta: opening angle of the Barnes-Hut tree, None for the direct sum (can be set via the problem parameters)
+        leaf_size: maximal number of particles in a leaf of the tree (can be set via the problem parameters)
     """
 
+    tile_size = 1024
+    theta = None
+    leaf_size = 16
+
     def __init__(self, cparams, dtype_u, dtype_f):
         """
         Initialization routine
@@ -19,7 +32,7 @@ class penningtrap(ptype):
         Args:
             cparams: custom parameters for the example
             dtype_u: particle data type (will be passed parent class)
-            dtype_f: acceleration data type (will be passed parent class)
+            dtype_f: fields data type (will be passed parent class)
         """
 
         # these parameters will be used later, so assert their existence
@@ -38,6 +51,9 @@ class penningtrap(ptype):
         # invoke super init, passing nparts, dtype_u and dtype_f
         super(penningtrap,self).__init__(self.nparts, dtype_u, dtype_f)
 
+        # acceleration type belonging to the particle data type (from particles or particles_soa)
+        self.dtype_acc = importlib.import_module(dtype_u.__module__).acceleration
+
 
     def get_interactions(self,part):
         """
@@ -51,19 +67,44 @@ class penningtrap(ptype):
         """
 
         N = self.nparts
+        T = self.tile_size
+
+        pos = part.pos.values.reshape(N,3)
+
+        # O(N log N) approximation via the Barnes-Hut tree
+        if self.theta is not None:
+            tree = octree(pos,part.q,leaf_size=self.leaf_size)
+            return tree.get_field(self.theta,self.sig).reshape(3*N)
+
+        Efield = np.zeros((N,3))
+
+        # all pairs, tile by tile (the contribution of a particle to itself vanishes)
+        for i in range(0,N,T):
+            for j in range(0,N,T):
+                diff = pos[i:i+T,np.newaxis,:] - pos[np.newaxis,j:j+T,:]
+                dist2 = np.sum(diff**2,axis=2) + self.sig**2
+                Efield[i:i+T] += np.einsum('ij,ijk->ik',part.q[j:j+T]/dist2**(3/2),diff)
+
+        return Efield.reshape(3*N)
+
+
+    def get_external_fields(self,part,f):
+        """
+        Routine to add the external E field and to set the external B field
 
-        Efield = np.zeros(3*N)
+        Args:
+            part: the particles
+            f: the fields to be filled
+        """
 
-        for i in range(N):
-            for j in range(N):
-                dist2 = np.linalg.norm(part.pos.values[3*i:3*i+3]-part.pos.values[3*j:3*j+3],2)**2+self.sig**2
-                contrib = part.q[j]*(part.pos.values[3*i:3*i+3]-part.pos.values[3*j:3*j+3]) / dist2**(3/2)
+        N = self.nparts
 
-                Efield[3*i  ] += contrib[0]
-                Efield[3*i+1] += contrib[1]
-                Efield[3*i+2] += contrib[2]
+        # Emat = diag(1,1,-2) applied to all positions at once
+        Emat = np.array([1,1,-2])
+        a = part.q/part.m
 
-        return Efield
+        f.elec.values += (self.omega_E**2 / a[:,np.newaxis] * part.pos.values.reshape(N,3) * Emat).reshape(3*N)
+        f.magn.values = np.tile(self.omega_B * np.array([0,0,1]),N).astype(float)
 
 
     def eval_f(self,part,t):
@@ -77,18 +118,10 @@ class penningtrap(ptype):
             Fields for the particles (internal and external)
         """
 
-        N = self.nparts
-
-        Emat = np.diag([1,1,-2])
-        f = fields(self.nparts)
+        f = self.dtype_f(self.nparts)
 
         f.elec.values = self.get_interactions(part)
-
-
-        for n in range(N):
-            f.elec.values[3*n:3*n+3] += self.omega_E**2 / (part.q[n]/part.m[n]) * np.dot(Emat,part.pos.values[
-                                                                                              3*n:3*n+3])
-            f.magn.values[3*n:3*n+3] = self.omega_B * np.array([0,0,1])
+        self.get_external_fields(part,f)
 
         return f
 
@@ -104,7 +137,7 @@ class penningtrap(ptype):
         u0 = self.u0
         N = self.nparts
 
-        u = particles(N)
+        u = self.dtype_u(N)
 
         if u0[2][0] is not 1 or u0[3][0] is not 1:
             print('Error: so far only q = m = 1 is implemented (I think)')
@@ -174,7 +207,7 @@ class penningtrap(ptype):
 
         assert N == 1
 
-        u = particles(1)
+        u = self.dtype_u(1)
 
         wbar = np.sqrt(2)*wE
 
@@ -216,15 +249,15 @@ class penningtrap(ptype):
             correct RHS of type acceleration
         """
 
-        assert isinstance(part,particles)
+        assert isinstance(part,self.dtype_u)
 
         N = self.nparts
 
-        rhs = acceleration(self.nparts)
+        rhs = self.dtype_acc(self.nparts)
 
-        for n in range(N):
-            rhs.values[3*n:3*n+3] = part.q[n]/part.m[n]*(f.elec.values[3*n:3*n+3] + np.cross(part.vel.values[3*n:3*n+3],
-                                                                                    f.magn.values[3*n:3*n+3]))
+        a = part.q/part.m
+        lorentz = f.elec.values.reshape(N,3) + np.cross(part.vel.values.reshape(N,3),f.magn.values.reshape(N,3))
+        rhs.values[:] = (a[:,np.newaxis]*lorentz).reshape(3*N)
 
         return rhs
 
@@ -244,25 +277,25 @@ class penningtrap(ptype):
         """
 
         N = self.nparts
-        vel = particles.velocity(N)
-
-        Emean = 1/2*(old_fields.elec + new_fields.elec)
+        vel = self.dtype_u.velocity(N)
 
-        for n in range(N):
+        Emean = (1/2*(old_fields.elec + new_fields.elec)).values.reshape(N,3)
 
-            a = old_parts.q[n]/old_parts.m[n]
+        a = (old_parts.q/old_parts.m)[:,np.newaxis]
+        vold = old_parts.vel.values.reshape(N,3)
 
-            c.values[3*n:3*n+3] += dt/2*a*np.cross(old_parts.vel.values[3*n:3*n+3],
-                                                   old_fields.magn.values[3*n:3*n+3]-new_fields.magn.values[3*n:3*n+3])
+        # c is updated in place, as in the loop version
+        cmat = c.values.reshape(N,3)
+        cmat += dt/2*a*np.cross(vold,(old_fields.magn.values-new_fields.magn.values).reshape(N,3))
 
-            # pre-velocity, separated by the electric forces (and the c term)
-            vm = old_parts.vel.values[3*n:3*n+3] + dt/2*a*Emean.values[3*n:3*n+3] + c.values[3*n:3*n+3]/2
-            # rotation
-            t = dt/2* a * new_fields.magn.values[3*n:3*n+3]
-            s = 2*t/(1+np.linalg.norm(t,2)**2)
-            vp = vm + np.cross(vm+np.cross(vm,t),s)
-            # post-velocity
-            vel.values[3*n:3*n+3] = vp + dt/2*a* Emean.values[3*n:3*n+3] + c.values[3*n:3*n+3]/2
+        # pre-velocity, separated by the electric forces (and the c term)
+        vm = vold + dt/2*a*Emean + cmat/2
+        # rotation
+        t = dt/2*a*new_fields.magn.values.reshape(N,3)
+        s = 2*t/(1+np.sum(t**2,axis=1))[:,np.newaxis]
+        vp = vm + np.cross(vm+np.cross(vm,t),s)
+        # post-velocity
+        vel.values[:] = (vp + dt/2*a*Emean + cmat/2).reshape(3*N)
 
         return vel
 
@@ -282,14 +315,8 @@ class penningtrap_coarse(penningtrap):
             Fields for the particles (external only)
         """
 
-        N = self.nparts
-
-        Emat = np.diag([1,1,-2])
-        f = fields(self.nparts,vals=(0,0))
+        f = self.dtype_f(self.nparts,vals=(0,0))
 
-        for n in range(N):
-            f.elec.values[3*n:3*n+3] = self.omega_E**2 / (part.q[n]/part.m[n]) * np.dot(Emat,part.pos.values[
-                                                                                              3*n:3*n+3])
-            f.magn.values[3*n:3*n+3] = self.omega_B * np.array([0,0,1])
+        self.get_external_fields(part,f)
 
         return f
@@ -1,5 +1,4 @@
 from pySDC.Transfer import transfer
-from pySDC.datatype_classes.particles import particles, fields
 
 class particles_to_particles(transfer):
     """
@@ -35,10 +34,9 @@ class particles_to_particles(transfer):
 
         """
 
-        if isinstance(F,particles):
-            G = particles(F)
-        elif isinstance(F,fields):
-            G = fields(F)
+        # particles or fields, of whichever data type module the problem uses
+        if isinstance(F,(self.fine.prob.dtype_u,self.fine.prob.dtype_f)):
+            G = type(F)(F)
         else:
             print('Transfer error')
             exit()
@@ -52,10 +50,9 @@ class particles_to_particles(transfer):
             G: the coarse level data (easier to access than via the coarse attribute)
         """
 
-        if isinstance(G,particles):
-            F = particles(G)
-        elif isinstance(G,fields):
-            F = fields(G)
+        # particles or fields, of whichever data type module the problem uses
+        if isinstance(G,(self.fine.prob.dtype_u,self.fine.prob.dtype_f)):
+            F = type(G)(G)
         else:
             print('Transfer error')
             exit()
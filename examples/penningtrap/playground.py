@@ -6,6 +6,7 @@ import matplotlib.pyplot as plt
 from examples.penningtrap.ProblemClass import penningtrap,penningtrap_coarse
 from examples.penningtrap.TransferClass import particles_to_particles
 from pySDC.datatype_classes.particles import particles, fields
+# from pySDC.datatype_classes.particles_soa import particles, fields # structure of arrays with in-place operations
 from pySDC.sweeper_classes.boris_2nd_order import boris_2nd_order
 from examples.penningtrap.HookClass import particles_output
 import pySDC.PFASST_blockwise as mp
@@ -37,6 +38,7 @@ if __name__ == "__main__":
     pparams['u0'] = np.array([[10,0,0],[100,0,100],[1],[1]])
     pparams['nparts'] = 10
     pparams['sig'] = 0.1
+    # pparams['theta'] = [0.3,0.8] # Barnes-Hut tree instead of the direct sum, more accurate on the fine level
 
     # This comes as read-in for the transfer operations (this is optional!)
     tparams = {}
@@ -47,6 +49,7 @@ if __name__ == "__main__":
     # num_nodes. The max. list size defines the number of levels!
     description = {}
     description['problem_class'] = [penningtrap,penningtrap_coarse]
+    # description['problem_class'] = [penningtrap,penningtrap] # coarse level with interactions (see theta above)
     # description['problem_class'] = [penningtrap]
     description['problem_params'] = pparams
     description['dtype_u'] = particles
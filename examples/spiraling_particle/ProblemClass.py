@@ -1,8 +1,8 @@
 from __future__ import division
+import importlib
 import numpy as np
 
 from pySDC.Problem import ptype
-from pySDC.datatype_classes.particles import particles, fields, acceleration
 
 class planewave_single(ptype):
     """
@@ -10,6 +10,7 @@ class planewave_single(ptype):
 
     Attributes:
         nparts: number of particles (needs to be 1 here)
+        dtype_acc: acceleration data type matching dtype_u
     """
 
     def __init__(self, cparams, dtype_u, dtype_f):
@@ -19,7 +20,7 @@ class planewave_single(ptype):
         Args:
             cparams: custom parameters for the example
             dtype_u: particle data type (will be passed parent class)
-            dtype_f: acceleration data type (will be passed parent class)
+            dtype_f: fields data type (will be passed parent class)
         """
 
         # these parameters will be used later, so assert their existence
@@ -36,6 +37,9 @@ class planewave_single(ptype):
         # invoke super init, passing nparts, dtype_u and dtype_f
         super(planewave_single,self).__init__(self.nparts, dtype_u, dtype_f)
 
+        # acceleration type belonging to the particle data type (from particles or particles_soa)
+        self.dtype_acc = importlib.import_module(dtype_u.__module__).acceleration
+
 
     def eval_f(self,part,t):
         """
@@ -48,7 +52,7 @@ class planewave_single(ptype):
             E and B field for the particle (external only)
         """
 
-        f = fields(self.nparts)
+        f = self.dtype_f(self.nparts)
 
         # f.elec.values[0] = 0
         # f.elec.values[1] = self.delta*self.a0*np.sin(t-part.pos.values[0])
@@ -85,7 +89,7 @@ class planewave_single(ptype):
 
         u0 = self.u0
         # some abbreviations
-        u = particles(1)
+        u = self.dtype_u(1)
 
         # # we need a Newton iteration to get x, the rest will follow...
         # x1 = 0
@@ -137,8 +141,8 @@ class planewave_single(ptype):
             correct RHS of type acceleration
         """
 
-        assert isinstance(part,particles)
-        rhs = acceleration(self.nparts)
+        assert isinstance(part,self.dtype_u)
+        rhs = self.dtype_acc(self.nparts)
         rhs.values[:] = part.q[:]/part.m[:]*(f.elec.values + np.cross(part.vel.values,f.magn.values))
 
         return rhs
@@ -159,7 +163,7 @@ class planewave_single(ptype):
         """
 
         N = self.nparts
-        vel = particles.velocity(N)
+        vel = self.dtype_u.velocity(N)
 
         Emean = 1/2*(old_fields.elec + new_fields.elec)
 
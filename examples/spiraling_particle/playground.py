@@ -8,6 +8,7 @@ from matplotlib import rc
 from pySDC import CollocationClasses as collclass
 from examples.spiraling_particle.ProblemClass import planewave_single
 from pySDC.datatype_classes.particles import particles, fields
+# from pySDC.datatype_classes.particles_soa import particles, fields # structure of arrays with in-place operations
 from pySDC.sweeper_classes.boris_2nd_order import boris_2nd_order
 from examples.spiraling_particle.HookClass import particles_output
 import pySDC.PFASST_stepwise as mp
@@ -26,6 +26,8 @@ if __name__ == "__main__":
 
     sparams = {}
     sparams['maxiter'] = 100
+    # sparams['adaptivity'] = True
+    # sparams['e_tol'] = 1E-05
 
     # This comes as read-in for the problem class
     pparams = {}
@@ -0,0 +1,287 @@
+import os
+import threading
+import queue
+import itertools
+import numbers
+import numpy as np
+
+from pySDC.Stats import stats
+from pySDC.Errors import DataError
+from pySDC.NodeStorage import data_attributes, is_composite
+
+
+class checkpointer():
+    """
+    Class for writing checkpoints of a running simulation in a background thread
+
+    Each checkpoint overwrites the previous one (written to a temporary file first, so that a crash during the write
+    does not destroy the last valid checkpoint). Only ndarray-backed data types (mesh, particles, ...) can be written.
+    The statistics are appended to a separate file (see stats_filename), each checkpoint only adds the entries which
+    are new since the last one and records how much of this file is valid.
+
+    Attributes:
+        filename: name of the checkpoint file (.npz)
+        jobs: queue of checkpoints waiting to be written
+        thread: the background thread doing the writes
+        error: exception raised during the last write (re-raised by the main thread)
+        nstats: number of statistics entries already queued for writing
+        stats_size: size of the valid part of the statistics file
+    """
+
+    def __init__(self,filename,resume=False):
+        """
+        Initialization routine
+
+        Args:
+            filename: name of the checkpoint file (.npz)
+            resume: flag whether the run continues from this checkpoint, then its statistics file is continued (and the
+                statistics loaded from it are not written again)
+        """
+        self.filename = filename
+        self.jobs = queue.Queue()
+        self.error = None
+        self.nstats = 0
+        self.stats_size = 0
+        if resume and os.path.isfile(filename):
+            self.nstats = len(stats.return_stats())
+            with np.load(filename,allow_pickle=False) as data:
+                self.stats_size = int(data['stats_size'])
+        self.thread = threading.Thread(target=self.__write_jobs)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def __write_jobs(self):
+        """
+        Main routine of the background thread: write checkpoints until None comes in
+        """
+        job = self.jobs.get()
+        while job is not None:
+            try:
+                self.stats_size = save_checkpoint(self.filename,*job,stats_size=self.stats_size)
+            except Exception as e:
+                self.error = e
+            job = self.jobs.get()
+
+    def write(self,uend,time,step,dt):
+        """
+        Routine to queue a checkpoint (copies of the data are taken right away, the solver may continue)
+
+        Only the statistics entries added since the last checkpoint are passed on. Entries which are overwritten later
+        (same key) are written again only if they are re-added after the last checkpoint.
+
+        Args:
+            uend: current end value on the finest level
+            time: time of uend (start of the next block)
+            step: number of the next step
+            dt: step size for the next block
+        Raises:
+            DataError: if an earlier write has failed
+        """
+        if self.error is not None:
+            raise DataError('writing checkpoint %s failed: %s' % (self.filename,self.error))
+        entries = list(itertools.islice(stats.return_stats().items(),self.nstats,None))
+        self.nstats += len(entries)
+        self.jobs.put((type(uend)(uend),time,step,dt,entries))
+
+    def close(self):
+        """
+        Routine to wait until all checkpoints have been written and to stop the background thread
+
+        Raises:
+            DataError: if a write has failed
+        """
+        self.jobs.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise DataError('writing checkpoint %s failed: %s' % (self.filename,self.error))
+
+
+def collect_arrays(u,prefix,arrays):
+    """
+    Helper routine to collect all arrays of a data type object (recursively), named by their attribute path
+
+    Args:
+        u: data type object
+        prefix: attribute path of u
+        arrays: dictionary to be filled
+    Raises:
+        DataError: if u contains something else than arrays, numbers and objects made of these
+    """
+    for k,v in data_attributes(u).items():
+        if isinstance(v,np.ndarray) or np.isscalar(v):
+            arrays[prefix+'.'+k] = np.asarray(v)
+        elif is_composite(v):
+            collect_arrays(v,prefix+'.'+k,arrays)
+        else:
+            raise DataError('cannot write %s of type %s to checkpoint' % (prefix+'.'+k,type(v)))
+
+
+def stats_filename(filename):
+    """
+    Helper routine for the name of the statistics file belonging to a checkpoint
+
+    Args:
+        filename: name of the checkpoint file (.npz)
+    Returns:
+        name of the statistics file
+    """
+    return filename+'.stats'
+
+
+def text_of(x):
+    """
+    Helper routine to write a level id or a type of the statistics (string or integer) as string
+
+    Args:
+        x: level id or type
+    Returns:
+        string
+    """
+    return x if isinstance(x,str) else str(int(x))
+
+
+def from_text(s):
+    """
+    Helper routine to read a level id or a type of the statistics, inverse of text_of
+
+    Args:
+        s: string
+    Returns:
+        level id or type
+    """
+    return int(s) if s.lstrip('-').isdigit() else str(s)
+
+
+def encode_stats(entries):
+    """
+    Helper routine to turn statistics entries into a structured array of plain numbers and strings
+
+    Args:
+        entries: list of (key,value) pairs of the statistics
+    Returns:
+        structured numpy array, one record per entry
+    Raises:
+        DataError: if a value is not a real number
+    """
+
+    for k,v in entries:
+        if not isinstance(v,numbers.Real):
+            raise DataError('cannot write statistics value %s of type %s to checkpoint' % (k,type(v)))
+
+    levels = [text_of(k.level) for k,v in entries]
+    types = [text_of(k.type) for k,v in entries]
+    dtype = [('step',np.int64),('time',np.float64),('level','U%d' % max(len(x) for x in levels)),
+             ('iter',np.int64),('type','U%d' % max(len(x) for x in types)),('value',np.float64),('integer',np.bool_)]
+
+    records = [(k.step,k.time,l,k.iter,t,v,isinstance(v,numbers.Integral))
+               for (k,v),l,t in zip(entries,levels,types)]
+    return np.array(records,dtype=dtype)
+
+
+def save_checkpoint(filename,uend,time,step,dt,entries,stats_size=0):
+    """
+    Routine to write a checkpoint
+
+    The statistics entries are appended to the statistics file after its first stats_size bytes (anything beyond,
+    e.g. from an interrupted write, is dropped).
+
+    Args:
+        filename: name of the checkpoint file (.npz)
+        uend: current end value on the finest level
+        time: time of uend (start of the next block)
+        step: number of the next step
+        dt: step size for the next block
+        entries: list of (key,value) pairs of the statistics added since the last checkpoint
+        stats_size: size of the valid part of the statistics file (0 to start a new one)
+    Returns:
+        new size of the valid part of the statistics file
+    """
+
+    arrays = {}
+    collect_arrays(uend,'u',arrays)
+
+    with open(stats_filename(filename),'r+b' if stats_size > 0 else 'wb') as f:
+        f.seek(stats_size)
+        if len(entries) > 0:
+            np.save(f,encode_stats(entries),allow_pickle=False)
+        f.truncate()
+        stats_size = f.tell()
+
+    tmpname = filename+'.tmp'
+    with open(tmpname,'wb') as f:
+        np.savez(f,time=time,step=step,dt=dt,stats_size=stats_size,**arrays)
+    os.replace(tmpname,filename)
+
+    return stats_size
+
+
+def load_checkpoint(filename,P):
+    """
+    Routine to read a checkpoint
+
+    The statistics of the checkpoint (read from its statistics file) are added to the global stats object.
+
+    Args:
+        filename: name of the checkpoint file (.npz)
+        P: problem on the finest level (to create the data type)
+
+    Returns:
+        end value on the finest level
+        time of the end value
+        number of the next step
+        step size for the next block
+    """
+
+    with np.load(filename,allow_pickle=False) as data:
+
+        # create new object and fill in the arrays along their attribute path
+        u = P.dtype_u(P.init)
+        for name in data.files:
+            if name.startswith('u.'):
+                path = name.split('.')[1:]
+                obj = u
+                for k in path[:-1]:
+                    obj = getattr(obj,k)
+                setattr(obj,path[-1],data[name].copy() if data[name].ndim > 0 else data[name][()])
+
+        time,step,dt,stats_size = float(data['time']),int(data['step']),float(data['dt']),int(data['stats_size'])
+
+    # statistics: all records in the valid part of the statistics file
+    with open(stats_filename(filename),'rb') as f:
+        while f.tell() < stats_size:
+            for r in np.load(f,allow_pickle=False):
+                value = int(r['value']) if r['integer'] else float(r['value'])
+                stats.add_to_stats(step=int(r['step']),time=float(r['time']),level=from_text(r['level']),
+                                   iter=int(r['iter']),type=from_text(r['type']),value=value)
+
+    return u,time,step,dt
+
+
+def resume_pfasst(filename,controller,num_procs,sparams,description,Tend):
+    """
+    Routine to continue a simulation from its last checkpoint
+
+    The block of steps is rebuilt with generate_steps of the controller, then run_pfasst continues from the saved time,
+    step number and step size.
+
+    Args:
+        filename: name of the checkpoint file (.npz)
+        controller: controller module (e.g. pySDC.PFASST_blockwise)
+        num_procs: number of (virtual) processors
+        sparams: parameters for the steps
+        description: description dictionary for the hierarchy
+        Tend: end time
+
+    Returns:
+        end values on the finest level
+        stats object containing statistics for each step, each level and each iteration
+    """
+
+    MS = controller.generate_steps(num_procs,sparams,description)
+    u0,t0,step0,dt = load_checkpoint(filename,MS[0].levels[0].prob)
+
+    # nothing left to do
+    if t0 >= Tend - np.finfo(float).eps:
+        return u0,stats.return_stats()
+
+    return controller.run_pfasst(MS,u0=u0,t0=t0,dt=dt,Tend=Tend,step0=step0)
@@ -1,4 +1,5 @@
 from __future__ import division
+import os
 from abc import ABCMeta, abstractmethod
 import numpy as np
 
@@ -231,3 +232,93 @@ class CollBase(object):
             delta[m] = self.nodes[m] - self.nodes[m-1]
 
         return delta
+
+
+# collocation objects created so far, keyed by type, number of nodes and interval
+cache = {}
+
+# attributes of a collocation object which are written to and read from the on-disk cache
+CACHED_ATTRIBUTES = ['num_nodes','tleft','tright','order','left_is_node','right_is_node','nodes','weights','Qmat',
+                     'Smat','delta_m']
+
+
+def get_collocation(collocation_class,num_nodes,tleft,tright,cache_dir=None):
+    """
+    Returns the collocation object of the given type for the given number of nodes and interval
+
+    The objects are computed only once per process and then taken from the cache, so they are shared (e.g. by all
+    levels of all steps) and their arrays are read-only. If cache_dir is given, the nodes, weights and matrices are
+    also stored there as .npz file and read back by later runs instead of computing them again.
+
+    Args:
+        collocation_class: collocation class (derived from CollBase)
+        num_nodes: number of collocation nodes
+        tleft: left interval boundary
+        tright: right interval boundary
+        cache_dir: directory for the on-disk cache (not used if None)
+    Returns:
+        collocation object with read-only arrays
+    """
+
+    key = (collocation_class,num_nodes,tleft,tright)
+    if key not in cache:
+        coll = None
+        if cache_dir is not None:
+            filename = os.path.join(cache_dir,'%s.%s_%d_%r_%r.npz' % (collocation_class.__module__,
+                                                                         collocation_class.__name__,num_nodes,tleft,
+                                                                         tright))
+            coll = load_collocation(collocation_class,filename)
+        if coll is None:
+            coll = collocation_class(num_nodes,tleft,tright)
+            if cache_dir is not None:
+                save_collocation(coll,filename)
+        for name in ['nodes','weights','Qmat','Smat','delta_m']:
+            getattr(coll,name).flags.writeable = False
+        cache[key] = coll
+
+    return cache[key]
+
+
+def load_collocation(collocation_class,filename):
+    """
+    Helper routine to read a collocation object from the on-disk cache
+
+    Args:
+        collocation_class: collocation class (derived from CollBase)
+        filename: name of the .npz file
+    Returns:
+        collocation object, None if the file does not exist or cannot be read
+    """
+
+    try:
+        with np.load(filename) as data:
+            values = dict((name,data[name]) for name in CACHED_ATTRIBUTES)
+    except (IOError,KeyError,ValueError):
+        return None
+
+    # the arrays are there already, so do not call __init__
+    coll = collocation_class.__new__(collocation_class)
+    for name,value in values.items():
+        setattr(coll,name,value.item() if value.ndim == 0 else value)
+
+    return coll
+
+
+def save_collocation(coll,filename):
+    """
+    Helper routine to write a collocation object to the on-disk cache
+
+    The file is written to a temporary file first, so that concurrent runs never read a partially written file.
+
+    Args:
+        coll: collocation object
+        filename: name of the .npz file
+    """
+
+    if os.path.dirname(filename):
+        os.makedirs(os.path.dirname(filename),exist_ok=True)
+
+    tmpname = '%s.%d.tmp' % (filename,os.getpid())
+    with open(tmpname,'wb') as f:
+        np.savez(f,**dict((name,getattr(coll,name)) for name in CACHED_ATTRIBUTES))
+    os.replace(tmpname,filename)
@@ -0,0 +1,154 @@
+import abc
+
+from future.utils import with_metaclass
+
+
+class request(object):
+    """
+    Handle for a non-blocking send or receive
+
+    Attributes:
+        comm: the communicator which created this request
+        source: the sending step (slot)
+        dest: the receiving step (slot)
+        tag: identifier of the message, e.g. (level, iter, slot)
+        data: the data of the message (available after completion for receives)
+        completed: flag whether the operation has been completed
+    """
+
+    __slots__ = ('comm','source','dest','tag','data','completed')
+
+    def __init__(self,comm,source,dest,tag,data=None,completed=False):
+        """
+        Initialization routine
+
+        Args:
+            comm: the communicator which created this request
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+            data: the data of the message (if already known)
+            completed: flag whether the operation has been completed already
+        """
+        self.comm = comm
+        self.source = source
+        self.dest = dest
+        self.tag = tag
+        self.data = data
+        self.completed = completed
+
+    def test(self):
+        """
+        Shortcut for the communicator's test routine
+
+        Returns:
+            True if the operation has been completed
+        """
+        return self.comm.test(self)
+
+    def wait(self):
+        """
+        Shortcut for the communicator's wait routine
+
+        Returns:
+            the data of the message
+        """
+        return self.comm.wait(self)
+
+
+class communicator(with_metaclass(abc.ABCMeta)):
+    """
+    Abstract communicator class
+
+    Communicators pass tagged messages between steps (identified by their slots). Sends are always buffered, i.e.
+    the data is stored by reference and the sender may continue right away. Messages with the same source, destination
+    and tag are received in the order they have been sent.
+    """
+
+    @abc.abstractmethod
+    def isend(self,data,source,dest,tag):
+        """
+        Abstract interface to the non-blocking send
+
+        Args:
+            data: the data to be sent
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+        Returns:
+            request object
+        """
+        return None
+
+    @abc.abstractmethod
+    def irecv(self,source,dest,tag):
+        """
+        Abstract interface to the non-blocking receive
+
+        Args:
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+        Returns:
+            request object
+        """
+        return None
+
+    @abc.abstractmethod
+    def test(self,req):
+        """
+        Abstract interface to check whether a request has been completed (without blocking)
+
+        Args:
+            req: request object
+        Returns:
+            True if the operation has been completed
+        """
+        return None
+
+    @abc.abstractmethod
+    def wait(self,req):
+        """
+        Abstract interface to wait until a request has been completed
+
+        Args:
+            req: request object
+        Returns:
+            the data of the message
+        """
+        return None
+
+    @abc.abstractmethod
+    def discard(self,dest):
+        """
+        Abstract interface to drop all messages for a step which have not been received (e.g. at a block restart)
+
+        Args:
+            dest: the receiving step (slot)
+        """
+        return None
+
+    def send(self,data,source,dest,tag):
+        """
+        Blocking send
+
+        Args:
+            data: the data to be sent
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+        """
+        self.wait(self.isend(data,source,dest,tag))
+
+    def recv(self,source,dest,tag):
+        """
+        Blocking receive
+
+        Args:
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+        Returns:
+            the data of the message
+        """
+        return self.wait(self.irecv(source,dest,tag))
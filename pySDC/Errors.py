@@ -28,3 +28,32 @@ class DataError(Exception):
         return self.value
 
 
+
+
+class CommunicationError(Exception):
+    """
+    Custom error class for communication errors, e.g. when receiving messages with unexpected tags
+
+    Attributes:
+        value: a string which will contain the message provided by the user/caller
+    """
+
+    def __init__(self, value):
+        """
+        Initialization routine
+
+        Args:
+            value: a string which will contain the message provided by the user/caller
+        """
+
+        self.value = value
+
+    def __str__(self):
+        """
+        Returns the string
+
+        Returns
+            value attribute
+        """
+
+        return self.value
@@ -2,6 +2,8 @@ import copy as cp
 import logging
 
 from pySDC import Stats as statclass
+from pySDC.NodeStorage import contiguous_nodes
+from pySDC.Collocation import get_collocation
 
 
 class level():
@@ -17,9 +19,11 @@ class level():
         params: parameter object containing the custom parameters passed by the user
         status: status object
         uend: dof values at the right end point of the interval
-        u: dof values at the nodes (+uold for saving data during restriction)
-        f: RHS values at the nodes (+fold for saving data during restriction)
-        tau: FAS correction, allocated via step class if necessary
+        u: dof values at the nodes (+uold for saving data during restriction), list or contiguous_nodes
+        f: RHS values at the nodes (+fold for saving data during restriction), list or contiguous_nodes
+        tau: FAS correction at the nodes and, if the right end point is not a node, at the end point (last entry),
+             allocated via step class if necessary
+        __pool: spare data type objects for reuse, one list per data type (only with the level parameter pool)
         id: custom string naming this level
         logger: a logging object for level-dependent output
         __step: link to the step where this level is part of (set from the outside by the step)
@@ -33,6 +37,7 @@ class level():
 
         Attributes:
             residual: current residual
+            error_estimate: current estimate of the local error (only used for adaptivity)
             unlocked: indicates if the data on this level can be used
             updated: indicates if the data on this level is new
         """
@@ -44,12 +49,13 @@ class level():
             """
 
             self.residual = None #FIXME: isn't that obsolete?
+            self.error_estimate = None
             self.unlocked = False
             self.updated = False
 
 
     __slots__ = ('__prob','__sweep','uend','u','uold','f','fold','tau','status','params','id','__step','id','__tag',
-                 '__hooks')
+                 '__hooks','__pool')
 
 
     def __init__(self, problem_class, problem_params, dtype_u, dtype_f, collocation_class, num_nodes, sweeper_class,
@@ -76,6 +82,13 @@ class level():
 
                 defaults = dict()
                 defaults['restol'] = 0.0
+                defaults['contiguous'] = False
+                defaults['QI'] = None
+                defaults['QE'] = None
+                defaults['node_pool'] = 'thread'
+                defaults['node_workers'] = None
+                defaults['pool'] = False
+                defaults['coll_cache_dir'] = None
 
                 for k,v in defaults.items():
                     setattr(self,k,v)
@@ -83,23 +96,21 @@ class level():
                 for k,v in params.items():
                     setattr(self,k,v)
 
-        # instantiate collocation, sweeper, problem and hooks
-        coll = collocation_class(num_nodes,0,1)
-        self.__sweep = sweeper_class(coll)
-        self.__prob = problem_class(problem_params,dtype_u,dtype_f)
-        self.__hooks = hook_class()
-
         # set level parameters and status
         self.params = pars(level_params)
         self.status = level.cstatus()
 
+        # instantiate collocation (shared with all other levels using the same one), sweeper, problem and hooks
+        coll = get_collocation(collocation_class,num_nodes,0,1,cache_dir=self.params.coll_cache_dir)
+        self.__sweep = sweeper_class(coll)
+        self.__prob = problem_class(problem_params,dtype_u,dtype_f)
+        self.__hooks = hook_class()
+
         # empty data the nodes, the right end point and tau
         self.uend = None
-        self.u = [None] * (self.sweep.coll.num_nodes+1)
-        self.uold = [None] * (self.sweep.coll.num_nodes+1)
-        self.f = [None] * (self.sweep.coll.num_nodes+1)
-        self.fold = [None] * (self.sweep.coll.num_nodes+1)
         self.tau = None
+        self.__pool = {}
+        self.__alloc_nodes()
 
         # set name
         self.id = id
@@ -122,12 +133,99 @@ class level():
         # reset status
         self.status = level.cstatus()
 
-        # all data back to None
+        # all data back to None (contiguous storage is kept and reused, otherwise the old objects go to the pool)
         self.uend = None
-        self.u = [None] * (self.sweep.coll.num_nodes+1)
-        self.uold = [None] * (self.sweep.coll.num_nodes+1)
-        self.f = [None] * (self.sweep.coll.num_nodes+1)
-        self.fold = [None] * (self.sweep.coll.num_nodes+1)
+        if not self.params.contiguous:
+            self.release(*(self.u + self.uold + self.f + self.fold))
+            self.__alloc_nodes()
+        self.sweep.invalidate_integral()
+
+
+    def __alloc_nodes(self):
+        """
+        Routine to set up the data at the nodes
+
+        By default, these are lists of data type objects (None for now). With the level parameter contiguous, all
+        nodes of u, uold, f and fold are kept in one array of shape (M+1,*shape) each, see NodeStorage.
+        """
+
+        num = self.sweep.coll.num_nodes+1
+
+        if self.params.contiguous:
+            self.u = contiguous_nodes(self.prob.dtype_u,self.prob.init,num)
+            self.uold = contiguous_nodes(self.prob.dtype_u,self.prob.init,num)
+            self.f = contiguous_nodes(self.prob.dtype_f,self.prob.init,num)
+            self.fold = contiguous_nodes(self.prob.dtype_f,self.prob.init,num)
+        else:
+            self.u = [None] * num
+            self.uold = [None] * num
+            self.f = [None] * num
+            self.fold = [None] * num
+
+
+    @property
+    def __pooling(self):
+        """
+        Checks whether data type objects are recycled (level parameter pool, not needed for contiguous storage)
+        """
+        return self.params.pool and not self.params.contiguous
+
+
+    def acquire(self,dtype):
+        """
+        Routine to get an object of a data type, taken from the pool if possible
+
+        Args:
+            dtype: data type (e.g. dtype_u or dtype_f of the problem)
+        Returns:
+            object of this data type, its values are undefined and have to be overwritten
+        """
+
+        spares = self.__pool.get(dtype)
+        if spares:
+            return spares.pop()
+        return dtype(self.prob.init)
+
+
+    def acquire_copy(self,dtype,other):
+        """
+        Routine to get a copy of other (same as dtype(other)), using an object from the pool if possible
+
+        Args:
+            dtype: data type (e.g. dtype_u or dtype_f of the problem)
+            other: object to be copied
+        Returns:
+            new object of this data type with the values of other
+        """
+
+        if self.__pooling and hasattr(dtype,'copy_from'):
+            me = self.acquire(dtype)
+            me.copy_from(other)
+            return me
+        return dtype(other)
+
+
+    def release(self,*objs):
+        """
+        Routine to give objects back to the pool, so that acquire can reuse them
+
+        The objects must not be used anywhere else afterwards! None and objects without copy_from are ignored, as well
+        as everything beyond twice the number of nodes per data type (the pool does not grow over the blocks).
+
+        Args:
+            objs: data type objects
+        """
+
+        if not self.__pooling:
+            return
+
+        max_spares = 2*(self.sweep.coll.num_nodes+1)
+        for obj in objs:
+            if obj is None or not hasattr(obj,'copy_from'):
+                continue
+            spares = self.__pool.setdefault(type(obj),[])
+            if len(spares) < max_spares and not any(obj is spare for spare in spares):
+                spares.append(obj)
 
 
     def __add_tau(self):
@@ -138,7 +236,8 @@ class level():
         """
 
         if self.tau is None:
-            self.tau = [None] * self.sweep.coll.num_nodes
+            # one more entry for the end point, if uend is not just the value at the last node
+            self.tau = [None] * (self.sweep.coll.num_nodes + int(not self.sweep.coll.right_is_node))
         else:
             raise WTF #FIXME
 
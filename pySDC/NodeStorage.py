@@ -0,0 +1,248 @@
+import numpy as np
+
+from pySDC.Errors import DataError
+
+
+def data_attributes(obj):
+    """
+    Helper routine to get all attributes of a data type object, for classes with __dict__ as well as with __slots__
+
+    Args:
+        obj: data type object
+    Returns:
+        dictionary of attribute names and values
+    """
+    if hasattr(obj,'__dict__'):
+        return vars(obj)
+    names = [k for cls in type(obj).__mro__ for k in getattr(cls,'__slots__',())]
+    return dict((k,getattr(obj,k)) for k in names if hasattr(obj,k))
+
+
+def is_composite(obj):
+    """
+    Helper routine to check whether an object is made of attributes (i.e. a data type object or a part of it)
+    """
+    return hasattr(obj,'__dict__') or hasattr(obj,'__slots__')
+
+
+def array_paths(obj,prefix=''):
+    """
+    Helper routine to find all arrays of a data type object (recursively), named by their attribute path
+
+    Args:
+        obj: data type object
+        prefix: attribute path of obj
+    Returns:
+        list of attribute paths (e.g. ['values'] for mesh, ['impl.values','expl.values'] for rhs_imex_mesh)
+    Raises:
+        DataError: if obj contains something else than arrays and objects made of arrays
+    """
+    paths = []
+    for k,v in sorted(data_attributes(obj).items()):
+        if isinstance(v,np.ndarray):
+            paths.append(prefix+k)
+        elif is_composite(v):
+            paths += array_paths(v,prefix+k+'.')
+        else:
+            raise DataError('cannot store %s of type %s contiguously' % (prefix+k,type(v)))
+    return paths
+
+
+def get_leaf(obj,path):
+    """
+    Helper routine to get the array at the end of an attribute path
+    """
+    for k in path.split('.'):
+        obj = getattr(obj,k)
+    return obj
+
+
+def set_leaf(obj,path,arr):
+    """
+    Helper routine to set the array at the end of an attribute path
+    """
+    keys = path.split('.')
+    for k in keys[:-1]:
+        obj = getattr(obj,k)
+    setattr(obj,keys[-1],arr)
+
+
+class contiguous_nodes():
+    """
+    List-like storage for the values at the left interval boundary and at the collocation nodes of a level
+
+    All nodes are kept in one contiguous array of shape (M+1,*shape) per component of the data type, allocated once
+    and reused for all steps. Indexing returns an object of the usual data type (e.g. mesh), whose arrays are views
+    into the stacked arrays. Assigning to a node copies the values into the storage, so the usual sweeper code
+    (L.u[m] = ...) works without changes.
+
+    If the arrays of a node object are replaced from the outside (e.g. L.u[m].pos = ...), the node is synchronized
+    with the storage the next time it is accessed.
+
+    Attributes:
+        data: dictionary of stacked arrays of shape (M+1,*shape), keyed by the attribute path of the component
+        paths: attribute paths of all components (e.g. ['values'] for mesh)
+        dtype: data type of the nodes
+        init: init of the data type
+        __views: views into data, one dictionary (keyed by attribute path) per node
+        __nodes: node objects, their arrays are the views
+    """
+
+    def __init__(self,dtype,init,num):
+        """
+        Initialization routine
+
+        Args:
+            dtype: data type of the nodes (e.g. mesh or rhs_imex_mesh)
+            init: init of the data type (e.g. number of degrees of freedom)
+            num: number of nodes (M+1)
+        Raises:
+            DataError: if the data type is not ndarray-backed
+        """
+        self.dtype = dtype
+        self.init = init
+
+        template = dtype(init)
+        self.paths = array_paths(template)
+        if len(self.paths) == 0:
+            raise DataError('cannot store %s contiguously, it contains no arrays' % dtype)
+
+        self.data = {}
+        for path in self.paths:
+            leaf = get_leaf(template,path)
+            self.data[path] = np.zeros((num,)+np.shape(leaf),dtype=leaf.dtype)
+
+        self.__views = [dict((path,self.data[path][m]) for path in self.paths) for m in range(num)]
+        self.__nodes = [self.__view(m) for m in range(num)]
+
+    def __view(self,m):
+        """
+        Creates a node object whose arrays are views into the storage
+
+        Args:
+            m: index of the node
+        Returns:
+            node object
+        """
+        me = self.dtype(self.init)
+        for path in self.paths:
+            set_leaf(me,path,self.__views[m][path])
+        return me
+
+    def __detached(self,m):
+        """
+        Checks whether all arrays of node m are still the views into the storage
+
+        Args:
+            m: index of the node
+        Returns:
+            list of attribute paths which are not attached anymore
+        """
+        return [path for path in self.paths if get_leaf(self.__nodes[m],path) is not self.__views[m][path]]
+
+    def __sync(self,m):
+        """
+        Makes sure node m uses the storage (copies values and re-creates the node, if its arrays have been replaced)
+
+        Args:
+            m: index of the node
+        """
+        detached = self.__detached(m)
+        if detached:
+            for path in detached:
+                self.data[path][m] = get_leaf(self.__nodes[m],path)
+            self.__nodes[m] = self.__view(m)
+
+    def __len__(self):
+        return len(self.__nodes)
+
+    def __getitem__(self,m):
+        """
+        Getter for node m (view into the storage)
+        """
+        m = range(len(self.__nodes))[m]
+        self.__sync(m)
+        return self.__nodes[m]
+
+    def __setitem__(self,m,other):
+        """
+        Copies the values of other into node m
+
+        Args:
+            m: index of the node
+            other: object of the same data type
+        """
+        m = range(len(self.__nodes))[m]
+        for path in self.paths:
+            self.data[path][m] = get_leaf(other,path)
+        # old values of replaced arrays are outdated now, just re-create the node
+        if self.__detached(m):
+            self.__nodes[m] = self.__view(m)
+
+    def __iter__(self):
+        for m in range(len(self.__nodes)):
+            yield self[m]
+
+    def array(self,path='values'):
+        """
+        Getter for the stacked array of one component (all nodes synchronized before)
+
+        Args:
+            path: attribute path of the component (e.g. 'values' or 'impl.values')
+        Returns:
+            array of shape (M+1,*shape)
+        """
+        for m in range(len(self.__nodes)):
+            self.__sync(m)
+        return self.data[path]
+
+
+def is_ndarray_backed(obj,paths):
+    """
+    Helper routine to check whether all given components of a data type object are ndarrays
+
+    Args:
+        obj: data type object
+        paths: attribute paths of the components (e.g. ['values'])
+    Returns:
+        True if all components exist and are ndarrays
+    """
+    try:
+        return all(isinstance(get_leaf(obj,path),np.ndarray) for path in paths)
+    except AttributeError:
+        return False
+
+
+def stack_nodes(nodes,path='values'):
+    """
+    Helper routine to get one component of all nodes as one array of shape (len(nodes),*shape)
+
+    For contiguous storage this is the storage itself (no copy!), for lists the values are copied into a new array.
+
+    Args:
+        nodes: list or contiguous_nodes
+        path: attribute path of the component (e.g. 'values' or 'impl.values')
+    Returns:
+        stacked array
+    """
+    if isinstance(nodes,contiguous_nodes):
+        return nodes.array(path)
+    else:
+        return np.array([get_leaf(node,path) for node in nodes])
+
+
+def wrap_array(dtype,init,arr,path='values'):
+    """
+    Helper routine to create a data type object around an existing array (no copy)
+
+    Args:
+        dtype: data type (e.g. mesh)
+        init: init of the data type
+        arr: the array
+        path: attribute path of the component (e.g. 'values')
+    Returns:
+        data type object
+    """
+    me = dtype(init)
+    set_leaf(me,path,arr)
+    return me
@@ -3,95 +3,159 @@ import copy as cp
 import numpy as np
 
 from pySDC.Stats import stats
+from pySDC.Checkpoint import checkpointer
+from pySDC.communicator_classes.in_process import in_process
 
 from pySDC.PFASST_helper import *
 
 
 #TODO:
-#  - restore MSSDC
-#  - stop iterating if done to avoid noise
-#  - ring parallelization...?
+#  - ring parallelization (see PFASST_stepwise)
 
 
-def run_pfasst(MS,u0,t0,dt,Tend):
+def run_pfasst(MS,u0,t0,dt,Tend,comm=None,step0=0):
     """
     Main driver for running the serial version of SDC, MLSDC and PFASST (virtual parallelism)
 
+    With only a single level per step, the block runs multi-step SDC (MSSDC): each step receives the new uend of
+    the previous step before every sweep. With the step parameter freeze_converged set, converged steps stop iterating
+    as soon as all previous steps are done, too. Their last uend is passed to the next step, which then continues as
+    the first one in line.
+
+    With the step parameter adaptivity set, each block is checked against the tolerance e_tol using an embedded error
+    estimate. The next block starts right after the last accepted step with a new step size, the last step ends
+    exactly at Tend.
+
+    With the step parameter checkpoint_file set, uend, time, step number, step size and statistics are written to this
+    file every checkpoint_every blocks, see pySDC.Checkpoint.
+
     Args:
         MS: block of steps (list)
         u0: initial values on the finest level
         t0: initial time
-        dt: step size (could be changed here e.g. for adaptivity)
+        dt: step size (initial step size with adaptivity)
         Tend: end time
+        comm: communicator passing the values between the steps (default: in-process communicator)
+        step0: number of the first step (e.g. when resuming from a checkpoint)
 
     Returns:
         end values on the finest level
         stats object containing statistics for each step, each level and each iteration
     """
 
-    # fixme: use error classes for send/recv and stage errors
+    # fixme: use error classes for stage errors
 
     # some initializations
     uend = None
     num_procs = len(MS)
 
-    if num_procs > 1:
-        assert len(MS[0].levels) > 1
+    # background writer for checkpoints (if requested)
+    chkpt = None
+    nblocks = 0
+    if MS[0].params.checkpoint_file is not None:
+        chkpt = checkpointer(MS[0].params.checkpoint_file,resume=step0 > 0)
+
+    if comm is None:
+        comm = in_process()
 
     # initial ordering of the steps: 0,1,...,Np-1
     slots = [p for p in range(num_procs)]
 
     # initialize time variables of each step
-    for p in slots:
-        MS[p].status.dt = dt # could have different dt per step here
-        MS[p].status.time = t0 + sum(MS[j].status.dt for j in range(p))
-        MS[p].status.step = p
+    if MS[0].params.adaptivity:
+        # adaptive step sizes: the block ends exactly at Tend
+        active_slots = distribute_times(MS,slots,t0,step0,dt,Tend)
+        active = [p in active_slots for p in slots]
+    else:
+        for p in slots:
+            MS[p].status.dt = dt # could have different dt per step here
+            MS[p].status.time = t0 + sum(MS[j].status.dt for j in range(p))
+            MS[p].status.step = step0 + p
 
-    # determine which steps are still active (time < Tend)
-    active = [MS[p].status.time < Tend - np.finfo(float).eps for p in slots]
-    # compress slots according to active steps, i.e. remove all steps which have times above Tend
-    active_slots = list(itertools.compress(slots, active))
+        # determine which steps are still active (time < Tend)
+        active = [MS[p].status.time < Tend - np.finfo(float).eps for p in slots]
+        # compress slots according to active steps, i.e. remove all steps which have times above Tend
+        active_slots = list(itertools.compress(slots, active))
 
     # initialize block of steps with u0
-    MS = restart_block(MS,active_slots,u0)
+    MS = restart_block(MS,active_slots,u0,comm)
 
     # call pre-start hook
-    MS[active_slots[0]].levels[0].hooks.dump_pre(MS[p].status)
+    MS[active_slots[0]].levels[0].hooks.dump_pre(MS[active_slots[0]].status)
 
     # main loop: as long as at least one step is still active (time < Tend), do something
     while any(active):
 
+        # only steps which are not done yet take part (converged steps may be frozen already)
+        running_slots = [p for p in active_slots if not MS[p].status.done]
+
         MS_active = []
-        for p in active_slots:
+        for p in running_slots:
             MS_active.append(MS[p])
 
-        MS_active = pfasst(MS_active)
+        MS_active = pfasst(MS_active,comm)
 
         for p in range(len(MS_active)):
-            MS[active_slots[p]] = MS_active[p]
+            MS[running_slots[p]] = MS_active[p]
 
 
         # if all active steps are done
         if all([MS[p].status.done for p in active_slots]):
 
-            # uend is uend of the last active step in the list
-            uend = MS[active_slots[-1]].levels[0].uend
+            if MS[0].params.adaptivity:
+
+                # accept steps up to the first one with too large error, continue right after the last accepted one
+                accepted,dt = adapt_step_sizes(MS,active_slots)
+                if accepted > 0:
+                    S = MS[active_slots[accepted-1]]
+                    uend = S.levels[0].uend
+                    time = S.status.time + S.status.dt
+                    step = S.status.step + 1
+                else:
+                    S = MS[active_slots[0]]
+                    uend = S.levels[0].u[0]
+                    time = S.status.time
+                    step = S.status.step
+
+                # determine new set of active steps with the new step size
+                active_slots = distribute_times(MS,slots,time,step,dt,Tend)
+                active = [p in active_slots for p in slots]
+
+            else:
+
+                # uend is uend of the last active step in the list
+                S = MS[active_slots[-1]]
+                uend = S.levels[0].uend
+                time = S.status.time + S.status.dt
+                step = S.status.step + 1
+                dt = S.status.dt
 
-            # determine new set of active steps and compress slots accordingly
-            active = [MS[p].status.time+num_procs*MS[p].status.dt < Tend - np.finfo(float).eps for p in slots]
-            active_slots = list(itertools.compress(slots, active))
+                # determine new set of active steps and compress slots accordingly
+                active = [MS[p].status.time+num_procs*MS[p].status.dt < Tend - np.finfo(float).eps for p in slots]
+                active_slots = list(itertools.compress(slots, active))
+
+                # increment timings for now active steps
+                for p in active_slots:
+                    MS[p].status.time += num_procs*MS[p].status.dt
+                    MS[p].status.step += num_procs
+
+            # write checkpoint (in the background) every checkpoint_every blocks
+            if chkpt is not None:
+                nblocks += 1
+                if nblocks % MS[0].params.checkpoint_every == 0:
+                    chkpt.write(uend,time,step,dt)
 
-            # increment timings for now active steps
-            for p in active_slots:
-                MS[p].status.time += num_procs*MS[p].status.dt
-                MS[p].status.step += num_procs
             # restart active steps (reset all values and pass uend to u0)
-            MS = restart_block(MS,active_slots,uend)
+            MS = restart_block(MS,active_slots,uend,comm)
+
+    # wait until the last checkpoint has been written
+    if chkpt is not None:
+        chkpt.close()
 
     return uend,stats.return_stats()
 
 
-def restart_block(MS,active_slots,u0):
+def restart_block(MS,active_slots,u0,comm):
     """
     Helper routine to reset/restart block of (active) steps
 
@@ -99,6 +163,7 @@ def restart_block(MS,active_slots,u0):
         MS: block of (all) steps
         active_slots: list of active steps
         u0: initial value to distribute across the steps
+        comm: communicator (messages not received in the last block are dropped)
 
     Returns:
         block of (all) steps
@@ -112,8 +177,9 @@ def restart_block(MS,active_slots,u0):
 
             # store current slot number for diagnostics
             MS[p].status.slot = p
-            # store link to previous step
+            # store link to previous and next step
             MS[p].prev = MS[active_slots[j-1]]
+            MS[p].next = MS[active_slots[(j+1)%len(active_slots)]]
             # resets step
             MS[p].reset_step()
             # determine whether I am the first and/or last in line
@@ -127,48 +193,59 @@ def restart_block(MS,active_slots,u0):
             MS[p].status.stage = 'SPREAD'
             for l in MS[p].levels:
                 l.tag = None
+            # drop outdated messages (e.g. fine values sent in the last iteration)
+            comm.discard(dest=p)
 
     return MS
 
 
-def recv(target,source,tag=None):
+def recv(S,l,tag,comm):
     """
     Receive function
 
     Args:
-        target: level which will receive the values
-        source: level which initiated the send
+        S: step which will receive the values
+        l: index of the level which will receive the values
         tag: identifier to check if this message is really for me
+        comm: communicator
     """
 
-    if tag is not None and source.tag != tag:
-        print('RECV ERROR',tag,source.tag)
-        exit()
-    # simply do a deepcopy of the values uend to become the new u0 at the target
-    target.u[0] = target.prob.dtype_u(source.uend)
+    target = S.levels[l]
+    # receive uend of the previous step, a copy becomes the new u0 at the target
+    target.u[0] = target.acquire_copy(target.prob.dtype_u,comm.recv(source=S.prev.status.slot,dest=S.status.slot,
+                                                                    tag=tag))
     # re-evaluate f on left interval boundary
     target.f[0] = target.prob.eval_f(target.u[0],target.time)
+    target.sweep.invalidate_integral()
 
 
-def send(source,tag):
+def send(S,l,tag,comm):
     """
     Send function
 
     Args:
-        source: level which has the new values
+        S: step which has the new values
+        l: index of the level which has the new values
         tag: identifier for this message
+        comm: communicator
     """
-    # sending here means computing uend ("one-sided communication")
+
+    source = S.levels[l]
+    # compute uend and pass it to the next step (non-blocking)
     source.sweep.compute_end_point()
     source.tag = cp.deepcopy(tag)
+    # the last step has nobody to send to
+    if not S.status.last:
+        comm.isend(source.uend,source=S.status.slot,dest=S.next.status.slot,tag=tag)
 
 
-def predictor(MS):
+def predictor(MS,comm):
     """
     Predictor function, extracted from the stepwise implementation (will be also used by matrix sweppers)
 
     Args:
         MS: multiple steps
+        comm: communicator
 
     Returns:
         block of steps with initial values
@@ -193,14 +270,14 @@ def predictor(MS):
             S.levels[-1].sweep.update_nodes()
 
             # send updated values on coarsest level
-            send(S.levels[-1],tag=(len(S.levels),0,S.status.slot))
+            send(S,-1,tag=(len(S.levels),0,S.status.slot),comm=comm)
 
         # loop over last steps: [2,3,4], [3,4], [4]
         for p in range(q+1,len(MS)):
 
             S = MS[p]
             # receive values sent during previous sweep
-            recv(S.levels[-1],S.prev.levels[-1],tag=(len(S.levels),0,S.prev.status.slot))
+            recv(S,-1,tag=(len(S.levels),0,S.prev.status.slot),comm=comm)
 
     # loop over all steps
     for S in MS:
@@ -212,7 +289,7 @@ def predictor(MS):
     return MS
 
 
-def pfasst(MS):
+def pfasst(MS,comm):
     """
     Main function including the stages of SDC, MLSDC and PFASST (the "controller")
 
@@ -220,6 +297,7 @@ def pfasst(MS):
 
     Args:
         MS: all active steps
+        comm: communicator
 
     Returns:
         all active steps
@@ -258,7 +336,7 @@ def pfasst(MS):
         if case('PREDICT'):
             # call predictor (serial)
 
-            MS = predictor(MS)
+            MS = predictor(MS,comm)
 
             for S in MS:
                 # update stage
@@ -274,6 +352,10 @@ def pfasst(MS):
                 # increment iteration count here (and only here)
                 S.status.iter += 1
 
+                # single level (MSSDC): receive from previous step (if not first)
+                if len(S.levels) == 1 and not S.status.first:
+                    recv(S,0,tag=(0,S.status.iter,S.prev.status.slot),comm=comm)
+
                 # standard sweep workflow: update nodes, compute residual, log progress
                 S.levels[0].sweep.update_nodes()
                 S.levels[0].sweep.compute_residual()
@@ -281,9 +363,9 @@ def pfasst(MS):
 
                 S.levels[0].hooks.dump_iteration(S.status)
 
-                # send updated values forward (non-blocking)
-                if S.params.fine_comm:
-                    send(S.levels[0],tag=(0,S.status.iter,S.status.slot))
+                # send updated values forward (non-blocking), always needed for MSSDC
+                if S.params.fine_comm or len(S.levels) == 1:
+                    send(S,0,tag=(0,S.status.iter,S.status.slot),comm=comm)
 
                 # update stage
                 S.status.stage = 'IT_CHECK'
@@ -297,8 +379,34 @@ def pfasst(MS):
             for S in MS:
                 S.status.done = check_convergence(S)
 
+            # freeze converged steps right away if all previous steps are done, too
+            if MS[0].params.freeze_converged:
+
+                for S in MS:
+
+                    if S.status.done and (S.status.first or S.prev.status.done):
+                        # done: no more sweeps for this step
+                        S.levels[0].sweep.compute_end_point()
+                        S.levels[0].hooks.dump_step(S.status)
+                        S.status.stage = 'DONE'
+                        # serve last uend to the next step, which is the first one in line from now on
+                        # (for MSSDC, the next step got these values already during its last sweep)
+                        if not S.status.last:
+                            if len(S.levels) > 1:
+                                if not S.params.fine_comm:
+                                    send(S,0,tag=(0,S.status.iter,S.status.slot),comm=comm)
+                                recv(S.next,0,tag=(0,S.status.iter,S.status.slot),comm=comm)
+                            S.next.status.first = True
+                    else:
+                        S.status.done = False
+                        # multi-level or single-level?
+                        if len(S.levels) > 1:
+                            S.status.stage = 'IT_UP'
+                        else:
+                            S.status.stage = 'IT_FINE'
+
             # if not everyone is ready yet, keep doing stuff
-            if not all(S.status.done for S in MS):
+            elif not all(S.status.done for S in MS):
 
                 for S in MS:
                     S.status.done = False
@@ -332,7 +440,7 @@ def pfasst(MS):
                     S.levels[l].hooks.dump_sweep(S.status)
 
                     if S.params.fine_comm:
-                        send(S.levels[l],tag=(l,S.status.iter,S.status.slot))
+                        send(S,l,tag=(l,S.status.iter,S.status.slot),comm=comm)
 
                     # transfer further up the hierarchy
                     S.transfer(source=S.levels[l],target=S.levels[l+1])
@@ -350,7 +458,7 @@ def pfasst(MS):
 
                 # receive from previous step (if not first)
                 if not S.status.first:
-                    recv(S.levels[-1],S.prev.levels[-1],tag=(len(S.levels),S.status.iter,S.prev.status.slot))
+                    recv(S,-1,tag=(len(S.levels),S.status.iter,S.prev.status.slot),comm=comm)
 
                 # do the sweep
                 S.levels[-1].sweep.update_nodes()
@@ -358,7 +466,7 @@ def pfasst(MS):
                 S.levels[-1].hooks.dump_sweep(S.status)
 
                 # send to next step
-                send(S.levels[-1],tag=(len(S.levels),S.status.iter,S.status.slot))
+                send(S,-1,tag=(len(S.levels),S.status.iter,S.status.slot),comm=comm)
 
                 # update stage
                 S.status.stage = 'IT_DOWN'
@@ -377,7 +485,7 @@ def pfasst(MS):
 
                     # # receive values from IT_UP (non-blocking)
                     if S.params.fine_comm and not S.status.first:
-                        recv(S.levels[l-1],S.prev.levels[l-1],tag=(l-1,S.status.iter,S.prev.status.slot))
+                        recv(S,l-1,tag=(l-1,S.status.iter,S.prev.status.slot),comm=comm)
 
                     # prolong values
                     S.transfer(source=S.levels[l],target=S.levels[l-1])
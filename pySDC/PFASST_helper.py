@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class switch(object):
     """
     Helper class for using case/switch statements in Python (not necessary, but easier to read)
@@ -68,4 +71,78 @@ def check_convergence(S):
     res = L.status.residual
     converged = S.status.iter >= S.params.maxiter or res <= L.params.restol
 
-    return converged
\ No newline at end of file
+    return converged
+
+def adapt_step_sizes(MS,active_slots):
+    """
+    Routine to accept or reject the steps of a block and to determine the next step size (adaptivity)
+
+    Each step estimates its local error on the finest level. The steps are accepted up to the first one whose estimate
+    exceeds e_tol (all following steps started from a wrong value). The new step size is the smallest one proposed by
+    the accepted steps and the first rejected step, using dt_new = dt * (0.9 * e_tol / error)^(1/order), but changing
+    dt by a factor of at most 2 (up) or 1/4 (down).
+
+    The estimate keeps close to e_tol, but it is the error of a lower-order extrapolation (see compute_error_estimate),
+    so the actual local error of the accepted steps is usually much smaller than e_tol and the steps are smaller than
+    necessary.
+
+    Args:
+        MS: block of (all) steps
+        active_slots: list of active steps (in the correct order)
+
+    Returns:
+        number of accepted steps
+        new step size
+    """
+
+    accepted = 0
+    dt_new = None
+
+    for p in active_slots:
+
+        S = MS[p]
+        L = S.levels[0]
+
+        # compute the estimate and the proposed step size
+        L.sweep.compute_error_estimate()
+        order = len(L.sweep.extrap_weights)
+        if L.status.error_estimate > 0:
+            fac = (0.9*S.params.e_tol/L.status.error_estimate)**(1.0/order)
+        else:
+            fac = 2.0
+        dt = S.status.dt*min(2.0,max(0.25,fac))
+        if dt_new is None or dt < dt_new:
+            dt_new = dt
+
+        # stop at the first rejected step
+        if L.status.error_estimate > S.params.e_tol:
+            break
+        accepted += 1
+
+    return accepted,dt_new
+
+
+def distribute_times(MS,slots,time,step,dt,Tend):
+    """
+    Routine to set the time variables of a new block of steps with step size dt, ending exactly at Tend
+
+    Args:
+        MS: block of (all) steps
+        slots: list of all slots (in the correct order)
+        time: start time of the block
+        step: number of the first step of the block
+        dt: step size (the last step before Tend may be shorter)
+        Tend: end time
+
+    Returns:
+        list of active steps (time < Tend)
+    """
+
+    for p in slots:
+        MS[p].status.time = time
+        MS[p].status.dt = min(dt,Tend-time)
+        MS[p].status.step = step
+        time += MS[p].status.dt
+        step += 1
+
+    return [p for p in slots if MS[p].status.time < Tend - np.finfo(float).eps]
@@ -0,0 +1,507 @@
+from time import monotonic
+import itertools
+import traceback
+import multiprocessing as mproc
+import numpy as np
+
+from pySDC.Stats import stats
+from pySDC.Checkpoint import checkpointer
+from pySDC.Errors import CommunicationError
+from pySDC.communicator_classes.multiprocess import multiprocess
+
+from pySDC.PFASST_helper import *
+
+
+# rank of the master process in the communicator
+MASTER = 'master'
+
+# seconds the master waits for a message before checking the workers
+POLL_INTERVAL = 0.1
+
+
+def run_pfasst(MS,u0,t0,dt,Tend,step0=0,timeout=None):
+    """
+    Main driver for running SDC, MLSDC and PFASST with one process per step of the block (real parallelism)
+
+    Each step of the block is moved to its own worker process (via fork, so that the steps do not need to be
+    pickled). The workers run the stages of PFASST concurrently, only the coarse-level send/recv and the convergence
+    check serialize. All messages, between the steps as well as between the workers and the master process, are passed
+    by the multiprocess communicator. Sends are non-blocking, so fine-level communication overlaps with the
+    computations. The master process distributes the initial values of each block, gathers the convergence flags and
+    collects the statistics after each block. While waiting, the master checks whether all workers are still alive,
+    if one has died (or the timeout has passed), the others are terminated and a CommunicationError is raised.
+
+    With the step parameter checkpoint_file set, uend, time, step number, step size and statistics are written to this
+    file every checkpoint_every blocks by the master process, see pySDC.Checkpoint.
+
+    Args:
+        MS: block of steps (list)
+        u0: initial values on the finest level
+        t0: initial time
+        dt: step size (fixed, no adaptivity here)
+        Tend: end time
+        step0: number of the first step (e.g. when resuming from a checkpoint)
+        timeout: seconds to wait for a message before giving up (None: wait forever)
+
+    Returns:
+        end values on the finest level
+        stats object containing statistics for each step, each level and each iteration
+    Raises:
+        CommunicationError: if a worker fails or dies, or if a message did not arrive within the timeout
+    """
+
+    # the workers keep track of their time themselves, so only fixed step sizes are possible here
+    assert not MS[0].params.adaptivity
+
+    # some initializations
+    uend = u0
+    num_procs = len(MS)
+
+    # initial ordering of the steps: 0,1,...,Np-1
+    slots = [p for p in range(num_procs)]
+
+    # initialize time variables of each step (the workers do the same in their own copy of the step)
+    for p in slots:
+        MS[p].status.dt = dt
+        MS[p].status.time = t0 + sum(MS[j].status.dt for j in range(p))
+        MS[p].status.step = step0 + p
+        MS[p].status.slot = p
+
+    # determine which steps are active (time < Tend)
+    active = [MS[p].status.time < Tend - np.finfo(float).eps for p in slots]
+    active_slots = list(itertools.compress(slots, active))
+
+    # call pre-start hook
+    MS[0].init_step(u0)
+    MS[0].levels[0].hooks.dump_pre(MS[0].status)
+
+    # fork is needed here, since steps, levels and problems are not necessarily picklable
+    ctx = mproc.get_context('fork')
+
+    # one inbox per step and one for the master
+    comm = multiprocess(slots+[MASTER],ctx=ctx,timeout=timeout)
+
+    workers = []
+    for p in slots:
+        workers.append(ctx.Process(target=worker, args=(MS[p],comm,num_procs)))
+        workers[-1].start()
+
+    # background writer for checkpoints (if requested), started after the fork
+    chkpt = None
+    if MS[0].params.checkpoint_file is not None:
+        chkpt = checkpointer(MS[0].params.checkpoint_file,resume=step0 > 0)
+
+    running = list(slots)
+    block = 0
+
+    try:
+
+        # main loop: as long as at least one step is still active (time < Tend), do something
+        while any(active):
+
+            # steps which are not active anymore can stop right away
+            for p in [p for p in running if p not in active_slots]:
+                comm.isend(('STOP',),source=MASTER,dest=p,tag='CONTROL')
+                running.remove(p)
+
+            # start block: pass uend of the last block as new initial value to all active steps
+            for p in active_slots:
+                comm.isend(('RUN',uend,p == active_slots[-1]),source=MASTER,dest=p,tag='CONTROL')
+
+            # convergence check: gather flags from all active steps, tell everyone whether to continue
+            done = False
+            while not done:
+                flags = [master_recv(comm,workers,source=p,tag='CONV') for p in active_slots]
+                done = all(flags)
+                for p in active_slots:
+                    comm.isend(('CONV',done),source=MASTER,dest=p,tag='CONTROL')
+
+            # uend is uend of the last active step in the list
+            uend = master_recv(comm,workers,source=active_slots[-1],tag=('UEND',block))
+            S = MS[active_slots[-1]]
+            time = S.status.time + S.status.dt
+            step = S.status.step + 1
+
+            # gather the statistics of this block (each worker stores them in its own copy of the global stats object)
+            for p in active_slots:
+                for k,v in master_recv(comm,workers,source=p,tag=('STATS',block)):
+                    stats.add_to_stats(step=k[0],time=k[1],level=k[2],iter=k[3],type=k[4],value=v)
+
+            # determine new set of active steps and compress slots accordingly
+            active = [MS[p].status.time+num_procs*MS[p].status.dt < Tend - np.finfo(float).eps for p in slots]
+            active_slots = list(itertools.compress(slots, active))
+
+            # increment timings for now active steps
+            for p in active_slots:
+                MS[p].status.time += num_procs*MS[p].status.dt
+                MS[p].status.step += num_procs
+            block += 1
+
+            # write checkpoint (in the background) every checkpoint_every blocks
+            if chkpt is not None and block % MS[0].params.checkpoint_every == 0:
+                chkpt.write(uend,time,step,dt)
+
+        # stop the remaining steps
+        for p in running:
+            comm.isend(('STOP',),source=MASTER,dest=p,tag='CONTROL')
+
+        # all messages have been received, the workers may exit now
+        for p in slots:
+            comm.isend(('EXIT',),source=MASTER,dest=p,tag='CONTROL')
+        for w in workers:
+            w.join()
+
+    except:
+        for w in workers:
+            w.terminate()
+        raise
+
+    # wait until the last checkpoint has been written
+    if chkpt is not None:
+        chkpt.close()
+
+    return uend,stats.return_stats()
+
+
+def master_recv(comm,workers,source,tag):
+    """
+    Blocking receive of the master, checking the workers every POLL_INTERVAL seconds while waiting
+
+    Args:
+        comm: communicator
+        workers: list of worker processes
+        source: the sending step (slot)
+        tag: identifier of the message
+    Returns:
+        the data of the message
+    Raises:
+        CommunicationError: if a worker reports an error or has died, or if the message did not arrive within the
+            timeout of the communicator
+    """
+
+    req = comm.irecv(source=source,dest=MASTER,tag=tag)
+    start = monotonic()
+    while not comm.poll(req,POLL_INTERVAL):
+        dead = [p for p,w in enumerate(workers) if not w.is_alive()]
+        if dead:
+            # a worker which failed with an exception has sent its traceback before exiting, report this instead
+            comm.test(req)
+            raise CommunicationError('worker process of step %s has died (exit code %s)'
+                                     % (dead[0],workers[dead[0]].exitcode))
+        if comm.timeout is not None and monotonic()-start > comm.timeout:
+            raise CommunicationError('RECV ERROR: no message from %s to %s with tag %s within %s seconds'
+                                     % (source,MASTER,tag,comm.timeout))
+    return req.data
+
+
+def worker(S,comm,num_procs):
+    """
+    Main routine of each worker process, running the stages of one step for all blocks
+
+    Args:
+        S: the step of this worker (copy of the master's step)
+        comm: communicator (shared with the other steps and the master)
+        num_procs: number of steps in the block
+    """
+
+    slot = S.status.slot
+
+    # the master keeps the statistics gathered so far, only new ones are sent
+    stats.return_stats().clear()
+
+    try:
+
+        block = 0
+        order = comm.recv(source=MASTER,dest=slot,tag='CONTROL')
+
+        while order[0] == 'RUN':
+
+            # reset step and pass initial value
+            restart_step(S,order[1],last=order[2])
+
+            # messages from earlier blocks are not needed anymore
+            comm.discard(dest=slot)
+
+            # run through the stages until the step is done for this block
+            while not S.status.stage == 'DONE':
+                S = pfasst(S,comm,block)
+
+            # last step passes its uend to the master
+            if S.status.last:
+                comm.isend(S.levels[0].uend,source=slot,dest=MASTER,tag=('UEND',block))
+
+            # send the statistics of this block to the master and forget them (named tuples do not survive the
+            # pickling, so send plain tuples)
+            comm.isend([(tuple(k),v) for k,v in stats.return_stats().items()],source=slot,dest=MASTER,
+                       tag=('STATS',block))
+            stats.return_stats().clear()
+
+            # increment timings for the next block
+            S.status.time += num_procs*S.status.dt
+            S.status.step += num_procs
+            block += 1
+
+            order = comm.recv(source=MASTER,dest=slot,tag='CONTROL')
+
+    except:
+        comm.abort(traceback.format_exc(),source=slot,dest=MASTER)
+        return
+
+    # wait until everyone has received everything, then drop the remaining (outdated) messages
+    comm.recv(source=MASTER,dest=slot,tag='CONTROL')
+    comm.close()
+
+
+def restart_step(S,u0,last):
+    """
+    Helper routine to reset/restart a single step for the next block
+
+    Args:
+        S: the step
+        u0: initial value of the block
+        last: flag whether this is the last active step of the block
+    """
+
+    # resets step
+    S.reset_step()
+    # determine whether I am the first and/or last in line
+    S.status.first = S.status.slot == 0
+    S.status.last = last
+    # intialize step with u0
+    S.init_step(u0)
+    # reset some values
+    S.status.done = False
+    S.status.iter = 0
+    S.status.stage = 'SPREAD'
+    for l in S.levels:
+        l.tag = None
+
+
+def recv(S,l,tag,comm):
+    """
+    Receive function
+
+    Args:
+        S: current step
+        l: number of the level which will receive the values
+        tag: identifier of the message (block, level, iteration)
+        comm: communicator
+    """
+
+    # blocking receive of the values, uend of the previous step becomes the new u0 at the target
+    target = S.levels[l]
+    target.u[0] = target.acquire_copy(target.prob.dtype_u,comm.recv(source=S.status.slot-1,dest=S.status.slot,
+                                                                    tag=tag))
+    # re-evaluate f on left interval boundary
+    target.f[0] = target.prob.eval_f(target.u[0],target.time)
+    target.sweep.invalidate_integral()
+
+
+def send(S,l,tag,comm):
+    """
+    Send function
+
+    Args:
+        S: current step
+        l: number of the level which has the new values
+        tag: identifier of the message (block, level, iteration)
+        comm: communicator
+    """
+
+    # compute uend and send it to the next step (non-blocking, the data is transported in the background)
+    source = S.levels[l]
+    source.sweep.compute_end_point()
+    source.tag = tag
+    if not S.status.last:
+        comm.isend(source.uend,source=S.status.slot,dest=S.status.slot+1,tag=tag)
+
+
+def pfasst(S,comm,block):
+    """
+    Main function including the stages of SDC, MLSDC and PFASST (the "controller") for a single step
+
+    This is the stage machine of the blockwise controller, but run by each step on its own: receives are blocking,
+    sends are non-blocking and the convergence check is done together with the master process.
+
+    Args:
+        S: current step
+        comm: communicator
+        block: number of the current block (part of each message tag)
+
+    Returns:
+        current step
+    """
+
+    for case in switch(S.status.stage):
+
+        if case('SPREAD'):
+            # first stage: spread values
+            S.levels[0].hooks.pre_step(S.status)
+
+            # call predictor from sweeper
+            S.levels[0].sweep.predict()
+
+            # update stage
+            if len(S.levels) > 1:
+                S.status.stage = 'PREDICT'
+            else:
+                S.status.stage = 'IT_FINE'
+
+            return S
+
+
+        if case('PREDICT'):
+            # pipelined predictor: step number p in the block does p+1 coarse sweeps
+
+            # restrict to coarsest level
+            for l in range(1,len(S.levels)):
+                S.transfer(source=S.levels[l-1],target=S.levels[l])
+
+            for q in range(S.status.slot+1):
+
+                # receive values sent during previous sweep
+                if q > 0:
+                    recv(S,-1,tag=(block,len(S.levels),0),comm=comm)
+
+                # do the sweep with new values
+                S.levels[-1].sweep.update_nodes()
+
+                # send updated values on coarsest level
+                send(S,-1,tag=(block,len(S.levels),0),comm=comm)
+
+            # interpolate back to finest level
+            for l in range(len(S.levels)-1,0,-1):
+                S.transfer(source=S.levels[l],target=S.levels[l-1])
+
+            # update stage
+            S.status.stage = 'IT_FINE'
+
+            return S
+
+
+        if case('IT_FINE'):
+            # do fine sweep
+
+            # increment iteration count here (and only here)
+            S.status.iter += 1
+
+            # single level (MSSDC): receive from previous step (if not first)
+            if len(S.levels) == 1 and not S.status.first:
+                recv(S,0,tag=(block,0,S.status.iter),comm=comm)
+
+            # standard sweep workflow: update nodes, compute residual, log progress
+            S.levels[0].sweep.update_nodes()
+            S.levels[0].sweep.compute_residual()
+            S.levels[0].hooks.dump_sweep(S.status)
+
+            S.levels[0].hooks.dump_iteration(S.status)
+
+            # send updated values forward (non-blocking), always needed for MSSDC
+            if S.params.fine_comm or len(S.levels) == 1:
+                send(S,0,tag=(block,0,S.status.iter),comm=comm)
+
+            # update stage
+            S.status.stage = 'IT_CHECK'
+
+            return S
+
+
+        if case('IT_CHECK'):
+            # check whether to stop iterating (serial, all steps decide together via the master)
+
+            comm.isend(check_convergence(S),source=S.status.slot,dest=MASTER,tag='CONV')
+            order = comm.recv(source=MASTER,dest=S.status.slot,tag='CONTROL')
+            assert order[0] == 'CONV'
+            S.status.done = order[1]
+
+            # if not everyone is ready yet, keep doing stuff
+            if not S.status.done:
+                # multi-level or single-level?
+                if len(S.levels) > 1:
+                    S.status.stage = 'IT_UP'
+                else:
+                    S.status.stage = 'IT_FINE'
+
+            else:
+                # if everyone is ready, end
+                S.levels[0].sweep.compute_end_point()
+                S.levels[0].hooks.dump_step(S.status)
+                S.status.stage = 'DONE'
+
+            return S
+
+
+        if case('IT_UP'):
+            # go up the hierarchy from finest to coarsest level
+
+            S.transfer(source=S.levels[0],target=S.levels[1])
+
+            # sweep and send on middle levels (not on finest, not on coarsest, though)
+            for l in range(1,len(S.levels)-1):
+                S.levels[l].sweep.update_nodes()
+                S.levels[l].sweep.compute_residual()
+                S.levels[l].hooks.dump_sweep(S.status)
+
+                if S.params.fine_comm:
+                    send(S,l,tag=(block,l,S.status.iter),comm=comm)
+
+                # transfer further up the hierarchy
+                S.transfer(source=S.levels[l],target=S.levels[l+1])
+
+            # update stage
+            S.status.stage = 'IT_COARSE'
+
+            return S
+
+
+        if case('IT_COARSE'):
+            # sweeps on coarsest level (serial/blocking)
+
+            # receive from previous step (if not first)
+            if not S.status.first:
+                recv(S,-1,tag=(block,len(S.levels),S.status.iter),comm=comm)
+
+            # do the sweep
+            S.levels[-1].sweep.update_nodes()
+            S.levels[-1].sweep.compute_residual()
+            S.levels[-1].hooks.dump_sweep(S.status)
+
+            # send to next step
+            send(S,-1,tag=(block,len(S.levels),S.status.iter),comm=comm)
+
+            # update stage
+            S.status.stage = 'IT_DOWN'
+
+            return S
+
+
+        if case('IT_DOWN'):
+            # prolong corrections down to finest level
+
+            # receive and sweep on middle levels (except for coarsest level)
+            for l in range(len(S.levels)-1,0,-1):
+
+                # receive values from IT_UP/IT_FINE of the previous step
+                if S.params.fine_comm and not S.status.first:
+                    recv(S,l-1,tag=(block,l-1,S.status.iter),comm=comm)
+
+                # prolong values
+                S.transfer(source=S.levels[l],target=S.levels[l-1])
+
+                # on middle levels: do sweep as usual
+                if l-1 > 0:
+                    S.levels[l-1].sweep.update_nodes()
+                    S.levels[l-1].sweep.compute_residual()
+                    S.levels[l-1].hooks.dump_sweep(S.status)
+
+            # update stage
+            S.status.stage = 'IT_FINE'
+
+            return S
+
+        #fixme: use meaningful error object here
+        print('Something is wrong here, you should have hit one case statement!')
+        exit()
+    #fixme: use meaningful error object here
+    print('Something is wrong here, you should have hit one case statement!')
+    exit()
@@ -1,55 +1,84 @@
 import itertools
-import copy as cp
 import numpy as np
 
 from pySDC.Stats import stats
+from pySDC.Checkpoint import checkpointer
+from pySDC.communicator_classes.in_process import in_process
 
 from pySDC.PFASST_helper import *
 
 
-def run_pfasst(MS,u0,t0,dt,Tend):
+def run_pfasst(MS,u0,t0,dt,Tend,comm=None,step0=0):
     """
     Main driver for running the serial version of SDC, MLSDC and PFASST (virtual parallelism)
 
+    With the step parameter ring set, steps which are done do not wait for the rest of the block, but immediately
+    continue with the next untouched time interval (ring parallelization).
+
+    With the step parameter adaptivity set, each block is checked against the tolerance e_tol using an embedded error
+    estimate. The next block starts right after the last accepted step with a new step size, the last step ends
+    exactly at Tend (not available with ring parallelization).
+
+    With the step parameter checkpoint_file set, uend, time, step number, step size and statistics are written to this
+    file every checkpoint_every blocks (not available with ring parallelization), see pySDC.Checkpoint.
+
     Args:
         MS: block of steps (list)
         u0: initial values on the finest level
         t0: initial time
-        dt: step size (could be changed here e.g. for adaptivity)
+        dt: step size (initial step size with adaptivity)
         Tend: end time
+        comm: communicator passing the values between the steps (default: in-process communicator)
+        step0: number of the first step (e.g. when resuming from a checkpoint)
 
     Returns:
         end values on the finest level
         stats object containing statistics for each step, each level and each iteration
     """
 
-    # fixme: add ring parallelization as before
-    # fixme: use error classes for send/recv and stage errors
-    # fixme: last need to be able to send even if values have not been fetched yet (ring!)
+    # fixme: use error classes for stage errors
+
+    # adaptivity and checkpointing need the whole block to be done at once
+    assert not (MS[0].params.ring and MS[0].params.adaptivity)
+    assert not (MS[0].params.ring and MS[0].params.checkpoint_file is not None)
 
     # some initializations
     uend = None
     num_procs = len(MS)
 
+    # background writer for checkpoints (if requested)
+    chkpt = None
+    nblocks = 0
+    if MS[0].params.checkpoint_file is not None:
+        chkpt = checkpointer(MS[0].params.checkpoint_file,resume=step0 > 0)
+
+    if comm is None:
+        comm = in_process()
+
     # initial ordering of the steps: 0,1,...,Np-1
     slots = [p for p in range(num_procs)]
 
     # initialize time variables of each step
-    for p in slots:
-        MS[p].status.dt = dt # could have different dt per step here
-        MS[p].status.time = t0 + sum(MS[j].status.dt for j in range(p))
-        MS[p].status.step = p
-
-    # determine which steps are still active (time < Tend)
-    active = [MS[p].status.time < Tend - np.finfo(float).eps for p in slots]
-    # compress slots according to active steps, i.e. remove all steps which have times above Tend
-    active_slots = list(itertools.compress(slots, active))
+    if MS[0].params.adaptivity:
+        # adaptive step sizes: the block ends exactly at Tend
+        active_slots = distribute_times(MS,slots,t0,step0,dt,Tend)
+        active = [p in active_slots for p in slots]
+    else:
+        for p in slots:
+            MS[p].status.dt = dt # could have different dt per step here
+            MS[p].status.time = t0 + sum(MS[j].status.dt for j in range(p))
+            MS[p].status.step = step0 + p
+
+        # determine which steps are still active (time < Tend)
+        active = [MS[p].status.time < Tend - np.finfo(float).eps for p in slots]
+        # compress slots according to active steps, i.e. remove all steps which have times above Tend
+        active_slots = list(itertools.compress(slots, active))
 
     # initialize block of steps with u0
-    MS = restart_block(MS,active_slots,u0)
+    MS = restart_block(MS,active_slots,u0,comm)
 
     # call pre-start hook
-    MS[active_slots[0]].levels[0].hooks.dump_pre(MS[p].status)
+    MS[active_slots[0]].levels[0].hooks.dump_pre(MS[active_slots[0]].status)
 
     # main loop: as long as at least one step is still active (time < Tend), do something
     while any(active):
@@ -57,44 +86,147 @@ def run_pfasst(MS,u0,t0,dt,Tend):
         # loop over all active steps (in the correct order)
         for p in active_slots:
             # print(p,MS[p].status.stage)
-            MS[p] = pfasst(MS[p])
+            MS[p] = pfasst(MS[p],comm)
 
-        # if all active steps are done (for block-parallelization, need flag to distinguish (FIXME))
-        if all([MS[p].status.done for p in active_slots]):
+        # ring parallelization: steps which are done at the front of the line immediately start the next time slice
+        if MS[0].params.ring:
 
-            # uend is uend of the last active step in the list
-            uend = MS[active_slots[-1]].levels[0].uend # FIXME: only true for non-ring-parallelization?
+            while len(active_slots) > 0 and MS[active_slots[0]].status.done:
 
-            # determine new set of active steps and compress slots accordingly
-            active = [MS[p].status.time+num_procs*MS[p].status.dt < Tend - np.finfo(float).eps for p in slots]
-            active_slots = list(itertools.compress(slots, active))
+                # uend is uend of the step which finished last
+                p = active_slots.pop(0)
+                uend = MS[p].levels[0].uend
 
-            # increment timings for now active steps
-            for p in active_slots:
-                MS[p].status.time += num_procs*MS[p].status.dt
-                MS[p].status.step += num_procs
-            # restart active steps (reset all values and pass uend to u0)
-            MS = restart_block(MS,active_slots,uend)
+                # the next one in line is the first now
+                if len(active_slots) > 0:
+                    MS[active_slots[0]].status.first = True
+
+                # determine the next untouched time interval (right after the last step in line)
+                if len(active_slots) > 0:
+                    L = MS[active_slots[-1]]
+                else:
+                    L = MS[p]
+                time = L.status.time + L.status.dt
+
+                # if there is still something to do, restart step at the end of the line
+                if time < Tend - np.finfo(float).eps:
+                    MS[p].status.time = time
+                    MS[p].status.step = L.status.step + 1
+                    MS = append_step(MS,active_slots,p,comm)
+
+            active = [p in active_slots for p in slots]
 
-        # fixme: for ring parallelization
-        # update first and last
-        # update slots
-        # update pred_cnt
+        # if all active steps are done
+        elif all([MS[p].status.done for p in active_slots]):
 
-        # This is only for ring-parallelization
-        # indx = np.argsort([MS[p].time for p in slots])
-        # slots = slots[indx]
+            if MS[0].params.adaptivity:
 
-        # active = [MS[p].time < Tend for p in slots]
+                # accept steps up to the first one with too large error, continue right after the last accepted one
+                accepted,dt = adapt_step_sizes(MS,active_slots)
+                if accepted > 0:
+                    S = MS[active_slots[accepted-1]]
+                    uend = S.levels[0].uend
+                    time = S.status.time + S.status.dt
+                    step = S.status.step + 1
+                else:
+                    S = MS[active_slots[0]]
+                    uend = S.levels[0].u[0]
+                    time = S.status.time
+                    step = S.status.step
+
+                # determine new set of active steps with the new step size
+                active_slots = distribute_times(MS,slots,time,step,dt,Tend)
+                active = [p in active_slots for p in slots]
+
+            else:
+
+                # uend is uend of the last active step in the list
+                S = MS[active_slots[-1]]
+                uend = S.levels[0].uend
+                time = S.status.time + S.status.dt
+                step = S.status.step + 1
+                dt = S.status.dt
+
+                # determine new set of active steps and compress slots accordingly
+                active = [MS[p].status.time+num_procs*MS[p].status.dt < Tend - np.finfo(float).eps for p in slots]
+                active_slots = list(itertools.compress(slots, active))
 
-        # if all(not active[p] for p in slots):
-        #     for p in slots:
-        #         MS[p].time =
+                # increment timings for now active steps
+                for p in active_slots:
+                    MS[p].status.time += num_procs*MS[p].status.dt
+                    MS[p].status.step += num_procs
+
+            # write checkpoint (in the background) every checkpoint_every blocks
+            if chkpt is not None:
+                nblocks += 1
+                if nblocks % MS[0].params.checkpoint_every == 0:
+                    chkpt.write(uend,time,step,dt)
+
+            # restart active steps (reset all values and pass uend to u0)
+            MS = restart_block(MS,active_slots,uend,comm)
+
+    # wait until the last checkpoint has been written
+    if chkpt is not None:
+        chkpt.close()
 
     return uend,stats.return_stats()
 
 
-def restart_block(MS,active_slots,u0):
+def append_step(MS,active_slots,p,comm):
+    """
+    Helper routine for ring parallelization: restart a step and put it at the end of the line of active steps
+
+    The initial value is taken from the current last step in line (its uend, if there is any).
+
+    Args:
+        MS: block of (all) steps
+        active_slots: list of active steps, in the correct order (will be modified)
+        p: slot of the step to restart (time and step number need to be set already)
+        comm: communicator (messages to p not received so far are dropped)
+
+    Returns:
+        block of (all) steps
+    """
+
+    # get initial value from the current last step in line or from p itself, if it is alone
+    if len(active_slots) > 0:
+        L = MS[active_slots[-1]].levels[0]
+    else:
+        L = MS[p].levels[0]
+    if L.uend is not None:
+        u0 = L.uend
+    else:
+        u0 = L.u[0]
+
+    # relink: the current last step gets a successor (the last step did not send anything so far)
+    if len(active_slots) > 0:
+        MS[active_slots[-1]].status.last = False
+        MS[active_slots[-1]].next = MS[p]
+        MS[p].prev = MS[active_slots[-1]]
+
+    # resets step (the init_step has to come after the reset, since u0 may belong to p)
+    u0 = MS[p].levels[0].prob.dtype_u(u0)
+    MS[p].reset_step()
+    MS[p].init_step(u0)
+    # determine whether I am the first and/or last in line
+    MS[p].status.first = len(active_slots) == 0
+    MS[p].status.last = True
+    # reset some values, a single coarse sweep is enough for the predictor here
+    MS[p].status.done = False
+    MS[p].status.pred_cnt = 1
+    MS[p].status.iter = 0
+    MS[p].status.stage = 'SPREAD'
+    for l in MS[p].levels:
+        l.tag = None
+    # drop outdated messages from the former predecessor
+    comm.discard(dest=p)
+
+    active_slots.append(p)
+
+    return MS
+
+
+def restart_block(MS,active_slots,u0,comm):
     """
     Helper routine to reset/restart block of (active) steps
 
@@ -102,6 +234,7 @@ def restart_block(MS,active_slots,u0):
         MS: block of (all) steps
         active_slots: list of active steps
         u0: initial value to distribute across the steps
+        comm: communicator (messages not received in the last block are dropped)
 
     Returns:
         block of (all) steps
@@ -115,8 +248,9 @@ def restart_block(MS,active_slots,u0):
 
             # store current slot number for diagnostics
             MS[p].status.slot = p
-            # store link to previous step
+            # store link to previous and next step
             MS[p].prev = MS[active_slots[j-1]]
+            MS[p].next = MS[active_slots[(j+1)%len(active_slots)]]
             # resets step
             MS[p].reset_step()
             # determine whether I am the first and/or last in line
@@ -130,37 +264,63 @@ def restart_block(MS,active_slots,u0):
             MS[p].status.iter = 0
             MS[p].status.stage = 'SPREAD'
             for l in MS[p].levels:
-                l.tag = False
+                l.tag = None
+            # drop outdated messages (e.g. values sent after the previous step was done)
+            comm.discard(dest=p)
 
     return MS
 
 
-def recv(target,source):
+def recv(S,l,comm,blocking=False):
     """
     Receive function
 
+    Messages on the same level are received in the order they have been sent, so no values get lost if the previous
+    step is ahead.
+
     Args:
-        target: level which will receive the values
-        source: level which initiated the send
+        S: step which will receive the values
+        l: index of the level which will receive the values (also the tag of the message)
+        comm: communicator
+        blocking: flag whether to wait for the message (otherwise, try only)
+    Returns:
+        True if new values have been received
     """
-    # simply do a deepcopy of the values uend to become the new u0 at the target
-    target.u[0] = target.prob.dtype_u(source.uend)
 
+    req = comm.irecv(source=S.prev.status.slot,dest=S.status.slot,tag=l)
+    if blocking:
+        comm.wait(req)
+    elif not req.test():
+        return False
+
+    target = S.levels[l]
+    # receive uend of the previous step, a copy becomes the new u0 at the target
+    target.u[0] = target.acquire_copy(target.prob.dtype_u,req.data)
+    # new initial value, cached integral is outdated
+    target.sweep.invalidate_integral()
+    return True
 
-def send(source,tag):
+
+def send(S,l,comm):
     """
     Send function
 
     Args:
-        source: level which has the new values
-        tag: signal new values
+        S: step which has the new values
+        l: index of the level which has the new values (also the tag of the message)
+        comm: communicator
     """
-    # sending here means computing uend ("one-sided communication")
+
+    source = S.levels[l]
+    # compute uend and pass it to the next step (non-blocking)
     source.sweep.compute_end_point()
-    source.tag = cp.deepcopy(tag)
+    source.tag = l
+    # the last step has nobody to send to
+    if not S.status.last:
+        comm.isend(source.uend,source=S.status.slot,dest=S.next.status.slot,tag=l)
 
 
-def pfasst(S):
+def pfasst(S,comm):
     """
     Main function including the stages of SDC, MLSDC and PFASST (the "controller")
 
@@ -168,6 +328,7 @@ def pfasst(S):
 
     Args:
         S: current step
+        comm: communicator
 
     Returns:
         current step
@@ -210,12 +371,9 @@ def pfasst(S):
         if case('PREDICT_SWEEP'):
             # do a (serial) sweep on coarsest level
 
-            # receive new values from previous step (if not first step)
+            # receive new values from previous step (if not first step and if there are any)
             if not S.status.first:
-                if S.prev.levels[-1].tag:
-                    recv(S.levels[-1],S.prev.levels[-1])
-                    # reset tag to signal successful receive
-                    S.prev.levels[-1].tag = False
+                recv(S,len(S.levels)-1,comm)
 
             # do the sweep with (possibly) new values
             S.levels[-1].sweep.update_nodes()
@@ -228,13 +386,9 @@ def pfasst(S):
         if case('PREDICT_SEND'):
             # send updated values on coarsest level
 
-            # send new values forward, if previous send was successful (otherwise: try again)
+            # send new values forward
             if not S.status.last:
-                if not S.levels[-1].tag:
-                    send(S.levels[-1],tag=True)
-                else:
-                    S.status.stage = 'PREDICT_SEND'
-                    return S
+                send(S,len(S.levels)-1,comm)
 
             # decrement counter to determine how many coarse sweeps are necessary
             S.status.pred_cnt -= 1
@@ -280,13 +434,10 @@ def pfasst(S):
         if case('IT_FINE_SEND'):
             # send forward values on finest level
 
-            # if last send succeeded on this level or if last rank, send new values (otherwise: try again)
-            if not S.levels[0].tag or S.status.last:
-                if S.params.fine_comm:
-                    send(S.levels[0],tag=True)
-                S.status.stage = 'IT_CHECK'
-            else:
-                S.status.stage = 'IT_FINE_SEND'
+            # send new values forward (if requested)
+            if S.params.fine_comm:
+                send(S,0,comm)
+            S.status.stage = 'IT_CHECK'
             # return
             return S
 
@@ -325,13 +476,9 @@ def pfasst(S):
                 S.levels[l].sweep.compute_residual()
                 S.levels[l].hooks.dump_sweep(S.status)
 
-                # send if last send succeeded on this level (otherwise: abort with error (FIXME))
-                if not S.levels[l].tag or S.status.last:
-                    if S.params.fine_comm:
-                        send(S.levels[l],tag=True)
-                else:
-                    print('SEND ERROR',l,p,S.levels[l].tag)
-                    exit()
+                # send new values forward (if requested)
+                if S.params.fine_comm:
+                    send(S,l,comm)
 
                 # transfer further up the hierarchy
                 S.transfer(source=S.levels[l],target=S.levels[l+1])
@@ -349,9 +496,7 @@ def pfasst(S):
             # otherwise: proceed, no receiving possible/necessary
             if not S.status.first and not S.prev.status.done:
                 # try to receive and the progress (otherwise: try again)
-                if S.prev.levels[-1].tag:
-                    recv(S.levels[-1],S.prev.levels[-1])
-                    S.prev.levels[-1].tag = False
+                if recv(S,len(S.levels)-1,comm):
                     if len(S.levels) > 1:
                         S.status.stage = 'IT_COARSE_SWEEP'
                     else:
@@ -384,12 +529,9 @@ def pfasst(S):
         if case('IT_COARSE_SEND'):
             # send forward coarsest values
 
-            # try to send new values (if old ones have not been picked up yet, retry)
-            if not S.levels[-1].tag or S.status.last:
-                send(S.levels[-1],tag=True)
-                S.status.stage = 'IT_DOWN'
-            else:
-                S.status.stage = 'IT_COARSE_SEND'
+            # send new values forward
+            send(S,len(S.levels)-1,comm)
+            S.status.stage = 'IT_DOWN'
             # return
             return S
 
@@ -400,14 +542,9 @@ def pfasst(S):
             # receive and sweep on middle levels (except for coarsest level)
             for l in range(len(S.levels)-1,0,-1):
 
-                # if applicable, try to receive values from IT_UP, otherwise abort (fixme)
+                # if applicable, receive values from IT_UP (these have been sent already, otherwise this is an error)
                 if S.params.fine_comm and not S.status.first and not S.prev.status.done:
-                    if S.prev.levels[l-1].tag:
-                        recv(S.levels[l-1],S.prev.levels[l-1])
-                        S.prev.levels[l-1].tag = False
-                    else:
-                        print('RECV ERROR DOWN')
-                        exit()
+                    recv(S,l-1,comm,blocking=True)
 
                 # prolong values
                 S.transfer(source=S.levels[l],target=S.levels[l-1])
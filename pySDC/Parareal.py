@@ -0,0 +1,275 @@
+import itertools
+import numpy as np
+
+from pySDC.Stats import stats
+
+
+def run_parareal(MS,u0,t0,dt,Tend):
+    """
+    Main driver for running Parareal on the level hierarchy of the steps (virtual parallelism)
+
+    The coarsest level of each step serves as coarse propagator G (a few SDC sweeps, run serially across the block),
+    the finest level as fine propagator F (SDC sweeps until convergence, run in parallel across the block). The
+    Parareal correction U_{n+1} = G(U_n^new) + F(U_n^old) - G(U_n^old) is built with the spatial transfer operators of
+    the hierarchy, i.e. the difference of the coarse propagators is prolongated and added to the fine values.
+
+    Args:
+        MS: block of steps (list)
+        u0: initial values on the finest level
+        t0: initial time
+        dt: step size (fixed, no adaptivity here)
+        Tend: end time
+
+    Returns:
+        end values on the finest level
+        stats object containing statistics for each step, each level and each iteration
+    """
+
+    # Parareal needs at least a coarse and a fine level (and works with fixed step sizes only)
+    assert len(MS[0].levels) > 1
+    assert not MS[0].params.adaptivity
+
+    # some initializations
+    uend = None
+    num_procs = len(MS)
+
+    # initial ordering of the steps: 0,1,...,Np-1
+    slots = [p for p in range(num_procs)]
+
+    # initialize time variables of each step
+    for p in slots:
+        MS[p].status.dt = dt # could have different dt per step here
+        MS[p].status.time = t0 + sum(MS[j].status.dt for j in range(p))
+        MS[p].status.step = p
+
+    # determine which steps are still active (time < Tend)
+    active = [MS[p].status.time < Tend - np.finfo(float).eps for p in slots]
+    # compress slots according to active steps, i.e. remove all steps which have times above Tend
+    active_slots = list(itertools.compress(slots, active))
+
+    # initialize block of steps with u0
+    MS = restart_block(MS,active_slots,u0)
+
+    # call pre-start hook
+    MS[active_slots[0]].levels[0].hooks.dump_pre(MS[active_slots[0]].status)
+
+    # main loop: as long as at least one step is still active (time < Tend), do something
+    while any(active):
+
+        MS_active = []
+        for p in active_slots:
+            MS_active.append(MS[p])
+
+        MS_active = parareal(MS_active)
+
+        for p in range(len(MS_active)):
+            MS[active_slots[p]] = MS_active[p]
+
+        # uend is uend of the last active step in the list
+        uend = MS[active_slots[-1]].levels[0].uend
+
+        # determine new set of active steps and compress slots accordingly
+        active = [MS[p].status.time+num_procs*MS[p].status.dt < Tend - np.finfo(float).eps for p in slots]
+        active_slots = list(itertools.compress(slots, active))
+
+        # increment timings for now active steps
+        for p in active_slots:
+            MS[p].status.time += num_procs*MS[p].status.dt
+            MS[p].status.step += num_procs
+        # restart active steps (reset all values and pass uend to u0)
+        MS = restart_block(MS,active_slots,uend)
+
+    return uend,stats.return_stats()
+
+
+def restart_block(MS,active_slots,u0):
+    """
+    Helper routine to reset/restart block of (active) steps
+
+    Args:
+        MS: block of (all) steps
+        active_slots: list of active steps
+        u0: initial value to distribute across the steps
+
+    Returns:
+        block of (all) steps
+    """
+
+    for j in range(len(active_slots)):
+
+            # get slot number
+            p = active_slots[j]
+
+            # store current slot number for diagnostics
+            MS[p].status.slot = p
+            # store link to previous step
+            MS[p].prev = MS[active_slots[j-1]]
+            # resets step
+            MS[p].reset_step()
+            # determine whether I am the first and/or last in line
+            MS[p].status.first = j == 0
+            MS[p].status.last = j == len(active_slots)-1
+            # intialize step with u0 (only the first one keeps it, the others get theirs from the coarse propagator)
+            MS[p].init_step(u0)
+            # reset some values
+            MS[p].status.done = False
+            MS[p].status.iter = 0
+            MS[p].status.stage = 'SPREAD'
+
+    return MS
+
+
+def coarse_propagator(S):
+    """
+    Coarse propagator G: restrict u0 to the coarsest level and do a few SDC sweeps there
+
+    Args:
+        S: current step
+
+    Returns:
+        end value on the coarsest level
+    """
+
+    # restrict initial value from finest to coarsest level
+    u0 = S.levels[0].u[0]
+    for l in range(1,len(S.levels)):
+        u0 = S.transfer_space(u0,source=S.levels[l-1],target=S.levels[l])
+
+    G = S.levels[-1]
+    G.u[0] = G.acquire_copy(G.prob.dtype_u,u0)
+
+    # no FAS correction here, G is plain SDC on the coarse level
+    for m in range(len(G.tau)):
+        G.tau[m] = G.prob.dtype_u(G.prob.init,val=0)
+
+    # spread initial value and sweep
+    G.sweep.predict()
+    for k in range(S.params.coarse_sweeps):
+        G.sweep.update_nodes()
+    G.sweep.compute_residual()
+    G.hooks.dump_sweep(S.status)
+    G.sweep.compute_end_point()
+
+    return G.uend
+
+
+def fine_propagator(S):
+    """
+    Fine propagator F: SDC sweeps on the finest level until convergence (or maxiter)
+
+    The first call spreads the initial value, later calls start from the last fine iterate with the new u0.
+
+    Args:
+        S: current step
+
+    Returns:
+        end value on the finest level
+    """
+
+    F = S.levels[0]
+
+    if not F.status.unlocked:
+        F.sweep.predict()
+    else:
+        F.f[0] = F.prob.eval_f(F.u[0],F.time)
+        F.sweep.invalidate_integral()
+
+    # standard sweep workflow: update nodes, compute residual, log progress
+    for k in range(S.params.maxiter):
+        F.sweep.update_nodes()
+        F.sweep.compute_residual()
+        F.hooks.dump_sweep(S.status)
+        if F.status.residual <= F.params.restol:
+            break
+    F.sweep.compute_end_point()
+
+    return F.uend
+
+
+def prolong_correction(S,u):
+    """
+    Helper routine to prolongate coarse data of a step to the finest level
+
+    Args:
+        S: current step
+        u: data on the coarsest level
+
+    Returns:
+        data on the finest level
+    """
+
+    for l in range(len(S.levels)-1,0,-1):
+        u = S.transfer_space(u,source=S.levels[l],target=S.levels[l-1])
+
+    return u
+
+
+def parareal(MS):
+    """
+    Main function including the Parareal iteration for a block of steps
+
+    After each parallel run of the fine propagator, the first step which is not done yet had an exact initial value
+    and is done now. Other steps are done as soon as their predecessor is done and their initial value did not change
+    by more than parareal_tol (by default the residual tolerance restol of the finest level). At most maxiter
+    iterations are done.
+
+    Args:
+        MS: all active steps
+
+    Returns:
+        all active steps
+    """
+
+    # initial guess: serial run of the coarse propagator, prolongated to the fine levels
+    for p in range(len(MS)):
+        MS[p].levels[0].hooks.pre_step(MS[p].status)
+        MS[p].status.stage = 'COARSE'
+        if p > 0:
+            MS[p].init_step(prolong_correction(MS[p-1],MS[p-1].levels[-1].uend))
+        coarse_propagator(MS[p])
+
+    while not all([S.status.done for S in MS]):
+
+        # parallel part: fine propagator on all steps which are not done yet
+        for S in MS:
+            if not S.status.done:
+                S.status.iter += 1
+                S.status.stage = 'FINE'
+                fine_propagator(S)
+                S.levels[0].hooks.dump_iteration(S.status)
+
+        # serial part: Parareal correction, step by step (changed: initial value of the step has been updated)
+        changed = [False]*len(MS)
+        for p in range(len(MS)):
+
+            S = MS[p]
+            if S.status.done:
+                continue
+
+            if S.status.first:
+                # the first step had the exact initial value all along
+                converged = True
+            else:
+                # G(U_old) of the previous step, G(U_new) only needs to be computed if U has changed
+                uG_old = S.prev.levels[-1].uend
+                if changed[p-1]:
+                    S.prev.status.stage = 'COARSE'
+                    uG_new = coarse_propagator(S.prev)
+                    u0 = S.prev.levels[0].uend + prolong_correction(S.prev,uG_new - uG_old)
+                else:
+                    u0 = S.prev.levels[0].uend
+                # converged, if the previous step is done and the initial value did not change (much)
+                tol = S.params.parareal_tol
+                if tol is None:
+                    tol = S.levels[0].params.restol
+                converged = S.prev.status.done and abs(u0 - S.levels[0].u[0]) <= tol
+                if not converged:
+                    S.init_step(u0)
+                    changed[p] = True
+
+            S.status.done = converged or S.status.iter >= S.params.maxiter
+            if S.status.done:
+                S.status.stage = 'DONE'
+                S.levels[0].hooks.dump_step(S.status)
+
+    return MS
@@ -0,0 +1,165 @@
+from __future__ import division
+import numpy as np
+import scipy.linalg as LA
+import scipy.optimize as opt
+
+
+def implicit_euler(coll):
+    """
+    Implicit Euler from node to node
+
+    Args:
+        coll: collocation object
+    Returns:
+        Qd of shape (M+1,M+1)
+    """
+    Qd = np.zeros(np.shape(coll.Qmat))
+    for m in range(coll.num_nodes + 1):
+        Qd[m, 1:m+1] = coll.delta_m[0:m]
+    return Qd
+
+
+def explicit_euler(coll):
+    """
+    Explicit Euler from node to node, will also act on u0
+
+    Args:
+        coll: collocation object
+    Returns:
+        Qd of shape (M+1,M+1)
+    """
+    Qd = np.zeros(np.shape(coll.Qmat))
+    for m in range(coll.num_nodes + 1):
+        Qd[m, 0:m] = coll.delta_m[0:m]
+    return Qd
+
+
+def crank_nicolson(coll):
+    """
+    Trapezoidal rule from node to node (Crank-Nicolson), mean of implicit and explicit Euler
+
+    Args:
+        coll: collocation object
+    Returns:
+        Qd of shape (M+1,M+1)
+    """
+    return 1/2*(implicit_euler(coll) + explicit_euler(coll))
+
+
+def lu_trick(coll):
+    """
+    LU trick (St. Martin's trick): U^T of the LU decomposition Q^T = L*U
+
+    Args:
+        coll: collocation object
+    Returns:
+        Qd of shape (M+1,M+1)
+    """
+    # strip Qmat by initial value u0
+    QT = coll.Qmat[1:,1:].T
+    # do LU decomposition of QT
+    [P,L,U] = LA.lu(QT,overwrite_a=True)
+    # enrich QT by initial value u0
+    Qd = np.zeros(np.shape(coll.Qmat))
+    Qd[1:,1:] = U.T
+    return Qd
+
+
+def diagonal_nodes(coll):
+    """
+    Diagonal implicit Euler from tleft to each node (all nodes can be solved for in parallel)
+
+    Args:
+        coll: collocation object
+    Returns:
+        Qd of shape (M+1,M+1)
+    """
+    Qd = np.zeros(np.shape(coll.Qmat))
+    Qd[1:,1:] = np.diag(coll.nodes - coll.tleft)
+    return Qd
+
+
+def diagonal_Q(coll):
+    """
+    Diagonal of Q (all nodes can be solved for in parallel)
+
+    Args:
+        coll: collocation object
+    Returns:
+        Qd of shape (M+1,M+1)
+    """
+    Qd = np.zeros(np.shape(coll.Qmat))
+    Qd[1:,1:] = np.diag(np.diag(coll.Qmat[1:,1:]))
+    return Qd
+
+
+def diagonal_min(coll):
+    """
+    Optimized diagonal ("MIN"): minimizes the spectral radius of the iteration matrix I - Qd^-1 Q in the stiff limit
+
+    Args:
+        coll: collocation object
+    Returns:
+        Qd of shape (M+1,M+1)
+    """
+    Q = coll.Qmat[1:,1:]
+
+    def rho(x):
+        return max(abs(np.linalg.eigvals(np.eye(coll.num_nodes) - np.dot(np.diag(x),Q))))
+
+    x0 = 10*np.ones(coll.num_nodes)
+    res = opt.minimize(rho,x0,method='Nelder-Mead')
+
+    Qd = np.zeros(np.shape(coll.Qmat))
+    Qd[1:,1:] = np.diag(1/res.x)
+    return Qd
+
+
+# registry of all preconditioners, selectable by name (e.g. via the level parameters QI and QE)
+QDELTA = {'IE': implicit_euler,
+          'EE': explicit_euler,
+          'CN': crank_nicolson,
+          'LU': lu_trick,
+          'IEpar': diagonal_nodes,
+          'Qpar': diagonal_Q,
+          'MIN': diagonal_min}
+
+# matrices computed so far, keyed by name and collocation (type, number of nodes, interval)
+cache = {}
+
+
+def get_Qd(qd_type,coll):
+    """
+    Returns the matrix Qd of the given type for the given collocation
+
+    The matrices are computed only once per collocation and then taken from the cache, so they are read-only.
+
+    Args:
+        qd_type: name of the preconditioner (see QDELTA)
+        coll: collocation object
+    Returns:
+        Qd of shape (M+1,M+1), read-only
+    """
+
+    assert qd_type in QDELTA, 'unknown preconditioner %s, choose one of %s' % (qd_type,sorted(QDELTA.keys()))
+
+    key = (qd_type,type(coll),coll.num_nodes,coll.tleft,coll.tright)
+    if key not in cache:
+        Qd = QDELTA[qd_type](coll)
+        Qd.flags.writeable = False
+        cache[key] = Qd
+
+    return cache[key]
+
+
+
+def is_diagonal(Qd):
+    """
+    Helper routine to check whether a preconditioner decouples the nodes (i.e. all nodes can be solved for in parallel)
+
+    Args:
+        Qd: matrix of shape (M+1,M+1)
+    Returns:
+        True if Qd is diagonal (the column acting on u0 has to be zero as well)
+    """
+    return np.count_nonzero(Qd - np.diag(np.diag(Qd))) == 0
@@ -1,3 +1,9 @@
+import threading
+from collections import OrderedDict
+
+import scipy.sparse as sp
+import scipy.sparse.linalg as LA
+
 
 class ptype(object):
     """
@@ -22,3 +28,77 @@ class ptype(object):
         self.init = init
         self.dtype_u = dtype_u
         self.dtype_f = dtype_f
+
+
+class ptype_linear(ptype):
+    """
+    Prototype class for problems with linear implicit systems (I-factor*A)u = rhs and a sparse matrix A
+
+    The sparse LU factorizations of the system matrices are kept in a cache, keyed by the factor. Since each level has
+    its own problem instance, there is one cache per level. Within a step, the factor only takes as many values as
+    there are nodes, so after the first sweep each solve is a pair of triangular solves. The least recently used
+    factorization is dropped if the cache is full (e.g. when the step size changes).
+
+    Attributes:
+        A: system matrix in sparse format, has to be set by the derived class
+        lu_cache_size: maximal number of factorizations kept (can be set via the problem parameters)
+        __factors: the factorizations, least recently used first
+        __lock: lock for the cache (solves may run in concurrent threads, e.g. with the node-parallel sweeper)
+    """
+
+    lu_cache_size = 16
+
+    def __init__(self, init, dtype_u, dtype_f):
+        """
+        Initialization routine
+
+        Args:
+            init: number of degrees-of-freedom (whatever this may represent)
+            dtype_u: variable data type
+            dtype_f: RHS data type
+        """
+
+        super(ptype_linear,self).__init__(init,dtype_u,dtype_f)
+
+        self.__factors = OrderedDict()
+        self.__lock = threading.Lock()
+
+
+    def get_system_matrix(self,factor):
+        """
+        Assembles the system matrix I-factor*A (to be overridden for other structures, e.g. block systems)
+
+        Args:
+            factor: abbrev. for the node-to-node stepsize (or any other factor required)
+        Returns:
+            system matrix in sparse format
+        """
+        return sp.eye(self.A.shape[0],format='csc') - factor*self.A
+
+
+    def solve_linear(self,factor,b):
+        """
+        Solves the system with matrix I-factor*A, using the cached factorization if there is one
+
+        Args:
+            factor: abbrev. for the node-to-node stepsize (or any other factor required)
+            b: right-hand side as (flat) array
+        Returns:
+            solution as array
+        """
+
+        with self.__lock:
+            if factor in self.__factors:
+                self.__factors.move_to_end(factor)
+                lu = self.__factors[factor]
+            else:
+                lu = None
+
+        if lu is None:
+            lu = LA.splu(sp.csc_matrix(self.get_system_matrix(factor)))
+            with self.__lock:
+                self.__factors[factor] = lu
+                while len(self.__factors) > self.lu_cache_size:
+                    self.__factors.popitem(last=False)
+
+        return lu.solve(b)
@@ -17,12 +17,13 @@ class step():
         __dt: current step size (property dt)
         __k: current iteration (property iter)
         __transfer_dict: data structure to couple levels and transfer operators
+        __space_transfer_dict: data structure to couple levels and spatial transfer operators
         levels: list of levels
         params: parameters given by the user
         __slots__: list of attributes to avoid accidential creation of new class attributes
     """
 
-    __slots__ = ('params','levels','__transfer_dict','status','__prev')
+    __slots__ = ('params','levels','__transfer_dict','__space_transfer_dict','status','__prev','__next')
 
     def __init__(self, params):
         """
@@ -39,6 +40,14 @@ class step():
                 defaults = dict()
                 defaults['maxiter'] = 20
                 defaults['fine_comm'] = True
+                defaults['ring'] = False
+                defaults['freeze_converged'] = False
+                defaults['coarse_sweeps'] = 1
+                defaults['adaptivity'] = False
+                defaults['e_tol'] = 1E-08
+                defaults['checkpoint_file'] = None
+                defaults['checkpoint_every'] = 1
+                defaults['parareal_tol'] = None
 
                 for k,v in defaults.items():
                     setattr(self,k,v)
@@ -68,8 +77,10 @@ class step():
 
         # empty attributes
         self.__transfer_dict = {}
+        self.__space_transfer_dict = {}
         self.levels = []
         self.__prev = None
+        self.__next = None
 
     def generate_hierarchy(self,descr):
         """
@@ -196,23 +207,34 @@ class step():
 
         Args:
             transfer_class: the class which can transfer between the two levels
-            transfer_params: parameters for the transfer class
+            transfer_params: parameters for the transfer class (finter: prolong f instead of reevaluating it,
+                             frestrict (optional): restrict f instead of reevaluating it, same spatial resolution only)
             fine_level: the fine level
             coarse_level: the coarse level
         """
 
         # create new instance of the specific transfer class
         T = transfer_class(fine_level,coarse_level)
-        # use transfer dictionary twice to set restrict and prologn operator
-        self.__transfer_dict[tuple([fine_level,coarse_level])] = T.restrict
 
         assert 'finter' in transfer_params
 
+        # use transfer dictionary twice to set restrict and prologn operator (restricting f is optional)
+        if transfer_params.get('frestrict',False):
+            # the restricted f is the coarse f only without coarsening in space, otherwise FAS does not converge
+            assert fine_level.prob.init == coarse_level.prob.init, 'can restrict f only between levels of the same size'
+            self.__transfer_dict[tuple([fine_level,coarse_level])] = T.restrict_f
+        else:
+            self.__transfer_dict[tuple([fine_level,coarse_level])] = T.restrict
+
         if transfer_params['finter']:
             self.__transfer_dict[tuple([coarse_level,fine_level])] = T.prolong_f
         else:
             self.__transfer_dict[tuple([coarse_level,fine_level])] = T.prolong
 
+        # same for the purely spatial operators
+        self.__space_transfer_dict[tuple([fine_level,coarse_level])] = T.restrict_space
+        self.__space_transfer_dict[tuple([coarse_level,fine_level])] = T.prolong_space
+
 
 
     def transfer(self,source,target):
@@ -229,6 +251,23 @@ class step():
         self.__transfer_dict[tuple([source,target])]()
 
 
+    def transfer_space(self,u,source,target):
+        """
+        Wrapper routine to ease the call of the spatial transfer functions
+
+        Same as transfer, but only the data u is restricted or prolongated in space (no collocation nodes, no FAS).
+
+        Args:
+            u: data living on the source level
+            source: source level
+            target: target level
+
+        Returns:
+            data living on the target level
+        """
+        return self.__space_transfer_dict[tuple([source,target])](u)
+
+
     def reset_step(self):
         """
         Routine so clean-up step structure and the corresp. levels for further uses
@@ -253,7 +292,8 @@ class step():
 
         # pass u0 to u[0] on the finest level 0
         P = self.levels[0].prob
-        self.levels[0].u[0] = P.dtype_u(u0)
+        self.levels[0].u[0] = self.levels[0].acquire_copy(P.dtype_u,u0)
+        self.levels[0].sweep.invalidate_integral()
 
     @property
     def prev(self):
@@ -273,4 +313,25 @@ class step():
             p: new previous step
         """
         assert type(p) is type(self)
-        self.__prev = p
\ No newline at end of file
+        self.__prev = p
+
+
+    @property
+    def next(self):
+        """
+        Getter for next step
+        Returns:
+            next
+        """
+        return self.__next
+
+
+    @next.setter
+    def next(self,n):
+        """
+        Setter for next step
+        Args:
+            n: new next step
+        """
+        assert type(n) is type(self)
+        self.__next = n
\ No newline at end of file
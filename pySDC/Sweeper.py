@@ -3,10 +3,31 @@ import numpy as np
 
 from pySDC.Collocation import CollBase
 from pySDC.Level import level
+from pySDC.Preconditioners import get_Qd
 
 from future.utils import with_metaclass
 
 
+def axpy(y,a,x):
+    """
+    Helper routine for y += a*x in the sweepers, in place if the data type provides axpy (e.g. mesh)
+
+    Data types without axpy (e.g. fenics_mesh) use their operators instead.
+
+    Args:
+        y: data type object to be updated
+        a: float factor
+        x: data type object to be added
+    Returns:
+        the updated y (a new object, if the data type has no in-place operations)
+    """
+    if hasattr(y,'axpy'):
+        y.axpy(a,x)
+    else:
+        y += a*x
+    return y
+
+
 class sweeper(with_metaclass(abc.ABCMeta)):
     """
     Base abstract sweeper class
@@ -14,6 +35,9 @@ class sweeper(with_metaclass(abc.ABCMeta)):
     Attributes:
         __level: current level
         coll: collocation object
+        extrap_idx: indices of the values used for the embedded error estimate
+        extrap_weights: weights to extrapolate these values to the last node
+        __integral: cached result of integrate for the current node values (None if outdated)
     """
 
     def __init__(self,coll):
@@ -33,6 +57,39 @@ class sweeper(with_metaclass(abc.ABCMeta)):
         # collocation object
         self.coll = coll
 
+        # lower-order extrapolation from tleft and all but the last node to the last node (error estimate)
+        self.extrap_idx, self.extrap_weights = self.__get_extrapolation
+
+        # no integral computed yet
+        self.__integral = None
+
+
+    @property
+    def __get_extrapolation(self):
+        """
+        Computes the Lagrange weights for the embedded error estimate
+
+        The values at tleft (unless it is a node anyway) and at all but the last node are interpolated and evaluated at
+        the last node.
+
+        Returns:
+            idx: indices of the values in u
+            weights: Lagrange weights for these values
+        """
+        points = np.append(self.coll.tleft,self.coll.nodes[:-1])
+        idx = np.arange(self.coll.num_nodes)
+        if self.coll.left_is_node:
+            points = points[1:]
+            idx = idx[1:]
+
+        weights = np.ones(len(points))
+        for j in range(len(points)):
+            for k in range(len(points)):
+                if k != j:
+                    weights[j] *= (self.coll.nodes[-1]-points[k])/(points[j]-points[k])
+
+        return idx, weights
+
 
     def __set_level(self,L):
         """
@@ -44,6 +101,35 @@ class sweeper(with_metaclass(abc.ABCMeta)):
         assert isinstance(L,level)
         self.__level = L
 
+        # preconditioners chosen via the level parameters replace the defaults of the sweeper
+        self.set_preconditioners(QI=L.params.QI,QE=L.params.QE)
+
+        self._set_level(L)
+
+
+    def _set_level(self,L):
+        """
+        Hook for sweepers which need to set up more for their level, called once the level is set (nothing to do here)
+
+        Args:
+            L: current level
+        """
+        pass
+
+
+    def set_preconditioners(self,QI=None,QE=None):
+        """
+        Replaces the integration matrices QI and/or QE of the sweeper by precomputed ones from the registry
+
+        Args:
+            QI: name of the implicit preconditioner (e.g. 'IE', 'LU', 'CN', 'MIN', see Preconditioners.QDELTA)
+            QE: name of the explicit preconditioner (e.g. 'EE')
+        """
+        for name,qd_type in [('QI',QI),('QE',QE)]:
+            if qd_type is not None:
+                assert hasattr(self,name), '%s has no preconditioner %s to choose' % (type(self).__name__,name)
+                setattr(self,name,get_Qd(qd_type,self.coll))
+
 
     @property
     def level(self):
@@ -53,6 +139,29 @@ class sweeper(with_metaclass(abc.ABCMeta)):
         return self.__level
 
 
+    def get_integral(self):
+        """
+        Returns the integral over the current node values, computed by integrate only if the values have changed
+
+        The cache is shared by update_nodes, compute_residual and the restriction, so that the integral is computed
+        once per sweep. Everyone changing L.f (or L.u) has to call invalidate_integral afterwards. The list is a copy,
+        but its entries are the cached objects, so they must not be modified in place.
+
+        Returns:
+            list of dtype_u: containing the integral as values
+        """
+        if self.__integral is None:
+            self.__integral = self.integrate()
+        return list(self.__integral)
+
+
+    def invalidate_integral(self):
+        """
+        Marks the cached integral as outdated (to be called whenever L.f or L.u change)
+        """
+        self.__integral = None
+
+
     def predict(self):
         """
         Predictor to fill values at nodes before first sweep
@@ -70,9 +179,12 @@ class sweeper(with_metaclass(abc.ABCMeta)):
 
         # copy u[0] to all collocation nodes, evaluate RHS
         for m in range(1,self.coll.num_nodes+1):
-            L.u[m] = P.dtype_u(L.u[0])
+            L.u[m] = L.acquire_copy(P.dtype_u,L.u[0])
             L.f[m] = P.eval_f(L.u[m],L.time+L.dt*self.coll.nodes[m-1])
 
+        # new values, cached integral is outdated
+        self.invalidate_integral()
+
         # indicate that this level is now ready for sweeps
         L.status.unlocked = True
 
@@ -95,10 +207,11 @@ class sweeper(with_metaclass(abc.ABCMeta)):
 
         # build QF(u)
         res_norm = []
-        res = self.integrate()
+        res = self.get_integral()
         for m in range(self.coll.num_nodes):
-            # add u0 and subtract u at current node
-            res[m] += L.u[0] - L.u[m+1]
+            # add u0 and subtract u at current node (new object, the cached integral is not touched)
+            res[m] = res[m] + L.u[0]
+            res[m] -= L.u[m+1]
             # add tau if associated
             if L.tau is not None:
                 res[m] += L.tau[m]
@@ -113,6 +226,31 @@ class sweeper(with_metaclass(abc.ABCMeta)):
 
         return None
 
+    def compute_error_estimate(self):
+        """
+        Computation of an embedded estimate of the local error
+
+        The difference between the value at the last node and its extrapolation from the previous values estimates the
+        error of a method of lower order, i.e. it scales with dt to the power of len(extrap_weights). This is an
+        estimate for the error of the polynomial through u0 and all but the last node, not for the error of the
+        collocation solution, which has a higher order (e.g. 2M-1 for Radau-right). Hence, it bounds the local error of
+        the collocation solution from above (for small enough dt), usually by orders of magnitude.
+        """
+
+        # get current level and problem description
+        L = self.level
+        P = L.prob
+
+        # extrapolate to last node and compare
+        err = P.dtype_u(L.u[-1])
+        for j in range(len(self.extrap_idx)):
+            err -= self.extrap_weights[j]*L.u[self.extrap_idx[j]]
+
+        # use abs function from data type here
+        L.status.error_estimate = abs(err)
+
+        return None
+
     @abc.abstractmethod
     def compute_end_point(self):
         """
@@ -129,6 +267,14 @@ class sweeper(with_metaclass(abc.ABCMeta)):
         return None
 
 
+    @abc.abstractmethod
+    def integrate_end(self):
+        """
+        Abstract interface to right-hand side integration over the full interval
+        """
+        return None
+
+
     @abc.abstractmethod
     def update_nodes(self):
         """
@@ -4,6 +4,54 @@ import copy as cp
 
 from future.utils import with_metaclass
 
+from pySDC.Sweeper import axpy
+
+
+def interpolation_matrix(nodes_from,nodes_to):
+    """
+    Helper routine for the Lagrange interpolation between two sets of nodes
+
+    Args:
+        nodes_from: nodes where the values are given
+        nodes_to: nodes where the interpolated values are needed
+    Returns:
+        interpolation matrix, dim. len(nodes_to) x len(nodes_from)
+    """
+
+    nodes_to = np.asarray(nodes_to,dtype=float)
+    A = np.ones((len(nodes_to),len(nodes_from)))
+    for j,xj in enumerate(nodes_from):
+        for k,xk in enumerate(nodes_from):
+            if k != j:
+                A[:,j] *= (nodes_to-xk)/(xj-xk)
+
+    return A
+
+
+def collocation_interpolation_matrix(coll_from,coll_to):
+    """
+    Helper routine for the interpolation of the collocation polynomial between two sets of collocation nodes
+
+    The values are given at the left interval boundary (u[0]) and at the nodes (u[1:]), so the interpolating
+    polynomial has the degree of the collocation polynomial on coll_from. If the left boundary is a node itself, u[0]
+    is not used.
+
+    Args:
+        coll_from: collocation object where the values are given
+        coll_to: collocation object where the interpolated values are needed
+    Returns:
+        interpolation matrix, dim. coll_to.num_nodes x (coll_from.num_nodes+1)
+    """
+
+    assert coll_from.tleft == coll_to.tleft and coll_from.tright == coll_to.tright, \
+        'cannot interpolate between different intervals'
+
+    if coll_from.left_is_node:
+        A = interpolation_matrix(coll_from.nodes,coll_to.nodes)
+        return np.hstack((np.zeros((coll_to.num_nodes,1)),A))
+
+    return interpolation_matrix(np.append(coll_from.tleft,coll_from.nodes),coll_to.nodes)
+
 
 class transfer(with_metaclass(abc.ABCMeta)):
     """
@@ -14,6 +62,8 @@ class transfer(with_metaclass(abc.ABCMeta)):
         coarse: reference to the coarse level
         init_f: number of variables on the fine level (whatever init represents there)
         init_c: number of variables on the coarse level (whatever init represents there)
+        Rcoll: interpolation matrix from the fine to the coarse nodes (None if the nodes are the same)
+        Pcoll: interpolation matrix from the coarse to the fine nodes (None if the nodes are the same)
     """
 
     def __init__(self,fine_level,coarse_level):
@@ -31,22 +81,75 @@ class transfer(with_metaclass(abc.ABCMeta)):
         self.init_c = self.coarse.prob.init
         self.init_f = self.fine.prob.init
 
-    # FIXME: add time restriction
+        # interpolation in time, only needed if the levels have different collocation nodes
+        coll_f = self.fine.sweep.coll
+        coll_c = self.coarse.sweep.coll
+        if np.array_equal(coll_f.nodes,coll_c.nodes):
+            self.Rcoll = None
+            self.Pcoll = None
+        else:
+            self.Rcoll = collocation_interpolation_matrix(coll_f,coll_c)
+            self.Pcoll = collocation_interpolation_matrix(coll_c,coll_f)
+
+    @staticmethod
+    def __interpolate(A,values):
+        """
+        Helper routine for the interpolation in time, i.e. linear combinations of data type objects
+
+        Args:
+            A: interpolation matrix, dim. n_out x len(values)
+            values: list of data type objects
+        Returns:
+            list of n_out new data type objects
+        """
+
+        me = []
+        for row in A:
+            # start from zero of the right type, the data type needs axpy or a multiplication with floats
+            me.append(values[0] - values[0])
+            for j in range(len(values)):
+                me[-1] = axpy(me[-1],float(row[j]),values[j])
+
+        return me
+
     def restrict(self):
         """
         Space-time restriction routine
 
-        The routine applies the spatial restriction operator to teh fine values on the fine nodes, then reevaluates f
-        on the coarse level. This is used for the first part of the FAS correction tau via integration. The second part
-        is the integral over the fine values, restricted to the coarse level. Finally, possible tau corrections on the
-        fine level are restricted as well.
+        The routine applies the spatial restriction operator to the fine values on the fine nodes, interpolates them in
+        time to the coarse nodes (if the nodes differ), then reevaluates f on the coarse level. This is used for the
+        first part of the FAS correction tau via integration. The second part is the integral over the fine values,
+        restricted to the coarse level in space and time. Finally, possible tau corrections on the fine level are
+        restricted as well. If the right end point is not a coarse node, tau gets an extra entry for the full interval,
+        built the same way from the integrals over the full interval. Then the coarse end value is the restricted
+        fine end value for the fine collocation solution, as the nodes are.
+        """
+        return self.__restrict(restrict_f=False)
+
+    def restrict_f(self):
+        """
+        Space-time restriction routine w.r.t. the rhs f
+
+        Same as restrict, but the fine rhs evaluations are restricted as well instead of reevaluating f on the coarse
+        level. This saves all evaluations of f on the coarse level but the one at u[0]. Note that the FAS correction
+        is only consistent (i.e. the fine collocation solution remains a fixed point) if restricting f gives the same
+        as evaluating f for the restricted values, e.g. for linear problems with coarsening in time only. Hence, the
+        step allows this for levels with the same spatial resolution only.
+        """
+        return self.__restrict(restrict_f=True)
+
+    def __restrict(self,restrict_f):
+        """
+        Helper routine for the space-time restriction
+
+        Args:
+            restrict_f: flag whether to restrict f (True) or to reevaluate it on the coarse level (False)
         """
 
         # get data for easier access
         F = self.fine
         G = self.coarse
 
-        PF = F.prob
         PG = G.prob
 
         SF = F.sweep
@@ -54,50 +157,112 @@ class transfer(with_metaclass(abc.ABCMeta)):
 
         # only of the level is unlocked at least by prediction
         assert F.status.unlocked
-        # can only do space-restriction so far
-        assert np.array_equal(SF.coll.nodes,SG.coll.nodes)
 
-        # restrict fine values in space, reevaluate f on coarse level
-        G.u[0] = self.restrict_space(F.u[0])
+        # restrict fine values in space (and time), restrict or reevaluate f on coarse level
+        for m,u in enumerate(self.__restrict_nodes(F.u)):
+            G.u[m] = u
+        # f at u[0] is always reevaluated, since F.f[0] might not be up to date after a new u[0] in PFASST
         G.f[0] = PG.eval_f(G.u[0],G.time)
-        for m in range(1,SG.coll.num_nodes+1):
-            G.u[m] = self.restrict_space(F.u[m])
-            G.f[m] = PG.eval_f(G.u[m],G.time+G.dt*SG.coll.nodes[m-1])
+        if restrict_f:
+            for m,f in enumerate(self.__restrict_nodes(F.f,left=G.f[0])[1:]):
+                G.f[m+1] = f
+        else:
+            for m in range(1,SG.coll.num_nodes+1):
+                G.f[m] = PG.eval_f(G.u[m],G.time+G.dt*SG.coll.nodes[m-1])
+        SG.invalidate_integral()
 
         # build coarse level tau correction part
-        tauG = G.sweep.integrate()
+        tauG = SG.get_integral()
 
-        # build fine level tau correction part
-        tauF = F.sweep.integrate()
+        # build fine level tau correction part (usually cached from the residual computation on the fine level)
+        tauF = SF.get_integral()
 
-        # restrict fine level tau correction part
-        tauFG = []
-        for m in range(SG.coll.num_nodes):
-            tauFG.append(self.restrict_space(tauF[m]))
+        # restrict fine level tau correction part, also restrict possible tau correction from fine
+        tauFG = self.__restrict_integrals(tauF)
+        if F.tau is not None:
+            tauFF = self.__restrict_integrals(F.tau[:SF.coll.num_nodes])
 
-        # build tau correction, also restrict possible tau correction from fine
+        # build tau correction
         for m in range(SG.coll.num_nodes):
             G.tau[m] = tauFG[m] - tauG[m]
             if F.tau is not None:
-                G.tau[m] += self.restrict_space(F.tau[m])
+                G.tau[m] += tauFF[m]
+
+        # build tau correction for the full interval (the last entry of the fine tau is always the one for tright)
+        if not SG.coll.right_is_node:
+            G.tau[-1] = self.restrict_space(SF.integrate_end()) - SG.integrate_end()
+            if F.tau is not None:
+                G.tau[-1] += self.restrict_space(F.tau[-1])
 
-        # save u and rhs evaluations for interpolation
+        # save u and rhs evaluations for interpolation (the old copies are recycled)
         for m in range(SG.coll.num_nodes+1):
-            G.uold[m] = PG.dtype_u(G.u[m])
-            G.fold[m] = PG.dtype_f(G.f[m])
+            G.release(G.uold[m],G.fold[m])
+            G.uold[m] = G.acquire_copy(PG.dtype_u,G.u[m])
+            G.fold[m] = G.acquire_copy(PG.dtype_f,G.f[m])
 
         # works as a predictor
         G.status.unlocked = True
 
         return None
 
-    # FIXME: add time prolongation
+    def __restrict_nodes(self,values,left=None):
+        """
+        Helper routine to restrict values at the left boundary and at the fine nodes in space and time
+
+        Args:
+            values: list of data type objects, the left boundary and one per fine node
+            left: value at the left boundary on the coarse level (restricted from values[0] if None)
+        Returns:
+            list of data type objects, the left boundary and one per coarse node
+        """
+
+        if left is None:
+            left = self.restrict_space(values[0])
+        tmp = [left] + [self.restrict_space(values[m]) for m in range(1,len(values))]
+        if self.Rcoll is None:
+            return tmp
+        return [tmp[0]] + self.__interpolate(self.Rcoll,tmp)
+
+    def __restrict_integrals(self,values):
+        """
+        Helper routine to restrict integrals from the left boundary to the fine nodes in space and time
+
+        The integrals vanish at the left boundary, so u[0] does not contribute to the interpolation.
+
+        Args:
+            values: list of data type objects, one per fine node
+        Returns:
+            list of data type objects, one per coarse node
+        """
+
+        tmp = [self.restrict_space(values[m]) for m in range(len(values))]
+        if self.Rcoll is None:
+            return tmp
+        return self.__interpolate(self.Rcoll[:,1:],tmp)
+
+    def __prolong_correction(self,new,old):
+        """
+        Helper routine to prolong the coarse correction in space and time
+
+        Args:
+            new: list of data type objects, the computed values on the coarse level (including the left boundary)
+            old: list of data type objects, the restricted values on the coarse level (including the left boundary)
+        Returns:
+            list of data type objects, the correction on the fine level (including the left boundary)
+        """
+
+        delta = [self.prolong_space(new[m] - old[m]) for m in range(len(new))]
+        if self.Pcoll is None:
+            return delta
+        return [delta[0]] + self.__interpolate(self.Pcoll,delta)
+
     def prolong(self):
         """
         Space-time prolongation routine
 
         This routine applies the spatial prolongation routine to the difference between the computed and the restricted
-        values on the coarse level and then adds this difference to the fine values as coarse correction.
+        values on the coarse level, interpolates it in time to the fine nodes (if the nodes differ) and then adds this
+        difference to the fine values as coarse correction.
         """
 
         # get data for easier access
@@ -107,31 +272,32 @@ class transfer(with_metaclass(abc.ABCMeta)):
         PF = F.prob
 
         SF = F.sweep
-        SG = G.sweep
 
         # only of the level is unlocked at least by prediction or restriction
         assert G.status.unlocked
-        # can only do space-restriction so far
-        assert np.array_equal(SF.coll.nodes,SG.coll.nodes)
 
         # build coarse correction
         # need to restrict F.u[0] again here, since it might have changed in PFASST
         G.uold[0] = self.restrict_space(F.u[0])
 
+        delta_u = self.__prolong_correction(G.u,G.uold)
         for m in range(0,SF.coll.num_nodes+1):
-            F.u[m] += self.prolong_space(G.u[m] - G.uold[m])
+            F.u[m] += delta_u[m]
             F.f[m] = PF.eval_f(F.u[m],F.time+F.dt*SF.coll.nodes[m-1])
 
+        # new values, cached integral is outdated
+        SF.invalidate_integral()
+
         return None
 
 
-    # FIXME: add time prolongation
     def prolong_f(self):
         """
         Space-time prolongation routine w.r.t. the rhs f
 
         This routine applies the spatial prolongation routine to the difference between the computed and the restricted
-        values on the coarse level and then adds this difference to the fine values as coarse correction.
+        values on the coarse level, interpolates it in time to the fine nodes (if the nodes differ) and then adds this
+        difference to the fine values as coarse correction.
         """
 
         # get data for easier access
@@ -142,21 +308,23 @@ class transfer(with_metaclass(abc.ABCMeta)):
         PG = G.prob
 
         SF = F.sweep
-        SG = G.sweep
 
         # only of the level is unlocked at least by prediction or restriction
         assert G.status.unlocked
-        # can only do space-restriction so far
-        assert np.array_equal(SF.coll.nodes,SG.coll.nodes)
 
         # build coarse correction
         # need to restrict F.u[0] again here, since it might have changed in PFASST
         G.uold[0] = self.restrict_space(F.u[0])
         G.fold[0] = PG.eval_f(G.uold[0],G.time)
 
+        delta_u = self.__prolong_correction(G.u,G.uold)
+        delta_f = self.__prolong_correction(G.f,G.fold)
         for m in range(0,SF.coll.num_nodes+1):
-            F.u[m] += self.prolong_space(G.u[m] - G.uold[m])
-            F.f[m] += self.prolong_space(G.f[m] - G.fold[m])
+            F.u[m] += delta_u[m]
+            F.f[m] += delta_f[m]
+
+        # new values, cached integral is outdated
+        SF.invalidate_integral()
 
         return None
 
@@ -0,0 +1,88 @@
+from pySDC.Communicator import communicator, request
+from pySDC.Errors import CommunicationError
+
+
+class in_process(communicator):
+    """
+    Communicator for steps living in the same process and thread (virtual parallelism)
+
+    Messages are kept in a dictionary, sending only stores a reference to the data. Since there is nobody else who
+    could send the message later on, waiting for a message which has not been sent yet is an error.
+
+    Attributes:
+        messages: dictionary of lists of sent, but not yet received data, keyed by (source, dest, tag)
+    """
+
+    def __init__(self):
+        """
+        Initialization routine
+        """
+        self.messages = {}
+
+    def isend(self,data,source,dest,tag):
+        """
+        Non-blocking send, completes immediately
+
+        Args:
+            data: the data to be sent
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+        Returns:
+            request object (completed)
+        """
+        self.messages.setdefault((source,dest,tag),[]).append(data)
+        return request(self,source,dest,tag,completed=True)
+
+    def irecv(self,source,dest,tag):
+        """
+        Non-blocking receive
+
+        Args:
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+        Returns:
+            request object
+        """
+        return request(self,source,dest,tag)
+
+    def test(self,req):
+        """
+        Check whether a request has been completed, take the message if it is there
+
+        Args:
+            req: request object
+        Returns:
+            True if the operation has been completed
+        """
+        if not req.completed and self.messages.get((req.source,req.dest,req.tag)):
+            req.data = self.messages[(req.source,req.dest,req.tag)].pop(0)
+            req.completed = True
+        return req.completed
+
+    def wait(self,req):
+        """
+        Wait until a request has been completed
+
+        Args:
+            req: request object
+        Returns:
+            the data of the message
+        Raises:
+            CommunicationError: if the message has not been sent (this would block forever)
+        """
+        if not self.test(req):
+            raise CommunicationError('RECV ERROR: no message from %s to %s with tag %s'
+                                     % (req.source,req.dest,req.tag))
+        return req.data
+
+    def discard(self,dest):
+        """
+        Drop all messages for a step which have not been received
+
+        Args:
+            dest: the receiving step (slot)
+        """
+        for key in [key for key in self.messages if key[1] == dest]:
+            del self.messages[key]
@@ -0,0 +1,181 @@
+import queue
+import multiprocessing as mproc
+
+from pySDC.Communicator import communicator, request
+from pySDC.Errors import CommunicationError
+
+
+class multiprocess(communicator):
+    """
+    Communicator for steps running in different processes (created by fork after the communicator)
+
+    Each rank (step or master) has its own inbox, a multiprocessing queue. Sending puts the data into the inbox of the
+    receiver and returns right away, the pickling and the transport are done by the feeder thread of the queue, i.e.
+    they overlap with the computations of the sender. Each process only receives the messages of its own rank: messages
+    with other tags than the requested one are kept in a stash until they are asked for.
+
+    Attributes:
+        inboxes: dictionary of queues, one per rank
+        stash: dictionary of lists of received, but not yet requested data, keyed by (source, dest, tag)
+        timeout: seconds to wait for a message before giving up (None: wait forever)
+    """
+
+    def __init__(self,ranks,ctx=None,timeout=None):
+        """
+        Initialization routine
+
+        Args:
+            ranks: list of all ranks (steps or master) which receive messages
+            ctx: multiprocessing context to create the queues with (default: fork)
+            timeout: seconds to wait for a message before giving up (None: wait forever)
+        """
+        if ctx is None:
+            ctx = mproc.get_context('fork')
+        self.inboxes = {rank: ctx.Queue() for rank in ranks}
+        self.stash = {}
+        self.timeout = timeout
+
+    def isend(self,data,source,dest,tag):
+        """
+        Non-blocking send, the data is passed to the feeder thread of the receiver's inbox
+
+        Args:
+            data: the data to be sent
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+        Returns:
+            request object (completed)
+        """
+        self.inboxes[dest].put((source,tag,data))
+        return request(self,source,dest,tag,completed=True)
+
+    def irecv(self,source,dest,tag):
+        """
+        Non-blocking receive
+
+        Args:
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+        Returns:
+            request object
+        """
+        return request(self,source,dest,tag)
+
+    def abort(self,msg,source,dest):
+        """
+        Send an error instead of data, the receiver raises a CommunicationError as soon as it gets it
+
+        Args:
+            msg: error message (e.g. the traceback of the sender)
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+        """
+        self.inboxes[dest].put((source,None,msg))
+
+    def __stash(self,dest,msg):
+        """
+        Helper routine to store a message taken from the inbox
+
+        Args:
+            dest: the receiving step (slot)
+            msg: tuple of source, tag and data
+        Raises:
+            CommunicationError: if the sender reports an error instead
+        """
+        source,tag,data = msg
+        if tag is None:
+            raise CommunicationError('error in process of %s:\n%s' % (source,data))
+        self.stash.setdefault((source,dest,tag),[]).append(data)
+
+    def __take(self,req):
+        """
+        Helper routine to complete a request if its message is in the stash
+
+        Args:
+            req: request object
+        Returns:
+            True if the operation has been completed
+        """
+        if not req.completed and self.stash.get((req.source,req.dest,req.tag)):
+            req.data = self.stash[(req.source,req.dest,req.tag)].pop(0)
+            req.completed = True
+        return req.completed
+
+    def test(self,req):
+        """
+        Check whether a request has been completed, take all messages which have arrived so far out of the inbox
+
+        Args:
+            req: request object
+        Returns:
+            True if the operation has been completed
+        """
+        while not self.__take(req):
+            try:
+                self.__stash(req.dest,self.inboxes[req.dest].get_nowait())
+            except queue.Empty:
+                return False
+        return True
+
+    def wait(self,req):
+        """
+        Wait until a request has been completed, blocking until the message has arrived
+
+        Args:
+            req: request object
+        Returns:
+            the data of the message
+        Raises:
+            CommunicationError: if the message did not arrive within the timeout or the sender reports an error
+        """
+        while not self.__take(req):
+            try:
+                self.__stash(req.dest,self.inboxes[req.dest].get(timeout=self.timeout))
+            except queue.Empty:
+                raise CommunicationError('RECV ERROR: no message from %s to %s with tag %s within %s seconds'
+                                         % (req.source,req.dest,req.tag,self.timeout))
+        return req.data
+
+    def poll(self,req,timeout):
+        """
+        Wait at most timeout seconds for the next message of the receiver (which need not be the requested one)
+
+        Args:
+            req: request object
+            timeout: seconds to wait for a message
+        Returns:
+            True if the operation has been completed
+        Raises:
+            CommunicationError: if the sender reports an error
+        """
+        if not self.__take(req):
+            try:
+                self.__stash(req.dest,self.inboxes[req.dest].get(timeout=timeout))
+            except queue.Empty:
+                return False
+        return self.__take(req)
+
+    def discard(self,dest):
+        """
+        Drop all messages for a step which have been taken out of the inbox, but not requested
+
+        Messages still in the inbox are kept, since they may already belong to the next block. Use tags which tell
+        the blocks apart, so that outdated messages are never requested.
+
+        Args:
+            dest: the receiving step (slot)
+        """
+        for key in [key for key in self.stash if key[1] == dest]:
+            del self.stash[key]
+
+    def close(self):
+        """
+        Routine to let the process exit without waiting for its sent messages to be received
+
+        Messages which are still in the feeder thread may be lost, so call this only when all messages which are still
+        needed are known to have been received.
+        """
+        for inbox in self.inboxes.values():
+            inbox.cancel_join_thread()
@@ -0,0 +1,82 @@
+import threading
+
+from pySDC.communicator_classes.in_process import in_process
+
+
+class threaded(in_process):
+    """
+    Communicator for steps running in different threads of the same process
+
+    Same as the in-process communicator, but all accesses to the messages are guarded by a condition variable, so
+    that waiting for a message blocks until another thread has sent it.
+
+    Attributes:
+        messages: dictionary of lists of sent, but not yet received data, keyed by (source, dest, tag)
+        cond: condition variable guarding the messages
+        timeout: seconds to wait for a message before giving up (None: wait forever)
+    """
+
+    def __init__(self,timeout=None):
+        """
+        Initialization routine
+
+        Args:
+            timeout: seconds to wait for a message before giving up (None: wait forever)
+        """
+        super(threaded,self).__init__()
+        self.cond = threading.Condition()
+        self.timeout = timeout
+
+    def isend(self,data,source,dest,tag):
+        """
+        Non-blocking send, wakes up all waiting receivers
+
+        Args:
+            data: the data to be sent
+            source: the sending step (slot)
+            dest: the receiving step (slot)
+            tag: identifier of the message
+        Returns:
+            request object (completed)
+        """
+        with self.cond:
+            req = super(threaded,self).isend(data,source,dest,tag)
+            self.cond.notify_all()
+        return req
+
+    def test(self,req):
+        """
+        Check whether a request has been completed, take the message if it is there
+
+        Args:
+            req: request object
+        Returns:
+            True if the operation has been completed
+        """
+        with self.cond:
+            return super(threaded,self).test(req)
+
+    def wait(self,req):
+        """
+        Wait until a request has been completed, blocking until the message has been sent
+
+        Args:
+            req: request object
+        Returns:
+            the data of the message
+        Raises:
+            CommunicationError: if the message did not arrive within the timeout
+        """
+        with self.cond:
+            self.cond.wait_for(lambda: super(threaded,self).test(req),timeout=self.timeout)
+            return super(threaded,self).wait(req)
+
+    def discard(self,dest):
+        """
+        Drop all messages for a step which have not been received
+
+        Args:
+            dest: the receiving step (slot)
+        """
+        with self.cond:
+            super(threaded,self).discard(dest)
@@ -1,5 +1,4 @@
 import numpy as np
-import copy as cp
 
 from pySDC.Errors import DataError
 
@@ -25,9 +24,9 @@ class mesh():
             DataError: if init is none of the types above
         """
 
-        # if init is another mesh, do a deepcopy (init by copy)
+        # if init is another mesh, copy its values (init by copy)
         if isinstance(init,mesh):
-            self.values = cp.deepcopy(init.values)
+            self.values = init.values.copy()
         # if init is a number or a tuple of numbers, create mesh object with val as initial value
         elif isinstance(init,tuple) or isinstance(init,int):
             self.values = np.empty(init,dtype=np.complex)
@@ -114,6 +113,96 @@ class mesh():
         return np.amax(absval)
 
 
+    def __iadd__(self, other):
+        """
+        Overloading the in-place addition operator for mesh types (no new mesh is created)
+
+        Args:
+            other: mesh object to be added
+        Raises:
+            DataError: if other is not a mesh object
+        Returns:
+            caller, containing self+other
+        """
+
+        if isinstance(other, mesh):
+            self.values += other.values
+            return self
+        else:
+            raise DataError("Type error: cannot add %s to %s" % (type(other),type(self)))
+
+
+    def __isub__(self, other):
+        """
+        Overloading the in-place subtraction operator for mesh types (no new mesh is created)
+
+        Args:
+            other: mesh object to be subtracted
+        Raises:
+            DataError: if other is not a mesh object
+        Returns:
+            caller, containing self-other
+        """
+
+        if isinstance(other, mesh):
+            self.values -= other.values
+            return self
+        else:
+            raise DataError("Type error: cannot subtract %s from %s" % (type(other),type(self)))
+
+
+    def __imul__(self, other):
+        """
+        Overloading the in-place multiply by factor operator for mesh types (no new mesh is created)
+
+        Args:
+            other: float factor
+        Raises:
+            DataError: is other is not a float
+        Returns:
+            caller, scaled by factor
+        """
+
+        if isinstance(other, float):
+            self.values *= other
+            return self
+        else:
+            raise DataError("Type error: cannot multiply %s to %s" % (type(other),type(self)))
+
+
+    def axpy(self, a, x):
+        """
+        In-place update self += a*x, without a temporary mesh
+
+        Args:
+            a: factor
+            x: mesh object
+        Raises:
+            DataError: if x is not a mesh object
+        """
+
+        if isinstance(x, mesh):
+            self.values += a*x.values
+        else:
+            raise DataError("Type error: cannot add multiple of %s to %s" % (type(x),type(self)))
+
+
+    def copy_from(self, other):
+        """
+        Copies the values of other into the caller (no new mesh is created)
+
+        Args:
+            other: mesh object
+        Raises:
+            DataError: if other is not a mesh object
+        """
+
+        if isinstance(other, mesh):
+            self.values[:] = other.values
+        else:
+            raise DataError("Type error: cannot copy %s to %s" % (type(other),type(self)))
+
+
 class rhs_imex_mesh():
 
     """
@@ -149,3 +238,92 @@ class rhs_imex_mesh():
         else:
             raise DataError('something went wrong during %s initialization' % type(self))
 
+
+    def __iadd__(self, other):
+        """
+        Overloading the in-place addition operator for rhs types (no new object is created)
+
+        Args:
+            other: rhs object to be added
+        Raises:
+            DataError: if other is not a rhs object
+        Returns:
+            caller, containing self+other
+        """
+
+        if isinstance(other, rhs_imex_mesh):
+            self.impl += other.impl
+            self.expl += other.expl
+            return self
+        else:
+            raise DataError("Type error: cannot add %s to %s" % (type(other),type(self)))
+
+
+    def __isub__(self, other):
+        """
+        Overloading the in-place subtraction operator for rhs types (no new object is created)
+
+        Args:
+            other: rhs object to be subtracted
+        Raises:
+            DataError: if other is not a rhs object
+        Returns:
+            caller, containing self-other
+        """
+
+        if isinstance(other, rhs_imex_mesh):
+            self.impl -= other.impl
+            self.expl -= other.expl
+            return self
+        else:
+            raise DataError("Type error: cannot subtract %s from %s" % (type(other),type(self)))
+
+
+    def __imul__(self, other):
+        """
+        Overloading the in-place multiply by factor operator for rhs types (no new object is created)
+
+        Args:
+            other: float factor
+        Returns:
+            caller, both parts scaled by factor
+        """
+
+        self.impl *= other
+        self.expl *= other
+        return self
+
+
+    def axpy(self, a, x):
+        """
+        In-place update self += a*x for both parts, without temporary objects
+
+        Args:
+            a: factor
+            x: rhs object
+        Raises:
+            DataError: if x is not a rhs object
+        """
+
+        if isinstance(x, rhs_imex_mesh):
+            self.impl.axpy(a,x.impl)
+            self.expl.axpy(a,x.expl)
+        else:
+            raise DataError("Type error: cannot add multiple of %s to %s" % (type(x),type(self)))
+
+
+    def copy_from(self, other):
+        """
+        Copies the values of other into the caller (no new object is created)
+
+        Args:
+            other: rhs object
+        Raises:
+            DataError: if other is not a rhs object
+        """
+
+        if isinstance(other, rhs_imex_mesh):
+            self.impl.copy_from(other.impl)
+            self.expl.copy_from(other.expl)
+        else:
+            raise DataError("Type error: cannot copy %s to %s" % (type(other),type(self)))
@@ -0,0 +1,650 @@
+import numpy as np
+
+from pySDC.Errors import DataError
+
+
+class vectors():
+    """
+    Base data type for 3-dimensional quantities of all particles (positions, velocities, accelerations and fields)
+
+    The values of all particles are kept in one contiguous array of shape (nparts,3), i.e. as structure of arrays.
+    Besides the operators of particles.py (which always create new objects), there are in-place operations to avoid
+    temporaries in the hot loops of the sweepers.
+
+    Attributes:
+        vectors: array with 3 values per particle (dim. nparts x 3)
+        values: flat view of vectors (dim. 3*nparts), compatible with the data types of particles.py
+    """
+
+    __slots__ = ('vectors',)
+
+    def __init__(self,init=None,val=None):
+        """
+        Initialization routine
+
+        Args:
+            init: can either be a number or another object of the same type
+            val: initial value (default: None)
+        Raises:
+            DataError: if init is none of the types above
+        """
+
+        # if init is another object of this type, copy its values (init by copy)
+        if isinstance(init,type(self)):
+            self.vectors = init.vectors.copy()
+        # if init is a number, create object with val as initial value
+        elif isinstance(init,int):
+            self.vectors = np.empty((init,3))
+            self.vectors[:] = val
+        # something is wrong, if none of the ones above hit
+        else:
+            raise DataError('something went wrong during %s initialization' % type(self))
+
+    @classmethod
+    def wrap(cls,vectors):
+        """
+        Creates an object around an existing array of shape (nparts,3), without copying
+
+        Args:
+            vectors: the array
+        Returns:
+            object of this type
+        """
+        me = cls.__new__(cls)
+        me.vectors = vectors
+        return me
+
+    @property
+    def values(self):
+        """
+        Getter for the flat view of the values (writing into it changes the vectors)
+        """
+        return self.vectors.reshape(-1)
+
+    @values.setter
+    def values(self,values):
+        """
+        Setter for the values from a flat array (dim. 3*nparts)
+        """
+        self.vectors = np.reshape(values,(-1,3))
+
+    def scaled_type(self):
+        """
+        Type of the product of a float factor and an object of this type (the factor is interpreted as time for
+        velocities and accelerations)
+
+        Returns:
+            data type
+        """
+        return type(self)
+
+    def __add__(self, other):
+        """
+        Overloading the addition operator
+
+        Args:
+            other: object of the same type to be added
+        Raises:
+            DataError: if other is not of the same type
+        Returns:
+            sum of caller and other values (self+other)
+        """
+
+        if isinstance(other, type(self)):
+            # always create new object, since otherwise c = a + b changes a as well!
+            return type(self).wrap(self.vectors + other.vectors)
+        else:
+            raise DataError("Type error: cannot add %s to %s" % (type(other),type(self)))
+
+    def __sub__(self, other):
+        """
+        Overloading the subtraction operator
+
+        Args:
+            other: object of the same type to be subtracted
+        Raises:
+            DataError: if other is not of the same type
+        Returns:
+            differences between caller and other values (self-other)
+        """
+
+        if isinstance(other, type(self)):
+            # always create new object, since otherwise c = a - b changes a as well!
+            return type(self).wrap(self.vectors - other.vectors)
+        else:
+            raise DataError("Type error: cannot subtract %s from %s" % (type(other),type(self)))
+
+    def __rmul__(self, other):
+        """
+        Overloading the right multiply by factor operator
+
+        Args:
+            other: float factor
+        Raises:
+            DataError: is other is not a float
+        Returns:
+            object of type scaled_type(), original values scaled by factor
+        """
+
+        if isinstance(other, float):
+            return self.scaled_type().wrap(self.vectors*other)
+        else:
+            raise DataError("Type error: cannot multiply %s to %s" % (type(other),type(self)))
+
+    def __iadd__(self, other):
+        """
+        Overloading the in-place addition operator (no new object is created)
+
+        Args:
+            other: object of the same type to be added
+        Raises:
+            DataError: if other is not of the same type
+        Returns:
+            caller, containing self+other
+        """
+
+        if isinstance(other, type(self)):
+            self.vectors += other.vectors
+            return self
+        else:
+            raise DataError("Type error: cannot add %s to %s" % (type(other),type(self)))
+
+    def __isub__(self, other):
+        """
+        Overloading the in-place subtraction operator (no new object is created)
+
+        Args:
+            other: object of the same type to be subtracted
+        Raises:
+            DataError: if other is not of the same type
+        Returns:
+            caller, containing self-other
+        """
+
+        if isinstance(other, type(self)):
+            self.vectors -= other.vectors
+            return self
+        else:
+            raise DataError("Type error: cannot subtract %s from %s" % (type(other),type(self)))
+
+    def __imul__(self, other):
+        """
+        Overloading the in-place multiply by factor operator (no new object is created, the type does not change)
+
+        Args:
+            other: float factor
+        Raises:
+            DataError: is other is not a float
+        Returns:
+            caller, scaled by factor
+        """
+
+        if isinstance(other, float):
+            self.vectors *= other
+            return self
+        else:
+            raise DataError("Type error: cannot multiply %s to %s" % (type(other),type(self)))
+
+    def axpy(self,a,x):
+        """
+        In-place update self += a*x, without a temporary object
+
+        The types are not checked against each other (e.g. pos.axpy(dt**2,acc) is fine), only the shapes have to match.
+
+        Args:
+            a: float factor
+            x: object of any type of this module
+        Raises:
+            DataError: if x is not of a type of this module or of the wrong size
+        """
+
+        if isinstance(x, vectors) and x.vectors.shape == self.vectors.shape:
+            self.vectors += a*x.vectors
+        else:
+            raise DataError("Type error: cannot add multiple of %s to %s" % (type(x),type(self)))
+
+    def copy_from(self,other):
+        """
+        Copies the values of other into the caller (no new object is created)
+
+        Args:
+            other: object of the same type
+        Raises:
+            DataError: if other is not of the same type
+        """
+
+        if isinstance(other, type(self)):
+            self.vectors[:] = other.vectors
+        else:
+            raise DataError("Type error: cannot copy %s to %s" % (type(other),type(self)))
+
+    def __abs__(self):
+        """
+        Overloading the abs operator
+
+        Returns:
+            absolute maximum of all values
+        """
+        return np.amax(np.absolute(self.vectors))
+
+
+class particles():
+    """
+    Particle data type for particles in 3 dimensions, stored as structure of arrays
+
+    Drop-in replacement for particles.particles: positions and velocities are arrays of shape (nparts,3), charges and
+    masses are arrays of shape (nparts,). The flat values (dim. 3*nparts) are still available as views.
+
+    Attributes:
+        pos: contains the positions of all particles
+        vel: contains the velocities of all particles
+        q: contains the charges of all particles
+        m: contains the masses of all particles
+    """
+
+    __slots__ = ('pos','vel','q','m')
+
+    class position(vectors):
+        """
+        Position data type for particles in 3 dimensions
+        """
+
+        __slots__ = ()
+
+    class velocity(vectors):
+        """
+        Velocity data type for particles in 3 dimensions
+        """
+
+        __slots__ = ()
+
+        def scaled_type(self):
+            """
+            Interpret float factor as time (time x velocity = position)
+            """
+            return particles.position
+
+    def __init__(self,init=None,vals=(None,None,None,None)):
+        """
+        Initialization routine
+
+        Args:
+            init: can either be a number or another particle object
+            vals: initial tuple of values for position, velocity, charge and mass (default: (None,None,None,None))
+        Raises:
+            DataError: if init is none of the types above
+        """
+
+        # if init is another particles object, copy all values (init by copy)
+        if isinstance(init,type(self)):
+            self.pos = particles.position(init.pos)
+            self.vel = particles.velocity(init.vel)
+            self.q = init.q.copy()
+            self.m = init.m.copy()
+        # if init is a number, create particles object and pick the corresponding initial values
+        elif isinstance(init,int):
+            self.pos = particles.position(init,val=vals[0])
+            self.vel = particles.velocity(init,val=vals[1])
+            self.q = np.zeros(init)
+            self.q[:] = vals[2]
+            self.m = np.zeros(init)
+            self.m[:] = vals[3]
+        # something is wrong, if none of the ones above hit
+        else:
+            raise DataError('something went wrong during %s initialization' % type(self))
+
+    def __new_like(self,pos,vel):
+        """
+        Helper routine to create a particles object from position and velocity, with copies of charges and masses
+
+        The copies are needed, since copy_from writes into the arrays of charges and masses.
+
+        Args:
+            pos: position object
+            vel: velocity object
+        Returns:
+            particles object
+        """
+        p = particles.__new__(type(self))
+        p.pos = pos
+        p.vel = vel
+        p.q = self.q.copy()
+        p.m = self.m.copy()
+        return p
+
+    def __add__(self, other):
+        """
+        Overloading the addition operator for particles types
+
+        Args:
+            other: particles object to be added
+        Raises:
+            DataError: if other is not a particles object
+        Returns:
+            sum of caller and other values (self+other)
+        """
+
+        if isinstance(other, type(self)):
+            # always create new particles, since otherwise c = a + b changes a as well!
+            return self.__new_like(self.pos + other.pos,self.vel + other.vel)
+        else:
+            raise DataError("Type error: cannot add %s to %s" % (type(other),type(self)))
+
+    def __sub__(self, other):
+        """
+        Overloading the subtraction operator for particles types
+
+        Args:
+            other: particles object to be subtracted
+        Raises:
+            DataError: if other is not a particles object
+        Returns:
+            differences between caller and other values (self-other)
+        """
+
+        if isinstance(other, type(self)):
+            # always create new particles, since otherwise c = a - b changes a as well!
+            return self.__new_like(self.pos - other.pos,self.vel - other.vel)
+        else:
+            raise DataError("Type error: cannot subtract %s from %s" % (type(other),type(self)))
+
+    def __iadd__(self, other):
+        """
+        Overloading the in-place addition operator for particles types (positions and velocities only)
+
+        Args:
+            other: particles object to be added
+        Raises:
+            DataError: if other is not a particles object
+        Returns:
+            caller, containing self+other
+        """
+
+        if isinstance(other, type(self)):
+            self.pos += other.pos
+            self.vel += other.vel
+            return self
+        else:
+            raise DataError("Type error: cannot add %s to %s" % (type(other),type(self)))
+
+    def __isub__(self, other):
+        """
+        Overloading the in-place subtraction operator for particles types (positions and velocities only)
+
+        Args:
+            other: particles object to be subtracted
+        Raises:
+            DataError: if other is not a particles object
+        Returns:
+            caller, containing self-other
+        """
+
+        if isinstance(other, type(self)):
+            self.pos -= other.pos
+            self.vel -= other.vel
+            return self
+        else:
+            raise DataError("Type error: cannot subtract %s from %s" % (type(other),type(self)))
+
+    def __imul__(self, other):
+        """
+        Overloading the in-place multiply by factor operator for particles types (positions and velocities only)
+
+        Args:
+            other: float factor
+        Raises:
+            DataError: is other is not a float
+        Returns:
+            caller, scaled by factor
+        """
+
+        self.pos *= other
+        self.vel *= other
+        return self
+
+    def axpy(self,a,x):
+        """
+        In-place update self += a*x for positions and velocities, without temporary objects
+
+        Args:
+            a: float factor
+            x: particles object
+        Raises:
+            DataError: if x is not a particles object
+        """
+
+        if isinstance(x, type(self)):
+            self.pos.axpy(a,x.pos)
+            self.vel.axpy(a,x.vel)
+        else:
+            raise DataError("Type error: cannot add multiple of %s to %s" % (type(x),type(self)))
+
+    def copy_from(self,other):
+        """
+        Copies all values of other (including charges and masses) into the caller
+
+        Args:
+            other: particles object
+        Raises:
+            DataError: if other is not a particles object
+        """
+
+        if isinstance(other, type(self)):
+            self.pos.copy_from(other.pos)
+            self.vel.copy_from(other.vel)
+            self.q[:] = other.q
+            self.m[:] = other.m
+        else:
+            raise DataError("Type error: cannot copy %s to %s" % (type(other),type(self)))
+
+    def __abs__(self):
+        """
+        Overloading the abs operator for particles types
+
+        Returns:
+            absolute maximum of abs(pos) and abs(vel) for all particles
+        """
+        return max(abs(self.pos),abs(self.vel))
+
+
+class acceleration(vectors):
+    """
+    Acceleration data type for particles in 3 dimensions
+    """
+
+    __slots__ = ()
+
+    def scaled_type(self):
+        """
+        Interpret float factor as time (time x acceleration = velocity)
+        """
+        return particles.velocity
+
+
+class fields():
+    """
+    Field data type for 3 dimensions, stored as structure of arrays
+
+    Drop-in replacement for particles.fields: electric and magnetic fields are arrays of shape (nparts,3).
+
+    Attributes:
+        elec: contains the electric field
+        magn: contains the magnetic field
+    """
+
+    __slots__ = ('elec','magn')
+
+    class electric(vectors):
+        """
+        Electric field data type in 3 dimensions
+        """
+
+        __slots__ = ()
+
+    class magnetic(vectors):
+        """
+        Magnetic field data type in 3 dimensions
+        """
+
+        __slots__ = ()
+
+    def __init__(self,init=None,vals=(None,None)):
+        """
+        Initialization routine
+
+        Args:
+            init: can either be a number or another fields object
+            vals: initial tuple of values for electric and magnetic (default: (None,None))
+        Raises:
+            DataError: if init is none of the types above
+        """
+
+        # if init is another fields object, copy all values (init by copy)
+        if isinstance(init,type(self)):
+            self.elec = fields.electric(init.elec)
+            self.magn = fields.magnetic(init.magn)
+        # if init is a number, create fields object and pick the corresponding initial values
+        elif isinstance(init,int):
+            self.elec = fields.electric(init,val=vals[0])
+            self.magn = fields.magnetic(init,val=vals[1])
+        # something is wrong, if none of the ones above hit
+        else:
+            raise DataError('something went wrong during %s initialization' % type(self))
+
+    def __new_like(self,elec,magn):
+        """
+        Helper routine to create a fields object from electric and magnetic field
+
+        Args:
+            elec: electric object
+            magn: magnetic object
+        Returns:
+            fields object
+        """
+        f = fields.__new__(type(self))
+        f.elec = elec
+        f.magn = magn
+        return f
+
+    def __add__(self, other):
+        """
+        Overloading the addition operator for fields types
+
+        Args:
+            other: fields object to be added
+        Raises:
+            DataError: if other is not a fields object
+        Returns:
+            sum of caller and other values (self+other)
+        """
+
+        if isinstance(other, type(self)):
+            # always create new fields, since otherwise c = a + b changes a as well!
+            return self.__new_like(self.elec + other.elec,self.magn + other.magn)
+        else:
+            raise DataError("Type error: cannot add %s to %s" % (type(other),type(self)))
+
+    def __sub__(self, other):
+        """
+        Overloading the subtraction operator for fields types
+
+        Args:
+            other: fields object to be subtracted
+        Raises:
+            DataError: if other is not a fields object
+        Returns:
+            differences between caller and other values (self-other)
+        """
+
+        if isinstance(other, type(self)):
+            # always create new fields, since otherwise c = a - b changes a as well!
+            return self.__new_like(self.elec - other.elec,self.magn - other.magn)
+        else:
+            raise DataError("Type error: cannot subtract %s from %s" % (type(other),type(self)))
+
+    def __iadd__(self, other):
+        """
+        Overloading the in-place addition operator for fields types
+
+        Args:
+            other: fields object to be added
+        Raises:
+            DataError: if other is not a fields object
+        Returns:
+            caller, containing self+other
+        """
+
+        if isinstance(other, type(self)):
+            self.elec += other.elec
+            self.magn += other.magn
+            return self
+        else:
+            raise DataError("Type error: cannot add %s to %s" % (type(other),type(self)))
+
+    def __isub__(self, other):
+        """
+        Overloading the in-place subtraction operator for fields types
+
+        Args:
+            other: fields object to be subtracted
+        Raises:
+            DataError: if other is not a fields object
+        Returns:
+            caller, containing self-other
+        """
+
+        if isinstance(other, type(self)):
+            self.elec -= other.elec
+            self.magn -= other.magn
+            return self
+        else:
+            raise DataError("Type error: cannot subtract %s from %s" % (type(other),type(self)))
+
+    def __imul__(self, other):
+        """
+        Overloading the in-place multiply by factor operator for fields types
+
+        Args:
+            other: float factor
+        Raises:
+            DataError: is other is not a float
+        Returns:
+            caller, scaled by factor
+        """
+
+        self.elec *= other
+        self.magn *= other
+        return self
+
+    def axpy(self,a,x):
+        """
+        In-place update self += a*x, without temporary objects
+
+        Args:
+            a: float factor
+            x: fields object
+        Raises:
+            DataError: if x is not a fields object
+        """
+
+        if isinstance(x, type(self)):
+            self.elec.axpy(a,x.elec)
+            self.magn.axpy(a,x.magn)
+        else:
+            raise DataError("Type error: cannot add multiple of %s to %s" % (type(x),type(self)))
+
+    def copy_from(self,other):
+        """
+        Copies the values of other into the caller (no new object is created)
+
+        Args:
+            other: fields object
+        Raises:
+            DataError: if other is not a fields object
+        """
+
+        if isinstance(other, type(self)):
+            self.elec.copy_from(other.elec)
+            self.magn.copy_from(other.magn)
+        else:
+            raise DataError("Type error: cannot copy %s to %s" % (type(other),type(self)))
@@ -52,38 +52,6 @@ def sdc_step(S):
     return L.uend
 
 
-def adaptive_sdc_step(S):
-
-    import pySDC.Plugins.apdativity as AD
-
-    assert isinstance(S,stepclass.step)
-    assert len(S.levels) == 1
-
-    L = S.levels[0]
-
-    S.iter = 0
-
-    AD.adaptive_predict(L.sweep,S)
-
-    converged = False
-
-    while not converged:
-
-        S.iter += 1
-
-        L.stats.add_iter_stats()
-        L.sweep.update_nodes()
-        L.sweep.compute_residual()
-
-        converged = check_convergence(S)
-
-    L.sweep.compute_end_point()
-    # print('Niter at time %8.4f: %s' %(S.time+S.dt,S.iter))
-
-    return L.uend
-
-
-
 def mlsdc_step(S):
 
     assert isinstance(S,stepclass.step)
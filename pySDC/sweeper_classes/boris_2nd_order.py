@@ -1,7 +1,30 @@
 from __future__ import division
 import numpy as np
 
-from pySDC.Sweeper import sweeper
+from pySDC.Sweeper import sweeper, axpy
+from pySDC.Preconditioners import get_Qd
+
+
+def axpy2(y,a,b,x):
+    """
+    Helper routine for y += a*(b*x) in the sweeper (e.g. positions from accelerations), in place if the data type
+    provides axpy (e.g. particles_soa)
+
+    Data types without axpy (e.g. particles) use their operators instead, each float factor changes the type there.
+
+    Args:
+        y: data type object to be updated
+        a: float factor
+        b: float factor
+        x: data type object to be added
+    Returns:
+        the updated y (a new object, if the data type has no in-place operations)
+    """
+    if hasattr(y,'axpy'):
+        y.axpy(a*b,x)
+    else:
+        y += a*(b*x)
+    return y
 
 
 class boris_2nd_order(sweeper):
@@ -15,6 +38,7 @@ class boris_2nd_order(sweeper):
         SQ: node-to-node collocation matrix (second order)
         ST: node-to-node trapezoidal matrix
         Sx: node-to-node Euler half-step for position update
+        __forces: forces (build_f) at tleft and at the nodes, None if not computed for the current values yet
     """
 
     def __init__(self,coll):
@@ -31,6 +55,9 @@ class boris_2nd_order(sweeper):
         # S- and SQ-matrices (derived from Q) and Sx- and ST-matrices for the integrator
         [self.S, self.ST, self.SQ, self.Sx, self.QQ] = self.__get_Qd(coll)
 
+        # no forces computed yet
+        self.__forces = [None] * (coll.num_nodes+1)
+
     def __get_Qd(self,coll):
         """
         Compute LU decomposition of Q^T
@@ -44,14 +71,9 @@ class boris_2nd_order(sweeper):
             Sx: node-to-node Euler half-step for position update
         """
 
-        # set implicit and explicit Euler matrices
-        QI = np.zeros(np.shape(coll.Qmat))
-        QE = np.zeros(np.shape(coll.Qmat))
-        for m in np.arange(coll.num_nodes+1):
-            QI[m, 1:m+1] = coll.delta_m[0:m]
-            QE[m, 0:m] = coll.delta_m[0:m]
-        # trapezoidal rule
-        QT = 1/2*(QI+QE)
+        # explicit Euler matrix and trapezoidal rule
+        QE = get_Qd('EE',coll)
+        QT = get_Qd('CN',coll)
         # Qx as in the paper
         Qx = np.dot(QE,QT) + 1/2*QE*QE
 
@@ -76,6 +98,29 @@ class boris_2nd_order(sweeper):
         return [S,ST,SQ,Sx,QQ]
 
 
+    def __get_force(self,j):
+        """
+        Returns the force at node j, build_f is called only once per node and values
+
+        Args:
+            j: index of the node (0 for tleft)
+        Returns:
+            RHS of type acceleration
+        """
+        L = self.level
+        if self.__forces[j] is None:
+            self.__forces[j] = L.prob.build_f(L.f[j],L.u[j],L.time+L.dt*self.coll.nodes[j-1])
+        return self.__forces[j]
+
+
+    def invalidate_integral(self):
+        """
+        Marks the cached integral and all cached forces as outdated (to be called whenever L.f or L.u change)
+        """
+        super(boris_2nd_order,self).invalidate_integral()
+        self.__forces = [None] * (self.coll.num_nodes+1)
+
+
     def update_nodes(self):
         """
         Update the u- and f-values at the collocation nodes -> corresponds to a single sweep over all nodes
@@ -101,12 +146,12 @@ class boris_2nd_order(sweeper):
         # this corresponds to SF(u^k) - SdF(u^k) + tau (note: have integrals in pos and vel!)
         for m in range(M):
             for j in range(M+1):
-                # build RHS from f-terms (containing the E field) and the B field
-                f = P.build_f(L.f[j],L.u[j],L.time+L.dt*self.coll.nodes[j-1])
+                # RHS from f-terms (containing the E field) and the B field
+                f = self.__get_force(j)
                 # add SQF(u^k) - SxF(u^k) for the position
-                integral[m].pos += L.dt*(L.dt*(self.SQ[m+1,j]-self.Sx[m+1,j])*f)
+                integral[m].pos = axpy2(integral[m].pos,L.dt,L.dt*(self.SQ[m+1,j]-self.Sx[m+1,j]),f)
                 # add SF(u^k) - STF(u^k) for the velocity
-                integral[m].vel += L.dt*(self.S[m+1,j]-self.ST[m+1,j])*f
+                integral[m].vel = axpy(integral[m].vel,L.dt*(self.S[m+1,j]-self.ST[m+1,j]),f)
             # add tau if associated
             if L.tau is not None:
                 integral[m] += L.tau[m]
@@ -120,12 +165,13 @@ class boris_2nd_order(sweeper):
             # build rhs, consisting of the known values from above and new values from previous nodes (at k+1)
             tmp = P.dtype_u(integral[m])
             for j in range(m+1):
-                # build RHS from f-terms (containing the E field) and the B field
-                f = P.build_f(L.f[j],L.u[j],L.time+L.dt*self.coll.nodes[j-1])
+                # RHS from f-terms (containing the E field) and the B field (new values for j > 0)
+                f = self.__get_force(j)
                 # add SxF(u^{k+1})
-                tmp.pos += L.dt*(L.dt*self.Sx[m+1,j]*f)
+                tmp.pos = axpy2(tmp.pos,L.dt,L.dt*self.Sx[m+1,j],f)
             # add pos at previous node + dt*v0
-            tmp.pos += L.u[m].pos + L.dt*self.coll.delta_m[m]*L.u[0].vel
+            tmp.pos += L.u[m].pos
+            tmp.pos = axpy(tmp.pos,L.dt*self.coll.delta_m[m],L.u[0].vel)
             # set new position, is explicit
             L.u[m+1].pos = tmp.pos
 
@@ -137,6 +183,12 @@ class boris_2nd_order(sweeper):
             # do the boris scheme
             L.u[m+1].vel = P.boris_solver(ck,L.dt*self.coll.delta_m[m],L.f[m],L.f[m+1],L.u[m])
 
+            # force at this node has to be rebuilt with the new values
+            self.__forces[m+1] = None
+
+        # new values, cached integral is outdated (the forces are up to date already)
+        super(boris_2nd_order,self).invalidate_integral()
+
         # indicate presence of new values at this level
         L.status.updated = True
 
@@ -165,9 +217,35 @@ class boris_2nd_order(sweeper):
 
             # integrate RHS over all collocation nodes, RHS is here only f(x,v)!
             for j in range(1,self.coll.num_nodes+1):
-                f = P.build_f(L.f[j],L.u[j],L.time+L.dt*self.coll.nodes[j-1])
-                p[-1].pos += L.dt*(L.dt*self.QQ[m,j]*f) + L.dt*self.coll.Qmat[m,j]*L.u[0].vel
-                p[-1].vel += L.dt*self.coll.Qmat[m,j]*f
+                f = self.__get_force(j)
+                p[-1].pos = axpy2(p[-1].pos,L.dt,L.dt*self.QQ[m,j],f)
+                p[-1].pos = axpy(p[-1].pos,L.dt*self.coll.Qmat[m,j],L.u[0].vel)
+                p[-1].vel = axpy(p[-1].vel,L.dt*self.coll.Qmat[m,j],f)
+
+        return p
+
+
+    def integrate_end(self):
+        """
+        Integrates the right-hand side over the full interval (using coll.weights)
+
+        Returns:
+            dtype_u: containing the integral as values
+        """
+
+        # get current level and problem description
+        L = self.level
+        P = L.prob
+
+        p = P.dtype_u(P.init,vals=(0,0,0,0))
+
+        # compute q*Q on the fly.. could be done a priori (fixme)
+        qQ = np.dot(self.coll.weights,self.coll.Qmat[1:,1:])
+        for m in range(self.coll.num_nodes):
+            f = self.__get_force(m+1)
+            p.pos = axpy2(p.pos,L.dt,L.dt*qQ[m],f)
+            p.pos = axpy(p.pos,L.dt*self.coll.weights[m],L.u[0].vel)
+            p.vel = axpy(p.vel,L.dt*self.coll.weights[m],f)
 
         return p
 
@@ -189,14 +267,9 @@ class boris_2nd_order(sweeper):
             # a copy is sufficient
             L.uend = P.dtype_u(L.u[-1])
         else:
-            # start with u0 and add integral over the full interval (using coll.weights)
+            # start with u0 and add integral over the full interval
             L.uend = P.dtype_u(L.u[0])
-            # compute q*Q on the fly.. could be done a priori (fixme)
-            qQ = np.dot(self.coll.weights,self.coll.Qmat[1:,1:])
-            for m in range(self.coll.num_nodes):
-                f = P.build_f(L.f[m+1],L.u[m+1],L.time+L.dt*self.coll.nodes[m])
-                L.uend.pos += L.dt*(L.dt*qQ[m]*f) + L.dt*self.coll.weights[m]*L.u[0].vel
-                L.uend.vel += L.dt*self.coll.weights[m]*f
+            L.uend += self.integrate_end()
             # add up tau correction of the full interval (last entry)
             if L.tau is not None:
                 L.uend += L.tau[-1]
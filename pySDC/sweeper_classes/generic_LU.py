@@ -1,7 +1,8 @@
-import scipy.linalg as LA
 import numpy as np
 
-from pySDC.Sweeper import sweeper
+from pySDC.Sweeper import sweeper, axpy
+from pySDC.NodeStorage import is_ndarray_backed, stack_nodes, wrap_array
+from pySDC.Preconditioners import get_Qd
 
 
 
@@ -11,8 +12,11 @@ class generic_LU(sweeper):
 
     LU sweeper using LU decomposition of the Q matrix for the base integrator
 
+    For ndarray-backed data types (e.g. mesh), integrate and update_nodes work on the stacked node values and use
+    matrix products instead of loops over the nodes. Other data types (e.g. fenics_mesh) use the loops.
+
     Attributes:
-        Qd: U^T of Q^T = L*U
+        QI: implicit integration matrix (default: U^T of Q^T = L*U)
     """
 
     def __init__(self,coll):
@@ -26,28 +30,9 @@ class generic_LU(sweeper):
         # call parent's initialization routine
         super(generic_LU,self).__init__(coll)
 
-        # LU integration matrix
-        self.Qd = self.__get_Qd(coll)
-        pass
-
-    def __get_Qd(self,coll):
-        """
-        Compute LU decomposition of Q^T
+        # LU integration matrix (unless chosen otherwise via the level parameters)
+        self.QI = get_Qd('LU',coll)
 
-        Args:
-            coll: collocation object
-        Returns:
-            Qd: U^T of Q^T = L*U
-        """
-
-        # strip Qmat by initial value u0
-        QT = coll.Qmat[1:,1:].T
-        # do LU decomposition of QT
-        [P,L,U] = LA.lu(QT,overwrite_a=True)
-        # enrich QT by initial value u0
-        Qd = np.zeros(np.shape(coll.Qmat))
-        Qd[1:,1:] = U.T
-        return Qd
 
     def integrate(self):
         """
@@ -61,6 +46,11 @@ class generic_LU(sweeper):
         L = self.level
         P = L.prob
 
+        # fast path: dt*Q*F as a single matrix product over all nodes
+        if self.__vectorized:
+            QF = L.dt*np.tensordot(self.coll.Qmat[1:,:],stack_nodes(L.f),axes=1)
+            return [wrap_array(P.dtype_u,P.init,QF[m]) for m in range(self.coll.num_nodes)]
+
         me = []
 
         # integrate RHS over all collocation nodes
@@ -68,7 +58,26 @@ class generic_LU(sweeper):
             # new instance of dtype_u, initialize values with 0
             me.append(P.dtype_u(P.init,val=0))
             for j in range(1,self.coll.num_nodes+1):
-                me[-1] += L.dt*self.coll.Qmat[m,j]*L.f[j]
+                me[-1] = axpy(me[-1],L.dt*self.coll.Qmat[m,j],L.f[j])
+
+        return me
+
+
+    def integrate_end(self):
+        """
+        Integrates the right-hand side over the full interval (using coll.weights)
+
+        Returns:
+            dtype_u: containing the integral as values
+        """
+
+        # get current level and problem description
+        L = self.level
+        P = L.prob
+
+        me = P.dtype_u(P.init,val=0)
+        for m in range(self.coll.num_nodes):
+            me = axpy(me,L.dt*self.coll.weights[m],L.f[m+1])
 
         return me
 
@@ -91,19 +100,24 @@ class generic_LU(sweeper):
         # get number of collocation nodes for easier access
         M = self.coll.num_nodes
 
+        # fast path for ndarray-backed data types
+        if self.__vectorized:
+            self.__update_nodes_vectorized()
+            return None
+
         # gather all terms which are known already (e.g. from the previous iteration)
-        # this corresponds to u0 + QF(u^k) - QdF(u^k) + tau
+        # this corresponds to u0 + QF(u^k) - QIF(u^k) + tau
 
         # get QF(u^k)
-        integral = self.integrate()
+        integral = self.get_integral()
         for m in range(M):
+            # add initial value (new object, the cached integral is not touched)
+            integral[m] = integral[m] + L.u[0]
 
-            # get -QdF(u^k)_m
-            for j in range(self.coll.num_nodes):
-                integral[m] -= L.dt*self.Qd[m+1,j+1]*L.f[j+1]
+            # get -QIF(u^k)_m
+            for j in range(M+1):
+                integral[m] = axpy(integral[m],-L.dt*self.QI[m+1,j],L.f[j])
 
-            # add initial value
-            integral[m] += L.u[0]
             # add tau if associated
             if L.tau is not None:
                 integral[m] += L.tau[m]
@@ -113,19 +127,74 @@ class generic_LU(sweeper):
             # build rhs, consisting of the known values from above and new values from previous nodes (at k+1)
             rhs = P.dtype_u(integral[m])
             for j in range(m+1):
-                rhs += L.dt*self.Qd[m+1,j]*L.f[j]
+                rhs = axpy(rhs,L.dt*self.QI[m+1,j],L.f[j])
 
-            # implicit solve with prefactor stemming from the diagonal of Qd
-            L.u[m+1] = P.solve_system(rhs,L.dt*self.Qd[m+1,m+1],L.u[m+1],L.time+L.dt*self.coll.nodes[m])
+            # implicit solve with prefactor stemming from the diagonal of QI
+            L.u[m+1] = P.solve_system(rhs,L.dt*self.QI[m+1,m+1],L.u[m+1],L.time+L.dt*self.coll.nodes[m])
             # update function values
             L.f[m+1] = P.eval_f(L.u[m+1],L.time+L.dt*self.coll.nodes[m])
 
+        # new values, cached integral is outdated
+        self.invalidate_integral()
+
         # indicate presence of new values at this level
         L.status.updated = True
 
         return None
 
 
+    @property
+    def __vectorized(self):
+        """
+        Checks whether the data types of the level are ndarray-backed (needed for the fast path)
+
+        Returns:
+            True if u and f have ndarray values
+        """
+        L = self.level
+        return is_ndarray_backed(L.u[0],['values']) and is_ndarray_backed(L.f[0],['values'])
+
+
+    def __update_nodes_vectorized(self):
+        """
+        Same as update_nodes, but on the stacked node values: all known terms are computed by matrix products at once,
+        only the (inherently sequential) sweep over the nodes remains a loop
+        """
+
+        # get current level and problem description
+        L = self.level
+        P = L.prob
+
+        M = self.coll.num_nodes
+
+        # stacked values at tleft and all nodes, shape (M+1,*shape)
+        F = stack_nodes(L.f)
+
+        # u0 + QF(u^k) - QIF(u^k) + tau, shape (M,*shape)
+        integral = stack_nodes(self.get_integral()) - L.dt*np.tensordot(self.QI[1:,:],F,axes=1)
+        integral += L.u[0].values
+        if L.tau is not None:
+            integral += stack_nodes(L.tau[:M])
+
+        # do the sweep
+        for m in range(0,M):
+            # add new values from previous nodes (at k+1)
+            rhs = integral[m] + L.dt*np.tensordot(self.QI[m+1,:m+1],F[:m+1],axes=1)
+
+            # implicit solve with prefactor stemming from the diagonal of QI
+            L.u[m+1] = P.solve_system(wrap_array(P.dtype_u,P.init,rhs),L.dt*self.QI[m+1,m+1],L.u[m+1],
+                                      L.time+L.dt*self.coll.nodes[m])
+            # update function values (also in the stacked values, unless these are the level's storage anyway)
+            L.f[m+1] = P.eval_f(L.u[m+1],L.time+L.dt*self.coll.nodes[m])
+            F[m+1] = L.f[m+1].values
+
+        # new values, cached integral is outdated
+        self.invalidate_integral()
+
+        # indicate presence of new values at this level
+        L.status.updated = True
+
+
     def compute_end_point(self):
         """
         Compute u at the right point of the interval
@@ -143,10 +212,9 @@ class generic_LU(sweeper):
             # a copy is sufficient
             L.uend = P.dtype_u(L.u[-1])
         else:
-            # start with u0 and add integral over the full interval (using coll.weights)
+            # start with u0 and add integral over the full interval
             L.uend = P.dtype_u(L.u[0])
-            for m in range(self.coll.num_nodes):
-                L.uend += L.dt*self.coll.weights[m]*L.f[m+1]
+            L.uend += self.integrate_end()
             # add up tau correction of the full interval (last entry)
             if L.tau is not None:
                 L.uend += L.tau[-1]
@@ -1,5 +1,7 @@
 import numpy as np
-from pySDC.Sweeper import sweeper
+from pySDC.Sweeper import sweeper, axpy
+from pySDC.NodeStorage import is_ndarray_backed, stack_nodes, wrap_array
+from pySDC.Preconditioners import get_Qd
 
 class imex_1st_order(sweeper):
     """
@@ -7,9 +9,12 @@ class imex_1st_order(sweeper):
 
     First-order IMEX sweeper using implicit/explicit Euler as base integrator
 
+    For ndarray-backed data types (e.g. mesh), integrate and update_nodes work on the stacked node values and use
+    matrix products instead of loops over the nodes. Other data types (e.g. fenics_mesh) use the loops.
+
     Attributes:
-        QI: implicit Euler integration matrix
-        QE: explicit Euler integration matrix
+        QI: implicit integration matrix (default: implicit Euler)
+        QE: explicit integration matrix (default: explicit Euler)
     """
 
     def __init__(self,coll):
@@ -23,26 +28,9 @@ class imex_1st_order(sweeper):
         # call parent's initialization routine
         super(imex_1st_order,self).__init__(coll)
 
-        # IMEX integration matrices
-        [self.QI, self.QE] = self.__get_Qd
-
-
-    @property
-    def __get_Qd(self):
-        """
-        Sets the integration matrices QI and QE for the IMEX sweeper
-
-        Returns:
-            QI: implicit Euler matrix, will also act on u0
-            QE: explicit Euler matrix, will also act on u0
-        """
-        QI = np.zeros(np.shape(self.coll.Qmat))
-        QE = np.zeros(np.shape(self.coll.Qmat))
-        for m in range(self.coll.num_nodes + 1):
-            QI[m, 1:m+1] = self.coll.delta_m[0:m]
-            QE[m, 0:m] = self.coll.delta_m[0:m]
-
-        return QI, QE
+        # IMEX integration matrices (default: implicit/explicit Euler, can be chosen via the level parameters)
+        self.QI = get_Qd('IE',coll)
+        self.QE = get_Qd('EE',coll)
 
 
     def integrate(self):
@@ -57,6 +45,12 @@ class imex_1st_order(sweeper):
         L = self.level
         P = L.prob
 
+        # fast path: dt*Q*F as a single matrix product over all nodes
+        if self.__vectorized:
+            F = stack_nodes(L.f,'impl.values') + stack_nodes(L.f,'expl.values')
+            QF = L.dt*np.tensordot(self.coll.Qmat[1:,:],F,axes=1)
+            return [wrap_array(P.dtype_u,P.init,QF[m]) for m in range(self.coll.num_nodes)]
+
         me = []
 
         # integrate RHS over all collocation nodes
@@ -64,7 +58,28 @@ class imex_1st_order(sweeper):
             # new instance of dtype_u, initialize values with 0
             me.append(P.dtype_u(P.init,val=0))
             for j in range(1,self.coll.num_nodes+1):
-                me[-1] += L.dt*self.coll.Qmat[m,j]*(L.f[j].impl + L.f[j].expl)
+                me[-1] = axpy(me[-1],L.dt*self.coll.Qmat[m,j],L.f[j].impl)
+                me[-1] = axpy(me[-1],L.dt*self.coll.Qmat[m,j],L.f[j].expl)
+
+        return me
+
+
+    def integrate_end(self):
+        """
+        Integrates the right-hand side (here impl + expl) over the full interval (using coll.weights)
+
+        Returns:
+            dtype_u: containing the integral as values
+        """
+
+        # get current level and problem description
+        L = self.level
+        P = L.prob
+
+        me = P.dtype_u(P.init,val=0)
+        for m in range(self.coll.num_nodes):
+            me = axpy(me,L.dt*self.coll.weights[m],L.f[m+1].impl)
+            me = axpy(me,L.dt*self.coll.weights[m],L.f[m+1].expl)
 
         return me
 
@@ -87,17 +102,23 @@ class imex_1st_order(sweeper):
         # get number of collocation nodes for easier access
         M = self.coll.num_nodes
 
+        # fast path for ndarray-backed data types
+        if self.__vectorized:
+            self.__update_nodes_vectorized()
+            return None
+
         # gather all terms which are known already (e.g. from the previous iteration)
         # this corresponds to u0 + QF(u^k) - QIFI(u^k) - QEFE(u^k) + tau
 
          # get QF(u^k)
-        integral = self.integrate()
+        integral = self.get_integral()
         for m in range(M):
+            # add initial value (new object, the cached integral is not touched)
+            integral[m] = integral[m] + L.u[0]
             # subtract QIFI(u^k)_m - QEFE(u^k)_m
             for j in range(M+1):
-                integral[m] -= L.dt*(self.QI[m+1,j]*L.f[j].impl + self.QE[m+1,j]*L.f[j].expl)
-            # add initial value
-            integral[m] += L.u[0]
+                integral[m] = axpy(integral[m],-L.dt*self.QI[m+1,j],L.f[j].impl)
+                integral[m] = axpy(integral[m],-L.dt*self.QE[m+1,j],L.f[j].expl)
             # add tau if associated
             if L.tau is not None:
                 integral[m] += L.tau[m]
@@ -107,19 +128,79 @@ class imex_1st_order(sweeper):
             # build rhs, consisting of the known values from above and new values from previous nodes (at k+1)
             rhs = P.dtype_u(integral[m])
             for j in range(m+1):
-                rhs += L.dt*(self.QI[m+1,j]*L.f[j].impl + self.QE[m+1,j]*L.f[j].expl)
+                rhs = axpy(rhs,L.dt*self.QI[m+1,j],L.f[j].impl)
+                rhs = axpy(rhs,L.dt*self.QE[m+1,j],L.f[j].expl)
 
             # implicit solve with prefactor stemming from QI
             L.u[m+1] = P.solve_system(rhs,L.dt*self.QI[m+1,m+1],L.u[m+1],L.time+L.dt*self.coll.nodes[m])
             # update function values
             L.f[m+1] = P.eval_f(L.u[m+1],L.time+L.dt*self.coll.nodes[m])
 
+        # new values, cached integral is outdated
+        self.invalidate_integral()
+
         # indicate presence of new values at this level
         L.status.updated = True
 
         return None
 
 
+    @property
+    def __vectorized(self):
+        """
+        Checks whether the data types of the level are ndarray-backed (needed for the fast path)
+
+        Returns:
+            True if u and both parts of f have ndarray values
+        """
+        L = self.level
+        return is_ndarray_backed(L.u[0],['values']) and is_ndarray_backed(L.f[0],['impl.values','expl.values'])
+
+
+    def __update_nodes_vectorized(self):
+        """
+        Same as update_nodes, but on the stacked node values: all known terms are computed by matrix products at once,
+        only the (inherently sequential) sweep over the nodes remains a loop
+        """
+
+        # get current level and problem description
+        L = self.level
+        P = L.prob
+
+        M = self.coll.num_nodes
+
+        # stacked values at tleft and all nodes, shape (M+1,*shape)
+        Fi = stack_nodes(L.f,'impl.values')
+        Fe = stack_nodes(L.f,'expl.values')
+
+        # u0 + QF(u^k) - QIFI(u^k) - QEFE(u^k) + tau, shape (M,*shape)
+        integral = stack_nodes(self.get_integral()) - L.dt*(np.tensordot(self.QI[1:,:],Fi,axes=1) +
+                                                            np.tensordot(self.QE[1:,:],Fe,axes=1))
+        integral += L.u[0].values
+        if L.tau is not None:
+            integral += stack_nodes(L.tau[:M])
+
+        # do the sweep
+        for m in range(0,M):
+            # add new values from previous nodes (at k+1)
+            rhs = integral[m] + L.dt*(np.tensordot(self.QI[m+1,:m+1],Fi[:m+1],axes=1) +
+                                      np.tensordot(self.QE[m+1,:m+1],Fe[:m+1],axes=1))
+
+            # implicit solve with prefactor stemming from QI
+            L.u[m+1] = P.solve_system(wrap_array(P.dtype_u,P.init,rhs),L.dt*self.QI[m+1,m+1],L.u[m+1],
+                                      L.time+L.dt*self.coll.nodes[m])
+            # update function values (also in the stacked values, unless these are the level's storage anyway)
+            L.f[m+1] = P.eval_f(L.u[m+1],L.time+L.dt*self.coll.nodes[m])
+            Fi[m+1] = L.f[m+1].impl.values
+            Fe[m+1] = L.f[m+1].expl.values
+
+        # new values, cached integral is outdated
+        self.invalidate_integral()
+
+        # indicate presence of new values at this level
+        L.status.updated = True
+
+
     def compute_end_point(self):
         """
         Compute u at the right point of the interval
@@ -137,10 +218,9 @@ class imex_1st_order(sweeper):
             # a copy is sufficient
             L.uend = P.dtype_u(L.u[-1])
         else:
-            # start with u0 and add integral over the full interval (using coll.weights)
+            # start with u0 and add integral over the full interval
             L.uend = P.dtype_u(L.u[0])
-            for m in range(self.coll.num_nodes):
-                L.uend += L.dt*self.coll.weights[m]*(L.f[m+1].impl + L.f[m+1].expl)
+            L.uend += self.integrate_end()
             # add up tau correction of the full interval (last entry)
             if L.tau is not None:
                 L.uend += L.tau[-1]
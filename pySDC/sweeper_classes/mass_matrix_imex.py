@@ -1,6 +1,6 @@
-import numpy as np
-import scipy.linalg as LA
 from pySDC.sweeper_classes import imex_1st_order
+from pySDC.Preconditioners import get_Qd
+from pySDC.Sweeper import axpy
 
 class mass_matrix_imex(imex_1st_order.imex_1st_order):
     """
@@ -9,8 +9,8 @@ class mass_matrix_imex(imex_1st_order.imex_1st_order):
     First-order IMEX sweeper, now with mass matrix and LU decomposition for the implicit term
 
     Attributes:
-        QI: St. Martin's trick matrix
-        QE: explicit Euler integration matrix
+        QI: implicit integration matrix (default: St. Martin's trick)
+        QE: explicit integration matrix (default: explicit Euler)
     """
 
     def __init__(self,coll):
@@ -24,36 +24,9 @@ class mass_matrix_imex(imex_1st_order.imex_1st_order):
         # call parent's initialization routine
         super(mass_matrix_imex,self).__init__(coll)
 
-        # IMEX integration matrices
-        [self.QI, self.QE] = self.__get_Qd
-
-
-    @property
-    def __get_Qd(self):
-        """
-        Sets the integration matrices QI and QE for the IMEX sweeper
-
-        Returns:
-            QI: St. Martin's trick, use LU decomposition
-            QE: explicit Euler matrix, will also act on u0
-        """
-        # QI = np.zeros(np.shape(self.coll.Qmat))
-        QE = np.zeros(np.shape(self.coll.Qmat))
-        for m in range(self.coll.num_nodes + 1):
-            # QI[m, 1:m+1] = self.coll.delta_m[0:m]
-            QE[m, 0:m] = self.coll.delta_m[0:m]
-
-        # This is for using LU decomposition
-        # strip Qmat by initial value u0
-        QT = self.coll.Qmat[1:,1:].T
-        # do LU decomposition of QT
-        [P,L,U] = LA.lu(QT,overwrite_a=True)
-        # enrich QT by initial value u0
-        Qd = np.zeros(np.shape(self.coll.Qmat))
-        Qd[1:,1:] = U.T
-        QI = Qd
-
-        return QI, QE
+        # IMEX integration matrices: LU trick for the implicit part (unless chosen otherwise via the level parameters)
+        self.QI = get_Qd('LU',coll)
+        self.QE = get_Qd('EE',coll)
 
 
     def update_nodes(self):
@@ -78,13 +51,14 @@ class mass_matrix_imex(imex_1st_order.imex_1st_order):
         # this corresponds to u0 + QF(u^k) - QIFI(u^k) - QEFE(u^k) + tau
 
          # get QF(u^k)
-        integral = self.integrate()
+        integral = self.get_integral()
         for m in range(M):
+            # add initial value (new object, the cached integral is not touched)
+            integral[m] = integral[m] + L.u[0]
             # subtract QIFI(u^k)_m + QEFE(u^k)_m
             for j in range(M+1):
-                integral[m] -= L.dt*(self.QI[m+1,j]*L.f[j].impl + self.QE[m+1,j]*L.f[j].expl)
-            # add initial value
-            integral[m] += L.u[0]
+                integral[m] = axpy(integral[m],-L.dt*self.QI[m+1,j],L.f[j].impl)
+                integral[m] = axpy(integral[m],-L.dt*self.QE[m+1,j],L.f[j].expl)
             # add tau if associated
             if L.tau is not None:
                 integral[m] += L.tau[m]
@@ -94,7 +68,8 @@ class mass_matrix_imex(imex_1st_order.imex_1st_order):
             # build rhs, consisting of the known values from above and new values from previous nodes (at k+1)
             rhs = P.dtype_u(integral[m])
             for j in range(m+1):
-                rhs += L.dt*(self.QI[m+1,j]*L.f[j].impl + self.QE[m+1,j]*L.f[j].expl)
+                rhs = axpy(rhs,L.dt*self.QI[m+1,j],L.f[j].impl)
+                rhs = axpy(rhs,L.dt*self.QE[m+1,j],L.f[j].expl)
             # apply mass matrix to rhs
             rhs = P.apply_mass_matrix(rhs)
 
@@ -103,6 +78,9 @@ class mass_matrix_imex(imex_1st_order.imex_1st_order):
             # update function values
             L.f[m+1] = P.eval_f(L.u[m+1],L.time+L.dt*self.coll.nodes[m])
 
+        # new values, cached integral is outdated
+        self.invalidate_integral()
+
         # indicate presence of new values at this level
         L.status.updated = True
 
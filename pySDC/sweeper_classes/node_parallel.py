@@ -0,0 +1,206 @@
+import os
+import multiprocessing as mproc
+import concurrent.futures as cf
+
+from pySDC.Sweeper import axpy
+from pySDC.sweeper_classes.generic_LU import generic_LU
+from pySDC.Preconditioners import get_Qd, is_diagonal
+
+
+# problem of a worker process of a process pool (set by init_worker, unused in all other processes)
+worker_problem = None
+
+
+def init_worker(P):
+    """
+    Initialization routine for the workers of a process pool, which keep their own copy of the problem
+
+    Args:
+        P: problem (passed on by fork, i.e. it does not need to be picklable)
+    """
+    global worker_problem
+    worker_problem = P
+
+
+def solve_node(P,rhs,factor,u0,t):
+    """
+    Task for a single node: implicit solve and evaluation of the right-hand side
+
+    Args:
+        P: problem (None in worker processes, these use their own copy)
+        rhs: right-hand side of the implicit system
+        factor: prefactor stemming from QI
+        u0: initial guess
+        t: time of the node
+    Returns:
+        new value and right-hand side at the node
+    """
+    if P is None:
+        P = worker_problem
+    u = P.solve_system(rhs,factor,u0,t)
+    return u, P.eval_f(u,t)
+
+
+def eval_node(P,u,t):
+    """
+    Task for a single node: evaluation of the right-hand side (after a batched solve)
+
+    Args:
+        P: problem (None in worker processes, these use their own copy)
+        u: value at the node
+        t: time of the node
+    Returns:
+        right-hand side at the node
+    """
+    if P is None:
+        P = worker_problem
+    return P.eval_f(u,t)
+
+
+class node_parallel(generic_LU):
+    """
+    Custom sweeper class, implements Sweeper.py
+
+    Node-parallel sweeper: with a diagonal QI, the implicit systems at the collocation nodes do not depend on each
+    other, so all solve_system and eval_f calls of a sweep are done concurrently on a pool of workers. If the problem
+    class provides solve_system_batch(rhs,factors,u0,t) (with lists over the nodes), this is called once instead.
+
+    The pool is chosen via the level parameters: node_pool ('thread' or 'process') and node_workers (default: one
+    per node). Threads are useful if the solver releases the GIL (e.g. sparse direct solvers), processes are forked
+    with a copy of the problem and need picklable data types. Each sweeper starts its pool with the first sweep, call
+    close when done to shut it down.
+
+    Attributes:
+        QI: diagonal implicit integration matrix (default: MIN)
+        pool: thread or process pool executor (None before the first sweep and after close)
+        __pool_type: 'thread' or 'process'
+        __workers: number of workers
+        __pid: id of the process which started the pool
+    """
+
+    def __init__(self,coll):
+        """
+        Initialization routine for the custom sweeper
+
+        Args:
+            coll: collocation object
+        """
+
+        # call parent's initialization routine
+        super(node_parallel,self).__init__(coll)
+
+        # optimized diagonal integration matrix (unless chosen otherwise via the level parameters)
+        self.QI = get_Qd('MIN',coll)
+
+        self.pool = None
+        self.__pool_type = None
+        self.__workers = None
+        self.__pid = None
+
+
+    def _set_level(self,L):
+        """
+        Gets the type and size of the pool from the level parameters
+
+        Args:
+            L: current level
+        """
+        assert L.params.node_pool in ['thread','process'], 'unknown pool type %s' % L.params.node_pool
+
+        self.__pool_type = L.params.node_pool
+        self.__workers = L.params.node_workers or self.coll.num_nodes
+
+
+    def close(self):
+        """
+        Routine to shut down the pool (a new one is started with the next sweep)
+        """
+
+        # a pool inherited by fork belongs to the parent process and is left alone
+        if self.pool is not None and self.__pid == os.getpid():
+            self.pool.shutdown()
+        self.pool = None
+
+
+    def __map(self,task,*args):
+        """
+        Runs a task for all nodes concurrently
+
+        Args:
+            task: solve_node or eval_node
+            args: lists of arguments of the task (without the problem), one entry per node
+        Returns:
+            list of results, one entry per node
+        """
+
+        L = self.level
+
+        # a pool cannot be used after a fork (e.g. by PFASST_parallel), so each process starts its own
+        if self.pool is None or self.__pid != os.getpid():
+            if self.__pool_type == 'thread':
+                self.pool = cf.ThreadPoolExecutor(max_workers=self.__workers)
+            else:
+                # fork is needed here, since problems are not necessarily picklable
+                self.pool = cf.ProcessPoolExecutor(max_workers=self.__workers,mp_context=mproc.get_context('fork'),
+                                                   initializer=init_worker,initargs=(L.prob,))
+            self.__pid = os.getpid()
+
+        # worker processes use their own copy of the problem
+        P = L.prob if self.__pool_type == 'thread' else None
+
+        return list(self.pool.map(task,[P]*len(args[0]),*args))
+
+
+    def update_nodes(self):
+        """
+        Update the u- and f-values at the collocation nodes -> corresponds to a single sweep over all nodes
+
+        Returns:
+            None
+        """
+
+        # get current level and problem description
+        L = self.level
+        P = L.prob
+
+        # only if the level has been touched before
+        assert L.status.unlocked
+        # only a diagonal QI decouples the nodes
+        assert is_diagonal(self.QI), 'node-parallel sweeps need a diagonal QI'
+
+        # get number of collocation nodes for easier access
+        M = self.coll.num_nodes
+
+        # gather all terms, these are known already (e.g. from the previous iteration)
+        # this corresponds to u0 + QF(u^k) - QIF(u^k) + tau, where QI only acts on the node itself
+        rhs = self.get_integral()
+        for m in range(M):
+            # add initial value (new object, the cached integral is not touched)
+            rhs[m] = rhs[m] + L.u[0]
+            rhs[m] = axpy(rhs[m],-L.dt*self.QI[m+1,m+1],L.f[m+1])
+            # add tau if associated
+            if L.tau is not None:
+                rhs[m] += L.tau[m]
+
+        factors = [L.dt*self.QI[m+1,m+1] for m in range(M)]
+        guesses = [L.u[m+1] for m in range(M)]
+        times = [L.time+L.dt*self.coll.nodes[m] for m in range(M)]
+
+        # solve for all nodes at once (batched or concurrently), then update function values
+        if hasattr(P,'solve_system_batch'):
+            unew = P.solve_system_batch(rhs,factors,guesses,times)
+            fnew = self.__map(eval_node,unew,times)
+        else:
+            unew, fnew = zip(*self.__map(solve_node,rhs,factors,guesses,times))
+
+        for m in range(M):
+            L.u[m+1] = unew[m]
+            L.f[m+1] = fnew[m]
+
+        # new values, cached integral is outdated
+        self.invalidate_integral()
+
+        # indicate presence of new values at this level
+        L.status.updated = True
+
+        return None
@@ -0,0 +1,163 @@
+from __future__ import division
+import numpy as np
+
+from pySDC.Transfer import transfer
+from pySDC.NodeStorage import array_paths, get_leaf, set_leaf
+
+
+# plans for the resampling along one axis, keyed by the number of points before and after the transfer
+plans = {}
+
+
+def get_plan(n_in,n_out):
+    """
+    Returns the plan for the resampling of n_in points to n_out points along one axis (computed only once per sizes)
+
+    Restriction truncates the Fourier modes, prolongation pads them with zeros. For an even number of points, the
+    Nyquist mode of the coarse mesh stands for the modes k and -k of the fine mesh, so it is split (prolongation) or
+    collected (restriction). This way, restriction after prolongation is the identity.
+
+    Args:
+        n_in: number of points before the transfer
+        n_out: number of points after the transfer
+    Returns:
+        number of modes to copy, index of the Nyquist mode (None if there is none), its factor and the overall scaling
+    """
+
+    key = (n_in,n_out)
+    if key not in plans:
+        nmodes = min(n_in,n_out)//2+1
+        nyquist = None
+        factor = 1
+        if n_out < n_in and n_out % 2 == 0:
+            nyquist = n_out//2
+            factor = 2
+        elif n_in < n_out and n_in % 2 == 0:
+            nyquist = n_in//2
+            factor = 1/2
+        plans[key] = (nmodes,nyquist,factor,n_out/n_in)
+
+    return plans[key]
+
+
+def resample_axis(values,n_out,axis):
+    """
+    Helper routine to resample a periodic array along one axis via FFT
+
+    Args:
+        values: real or complex array
+        n_out: number of points along axis after the transfer
+        axis: the axis
+    Returns:
+        array with n_out points along axis (all other dimensions unchanged)
+    """
+
+    # complex values: real and imaginary part separately (the transfer is linear)
+    if np.iscomplexobj(values):
+        return resample_axis(values.real,n_out,axis) + 1j*resample_axis(values.imag,n_out,axis)
+
+    nmodes,nyquist,factor,scale = get_plan(values.shape[axis],n_out)
+
+    coeffs = np.fft.rfft(values,axis=axis)
+
+    shape = list(coeffs.shape)
+    shape[axis] = n_out//2+1
+    new_coeffs = np.zeros(shape,dtype=coeffs.dtype)
+
+    idx = [slice(None)]*values.ndim
+    idx[axis] = slice(0,nmodes)
+    new_coeffs[tuple(idx)] = scale*coeffs[tuple(idx)]
+    if nyquist is not None:
+        idx[axis] = nyquist
+        new_coeffs[tuple(idx)] *= factor
+
+    return np.fft.irfft(new_coeffs,n=n_out,axis=axis)
+
+
+class mesh_to_mesh_fft(transfer):
+    """
+    Custom transfer class, implements Transfer.py
+
+    This implementation can restrict and prolong between n-dimensional periodic meshes of any ndarray-backed data type
+    (e.g. mesh, rhs_imex_mesh) by truncating or zero-padding the Fourier modes along each axis, in O(N log N). This is
+    exact for functions which are resolved on the coarse mesh. The first point of the coarse and the fine mesh has to
+    coincide (as for mesh_to_mesh_nd with nf = 2*nc), the ratio of the number of points is arbitrary. Axes with the
+    same number of points on both levels are skipped.
+
+    Attributes:
+        fine: reference to the fine level
+        coarse: reference to the coarse level
+        init_f: number of variables on the fine level (whatever init represents there)
+        init_c: number of variables on the coarse level (whatever init represents there)
+        shape_f: shape of the fine mesh
+        shape_c: shape of the coarse mesh
+    """
+
+    def __init__(self,fine_level,coarse_level):
+        """
+        Initialization routine
+
+        Args:
+            fine_level: fine level connected with the transfer operations (passed to parent)
+            coarse_level: coarse level connected with the transfer operations (passed to parent)
+        """
+
+        # invoke super initialization
+        super(mesh_to_mesh_fft,self).__init__(fine_level,coarse_level)
+
+        self.shape_f = tuple(np.atleast_1d(self.init_f))
+        self.shape_c = tuple(np.atleast_1d(self.init_c))
+        assert len(self.shape_f) == len(self.shape_c), \
+            'meshes of different dimensions: %s and %s' % (self.shape_f,self.shape_c)
+
+        # set up the plans for both directions right away
+        for nf,nc in zip(self.shape_f,self.shape_c):
+            if nf != nc:
+                get_plan(nf,nc)
+                get_plan(nc,nf)
+
+    @staticmethod
+    def __apply(shape_in,shape_out,init,u):
+        """
+        Resamples all arrays of a data type object along all axes which differ in size
+
+        Args:
+            shape_in: shape of the mesh of u
+            shape_out: shape of the mesh of the result
+            init: init of the result
+            u: data type object
+        Returns:
+            new data type object
+        """
+
+        # identity: just a copy (never the same object, the levels must not share data)
+        if shape_in == shape_out:
+            return type(u)(u)
+
+        me = type(u)(init)
+        for path in array_paths(u):
+            values = get_leaf(u,path)
+            for axis,(n_in,n_out) in enumerate(zip(shape_in,shape_out)):
+                if n_in != n_out:
+                    values = resample_axis(values,n_out,axis)
+            set_leaf(me,path,values)
+
+        return me
+
+    def restrict_space(self,F):
+        """
+        Restriction implementation
+
+        Args:
+            F: the fine level data (easier to access than via the fine attribute)
+        """
+        return self.__apply(self.shape_f,self.shape_c,self.init_c,F)
+
+    def prolong_space(self,G):
+        """
+        Prolongation implementation
+
+        Args:
+            G: the coarse level data (easier to access than via the coarse attribute)
+        """
+        return self.__apply(self.shape_c,self.shape_f,self.init_f,G)
@@ -0,0 +1,187 @@
+from __future__ import division
+import numpy as np
+import scipy.sparse as sp
+
+from pySDC.Transfer import transfer
+from pySDC.NodeStorage import array_paths, get_leaf, set_leaf
+
+
+def restriction_1d(nf,nc,periodic):
+    """
+    Helper routine for the weighted restriction (1/4,1/2,1/4) in 1d
+
+    Args:
+        nf: number of fine points (2*nc+1 without the boundary points, 2*nc for periodic meshes)
+        nc: number of coarse points
+        periodic: flag for periodic meshes
+    Returns:
+        restriction matrix in CSR format, dim. nc x nf
+    """
+
+    j = np.arange(nc)
+    if periodic:
+        rows = np.concatenate((j,j,j))
+        cols = np.concatenate((2*j-1,2*j,2*j+1)) % nf
+    else:
+        rows = np.concatenate((j,j,j))
+        cols = np.concatenate((2*j,2*j+1,2*j+2))
+    vals = np.concatenate((np.ones(nc)/4,np.ones(nc)/2,np.ones(nc)/4))
+
+    return sp.csr_matrix((vals,(rows,cols)),shape=(nc,nf))
+
+
+def prolongation_1d(nf,nc,periodic):
+    """
+    Helper routine for the 7th-order prolongation in 1d (injection at the coarse points, 6-point stencil in between)
+
+    Args:
+        nf: number of fine points (2*nc+1 without the boundary points, 2*nc for periodic meshes)
+        nc: number of coarse points
+        periodic: flag for periodic meshes
+    Returns:
+        prolongation matrix in CSR format, dim. nf x nc
+    """
+
+    # weights of the 6 coarse neighbours of a fine point in the middle of a coarse cell
+    weights = [0.01171875, -0.09765625, 0.5859375, 0.5859375, -0.09765625, 0.01171875]
+
+    if periodic:
+        # coarse point j is fine point 2*j, fine point 2*k+1 lies between the coarse points k and k+1
+        k = np.arange(nc)
+        rows = [2*k] + [2*k+1]*6
+        cols = [k] + [(k+s) % nc for s in range(-2,4)]
+        vals = [np.ones(nc)] + [w*np.ones(nc) for w in weights]
+        return sp.csr_matrix((np.concatenate(vals),(np.concatenate(rows),np.concatenate(cols))),shape=(nf,nc))
+
+    # coarse point j is fine point 2*j+1, fine point 2*k lies between the coarse points k-1 and k
+    k = np.arange(nc+1)
+    P = sp.lil_matrix((nf,nc))
+    P[2*np.arange(nc)+1,np.arange(nc)] = 1
+    for s,w in zip(range(-3,3),weights):
+        inside = (k+s >= 0) & (k+s < nc)
+        P[2*k[inside],k[inside]+s] = w
+
+    # one-sided stencils next to the boundary
+    P[0,:] = 0
+    P[2,:] = 0
+    P[-1,:] = 0
+    P[-3,:] = 0
+    P[0,0:5] = [1.23046875, -0.8203125, 0.4921875, -0.17578125, 0.02734375]
+    P[2,0:5] = [0.41015625, 0.8203125, -0.2734375, 0.08203125, -0.01171875]
+    P[-1,nc-5:nc] = [0.02734375, -0.17578125, 0.4921875, -0.8203125, 1.23046875]
+    P[-3,nc-5:nc] = [-0.01171875, 0.08203125, -0.2734375, 0.8203125, 0.41015625]
+
+    return P.tocsr()
+
+
+def apply_along_axis(A,values,axis):
+    """
+    Helper routine to apply a sparse 1d operator along one axis of an n-dimensional array
+
+    Args:
+        A: sparse matrix, dim. n_out x n_in
+        values: array with n_in entries along axis
+        axis: the axis
+    Returns:
+        array with n_out entries along axis (all other dimensions unchanged)
+    """
+
+    moved = np.moveaxis(values,axis,0)
+    result = A.dot(moved.reshape(moved.shape[0],-1))
+    return np.ascontiguousarray(np.moveaxis(result.reshape((A.shape[0],)+moved.shape[1:]),0,axis))
+
+
+class mesh_to_mesh_nd(transfer):
+    """
+    Custom transfer class, implements Transfer.py
+
+    This implementation can restrict and prolong between n-dimensional meshes of any ndarray-backed data type (e.g.
+    mesh, rhs_imex_mesh), using the weighted restriction and the 7th-order prolongation of the 1d examples along each
+    axis. The 1d operators are sparse (CSR) and applied axis by axis, which is the tensor product of the 1d operators
+    without ever assembling it. Axes with the same number of points on both levels are skipped.
+
+    Each axis is coarsened by a factor of 2: with nf = 2*nc+1 points, the boundary points are not part of the mesh
+    (as in heat1d), with nf = 2*nc points the mesh is periodic (as in advection_1d_implicit).
+
+    Attributes:
+        fine: reference to the fine level
+        coarse: reference to the coarse level
+        init_f: number of variables on the fine level (whatever init represents there)
+        init_c: number of variables on the coarse level (whatever init represents there)
+        Rspace: spatial restriction matrices, one per axis (None for axes which are not coarsened)
+        Pspace: spatial prolongation matrices, one per axis (None for axes which are not coarsened)
+    """
+
+    def __init__(self,fine_level,coarse_level):
+        """
+        Initialization routine
+
+        Args:
+            fine_level: fine level connected with the transfer operations (passed to parent)
+            coarse_level: coarse level connected with the transfer operations (passed to parent)
+        """
+
+        # invoke super initialization
+        super(mesh_to_mesh_nd,self).__init__(fine_level,coarse_level)
+
+        shape_f = tuple(np.atleast_1d(self.init_f))
+        shape_c = tuple(np.atleast_1d(self.init_c))
+        assert len(shape_f) == len(shape_c), 'meshes of different dimensions: %s and %s' % (shape_f,shape_c)
+
+        self.Rspace = []
+        self.Pspace = []
+        for nf,nc in zip(shape_f,shape_c):
+            # same number of points: identity, nothing to do along this axis
+            if nf == nc:
+                self.Rspace.append(None)
+                self.Pspace.append(None)
+            else:
+                assert nf in [2*nc,2*nc+1], 'cannot coarsen %s points to %s points' % (nf,nc)
+                periodic = nf == 2*nc
+                self.Rspace.append(restriction_1d(nf,nc,periodic))
+                self.Pspace.append(prolongation_1d(nf,nc,periodic))
+
+    @staticmethod
+    def __apply(ops,init,u):
+        """
+        Applies the 1d operators along all axes to all arrays of a data type object
+
+        Args:
+            ops: list of sparse matrices (or None), one per axis
+            init: init of the result
+            u: data type object
+        Returns:
+            new data type object
+        """
+
+        # identity: just a copy (never the same object, the levels must not share data)
+        if all(A is None for A in ops):
+            return type(u)(u)
+
+        me = type(u)(init)
+        for path in array_paths(u):
+            values = get_leaf(u,path)
+            for axis,A in enumerate(ops):
+                if A is not None:
+                    values = apply_along_axis(A,values,axis)
+            set_leaf(me,path,values)
+
+        return me
+
+    def restrict_space(self,F):
+        """
+        Restriction implementation
+
+        Args:
+            F: the fine level data (easier to access than via the fine attribute)
+        """
+        return self.__apply(self.Rspace,self.init_c,F)
+
+    def prolong_space(self,G):
+        """
+        Prolongation implementation
+
+        Args:
+            G: the coarse level data (easier to access than via the coarse attribute)
+        """
+        return self.__apply(self.Pspace,self.init_f,G)
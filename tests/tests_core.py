@@ -34,8 +34,49 @@ def check_collocation(subclass,M):
 
 
 
+def test_error_estimate():
+    classes = ['CollGaussLobatto','CollGaussLegendre','CollGaussRadau_Right','CollGaussRadau_Left']
+    for M in range(2,5):
+        for subclass in classes:
+            yield check_error_estimate, subclass, M
+
+def check_error_estimate(subclass,M):
+    import pySDC.CollocationClasses
+    from pySDC.sweeper_classes.generic_LU import generic_LU
+
+    coll = getattr(pySDC.CollocationClasses, subclass)(M,0,1)
+    sweep = generic_LU(coll)
+
+    # the extrapolation to the last node has to be exact for polynomials of degree len(weights)-1
+    points = np.append(coll.tleft,coll.nodes)[sweep.extrap_idx]
+    poly = np.arange(1,len(points)+1)
+    err = np.polyval(poly,coll.nodes[-1]) - np.dot(sweep.extrap_weights,np.polyval(poly,points))
+    assert abs(err) < 5E-12, 'got a discrepancy of %12.8e' % abs(err)
+
+
+def test_preconditioners():
+    import pySDC.Preconditioners
+    for qd_type in sorted(pySDC.Preconditioners.QDELTA.keys()):
+        yield check_preconditioner, qd_type
+
+def check_preconditioner(qd_type):
+    import pySDC.CollocationClasses
+    from pySDC.Preconditioners import get_Qd, is_diagonal
+
+    coll = pySDC.CollocationClasses.CollGaussRadau_Right(3,0,1)
+    Qd = get_Qd(qd_type,coll)
+
+    # the diagonal ones can be used for node-parallel sweeps
+    assert is_diagonal(Qd) == (qd_type in ['IEpar','Qpar','MIN']), 'preconditioner %s is (not) diagonal' % qd_type
+
+    # all preconditioners have to be lower triangular (sweep from node to node) and are computed only once
+    assert np.array_equal(Qd,np.tril(Qd)), 'preconditioner %s is not lower triangular' % qd_type
+    assert Qd is get_Qd(qd_type,pySDC.CollocationClasses.CollGaussRadau_Right(3,0,1)), \
+        'preconditioner %s has not been cached' % qd_type
+
+
 def test_errors():
-    classes = ['DataError']
+    classes = ['DataError','CommunicationError']
     for subclass in classes:
         yield check_error, subclass
 
@@ -104,16 +145,60 @@ def check_datatypes_mesh(init):
     assert np.all(m8.values==1.0)
     assert m7 >= 0
 
+
+def test_datatypes_mesh_inplace():
+
+    init = [10,(10,10)]
+    modules = ['mesh','complex_mesh']
+    for i in init:
+        for module in modules:
+            yield check_datatypes_mesh_inplace, i, module
+
+
+def check_datatypes_mesh_inplace(init,module):
+    import importlib
+
+    m = importlib.import_module('pySDC.datatype_classes.'+module)
+
+    m1 = m.mesh(init,val=1.0)
+    m2 = m.mesh(init,val=2.0)
+    values = m1.values
+
+    m1 += m2
+    m1 -= 0.5*m2
+    m1 *= 2.0
+    m1.axpy(0.5,m2)
+
+    r1 = m.rhs_imex_mesh(init)
+    r1.impl.values[:] = 1.0
+    r1.expl.values[:] = 2.0
+    r2 = m.rhs_imex_mesh(r1)
+    r2 += r1
+    r2.axpy(-1.0,r1)
+    r2 *= 3.0
+    r1.copy_from(r2)
+
+    # no new objects or arrays
+    assert m1.values is values
+    assert np.all(m1.values==5.0)
+    assert np.all(r1.impl.values==3.0)
+    assert np.all(r1.expl.values==6.0)
+    assert r1.impl is not r2.impl
+
 def test_datatypes_particles():
 
     init = [1,10]
+    modules = ['particles','particles_soa']
     for i in init:
-        yield check_datatypes_particles, i
+        for module in modules:
+            yield check_datatypes_particles, i, module
+
 
+def check_datatypes_particles(init,module):
+    import importlib
 
-def check_datatypes_particles(init):
-    from pySDC.datatype_classes.particles import particles
-    from pySDC.datatype_classes.particles import acceleration
+    particles = importlib.import_module('pySDC.datatype_classes.'+module).particles
+    acceleration = importlib.import_module('pySDC.datatype_classes.'+module).acceleration
 
 
     p1 = particles(init)
@@ -177,4 +262,937 @@ def check_datatypes_particles(init):
     assert p7 >= 0
     assert np.all(p8.pos.values==1.0)
     assert np.all(p8.vel.values==10.0)
-    assert np.all(a3.values==300.0)
\ No newline at end of file
+    assert np.all(a3.values==300.0)
+
+
+def test_datatypes_particles_soa():
+
+    init = [1,10]
+    for i in init:
+        yield check_datatypes_particles_soa, i
+
+
+def check_datatypes_particles_soa(init):
+    from pySDC.datatype_classes.particles_soa import particles, fields, acceleration
+
+    p1 = particles(init,vals=(1.0,10.0,1.0,1.0))
+    p2 = particles(init,vals=(2.0,20.0,1.0,1.0))
+    pos = p1.pos
+    a1 = acceleration(init,val=100.0)
+
+    # in-place operations keep the objects and their arrays
+    p1 += p2
+    p1 -= p2
+    p1.pos += 0.1*p1.vel
+    p1.vel.axpy(0.1,a1)
+    p1.pos.axpy(0.01,a1)
+    p2.copy_from(p1)
+    p2 *= 2.0
+
+    f1 = fields(init,vals=(1.0,2.0))
+    f2 = fields(f1)
+    f2.axpy(2.0,f1)
+
+    assert p1.pos is pos
+    assert p2 is not p1
+    assert np.shape(p1.pos.vectors) == (init,3)
+    assert np.shape(p1.pos.values) == (3*init,)
+    assert np.all(p1.pos.values==3.0)
+    assert np.all(p1.vel.values==20.0)
+    assert np.all(p2.pos.values==6.0)
+    assert np.all(p2.vel.values==40.0)
+    assert np.all(f2.elec.values==3.0)
+    assert np.all(f2.magn.values==6.0)
+    assert not hasattr(p1,'__dict__')
+
+    # flat values are views into the vectors
+    p1.pos.values[0] = -1.0
+    assert p1.pos.vectors[0,0] == -1.0
+
+    # results of operators have their own charges and masses (copy_from writes into them)
+    p3 = particles(init,vals=(1.0,1.0,2.0,3.0))
+    p4 = p1 + p1
+    p4.copy_from(p3)
+    p4 = p1 - p1
+    p4.copy_from(p3)
+    assert np.all(p1.q==1.0) and np.all(p1.m==1.0)
+    assert np.all(p4.q==2.0) and np.all(p4.m==3.0)
+
+def test_communicators():
+    classes = ['in_process','threaded']
+    for subclass in classes:
+        yield check_communicator, subclass
+
+
+def check_communicator(subclass):
+    import importlib
+    from pySDC.Errors import CommunicationError
+
+    comm = getattr(importlib.import_module('pySDC.communicator_classes.'+subclass),subclass)()
+
+    req = comm.irecv(source=0,dest=1,tag=(0,1,0))
+    assert not req.test()
+
+    comm.isend(1.0,source=0,dest=1,tag=(0,1,0))
+    comm.isend(2.0,source=0,dest=1,tag=(0,1,0))
+    comm.isend(3.0,source=0,dest=1,tag=(1,1,0))
+
+    assert req.test()
+    assert req.wait() == 1.0
+    assert comm.recv(source=0,dest=1,tag=(1,1,0)) == 3.0
+    assert comm.recv(source=0,dest=1,tag=(0,1,0)) == 2.0
+
+    comm.isend(4.0,source=0,dest=1,tag=(0,2,0))
+    comm.discard(dest=1)
+    assert not comm.irecv(source=0,dest=1,tag=(0,2,0)).test()
+
+    if subclass == 'in_process':
+        try:
+            comm.recv(source=0,dest=1,tag=(0,2,0))
+            assert False
+        except CommunicationError:
+            assert True
+
+
+def test_threaded_communicator():
+    import threading
+    from pySDC.communicator_classes.threaded import threaded
+
+    comm = threaded(timeout=10)
+
+    def sender():
+        for k in range(10):
+            comm.send(float(k),source=0,dest=1,tag=(0,k,0))
+
+    t = threading.Thread(target=sender)
+    t.start()
+    received = [comm.recv(source=0,dest=1,tag=(0,k,0)) for k in range(10)]
+    t.join()
+
+    assert received == [float(k) for k in range(10)]
+
+
+def test_controller_communicators():
+    controllers = ['PFASST_blockwise','PFASST_stepwise']
+    for controller in controllers:
+        for sparams in [{'maxiter':20},{'maxiter':20,'fine_comm':False}]:
+            yield check_controller_communicator, controller, sparams
+
+
+def check_controller_communicator(controller,sparams):
+    import importlib
+    from pySDC.communicator_classes.threaded import threaded
+    from pySDC.Stats import stats, grep_stats
+
+    mp = importlib.import_module('pySDC.'+controller)
+
+    class counting(threaded):
+        nsends = 0
+        def isend(self,data,source,dest,tag):
+            counting.nsends += 1
+            return super(counting,self).isend(data,source,dest,tag)
+
+    def run(comm):
+        stats.return_stats().clear()
+        MS = mp.generate_steps(4,sparams,heat1d_description())
+        uend,st = mp.run_pfasst(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.25,Tend=2.0,comm=comm)
+        return uend,grep_stats(st,type='niter')
+
+    uref,niter_ref = run(None)
+    uend,niter = run(counting(timeout=10))
+
+    # all values pass through the communicator, the backend does not change the result
+    assert counting.nsends > 0
+    assert niter == niter_ref
+    assert np.array_equal(uend.values,uref.values)
+
+
+def test_multiprocess_communicator():
+    import multiprocessing as mproc
+    from pySDC.Errors import CommunicationError
+    from pySDC.communicator_classes.multiprocess import multiprocess
+
+    ctx = mproc.get_context('fork')
+    comm = multiprocess([0,1],ctx=ctx,timeout=10)
+
+    def sender():
+        for k in range(10):
+            comm.isend(float(k),source=0,dest=1,tag=(0,k,0))
+        comm.abort('bla',source=0,dest=1)
+
+    p = ctx.Process(target=sender)
+    p.start()
+    received = [comm.recv(source=0,dest=1,tag=(0,k,0)) for k in range(9,-1,-1)]
+    p.join()
+
+    assert received == [float(k) for k in range(9,-1,-1)]
+
+    # the error of the sender is passed on to the receiver
+    try:
+        comm.recv(source=0,dest=1,tag=(0,10,0))
+        assert False
+    except CommunicationError:
+        assert True
+
+
+def test_checkpoint():
+    import os
+    import tempfile
+    import pySDC.datatype_classes.mesh as m
+    from pySDC.Checkpoint import checkpointer, load_checkpoint, stats_filename
+    from pySDC.Stats import stats, grep_stats
+
+    class prob():
+        init = (10,10)
+        dtype_u = m.mesh
+
+    u = m.mesh(prob.init,val=1.0)
+    u.values[3,4] = 2.0
+    stats.return_stats().clear()
+    stats.add_to_stats(step=7,time=0.75,level='L0',type='checkpoint_test',value=1.5)
+
+    filename = os.path.join(tempfile.mkdtemp(),'checkpoint.npz')
+    chkpt = checkpointer(filename)
+    chkpt.write(u,0.6,6,0.05)
+    stats.add_to_stats(step=8,time=0.85,iter=3,type='checkpoint_test',value=4)
+    chkpt.write(u,0.8,8,0.05)
+    chkpt.close()
+
+    # each checkpoint appends only its new statistics entries, as plain records
+    with open(stats_filename(filename),'rb') as f:
+        records = [np.load(f,allow_pickle=False) for n in range(2)]
+        assert f.read() == b''
+    assert [len(r) for r in records] == [1,1]
+
+    # the statistics have to come from the checkpoint
+    stats.return_stats().clear()
+    v,time,step,dt = load_checkpoint(filename,prob)
+
+    assert np.array_equal(u.values,v.values)
+    assert time == 0.8 and step == 8 and dt == 0.05
+    assert grep_stats(stats.return_stats(),type='checkpoint_test') == \
+        {(7,0.75,'L0',-1,'checkpoint_test'):1.5,(8,0.85,-1,3,'checkpoint_test'):4}
+    assert all(type(v) is int for k,v in grep_stats(stats.return_stats(),iter=3).items())
+
+
+def test_linear_problem():
+    import scipy.sparse as sp
+    import pySDC.datatype_classes.mesh as m
+    from pySDC.Problem import ptype_linear
+
+    class prob(ptype_linear):
+        lu_cache_size = 2
+        def __init__(self):
+            super(prob,self).__init__(10,m.mesh,m.mesh)
+            self.A = sp.diags([-np.arange(1.0,11.0)],[0],format='csc')
+
+    P = prob()
+    b = np.ones(10)
+
+    # repeated solves (cached factorization) and solves after eviction have to give the same result
+    for factor in [0.1,0.2,0.1,0.3,0.1]:
+        x = P.solve_linear(factor,b)
+        assert np.allclose(x,b/(1+factor*np.arange(1.0,11.0))), 'wrong solution for factor %s' % factor
+
+
+def test_contiguous_nodes():
+    init = [10,(10,10)]
+    for i in init:
+        yield check_contiguous_nodes, i
+
+def check_contiguous_nodes(init):
+    import pySDC.datatype_classes.mesh as m
+    from pySDC.NodeStorage import contiguous_nodes
+
+    u = contiguous_nodes(m.mesh,init,4)
+    f = contiguous_nodes(m.rhs_imex_mesh,init,4)
+
+    assert len(u) == 4
+    assert u.array().shape == (4,)+np.shape(m.mesh(init).values)
+    assert f.paths == ['expl.values','impl.values']
+
+    # assignment copies into the storage, nodes are views
+    u[1] = m.mesh(init,val=2.0)
+    u[-1] = 0.5*u[1]
+    assert np.all(u.array()[1] == 2.0) and np.all(u.array()[3] == 1.0)
+    u[2].values[:] = 3.0
+    assert np.all(u.array()[2] == 3.0)
+
+    # replaced arrays are synchronized with the storage
+    u[0].values = np.ones(np.shape(u[0].values))
+    assert np.all(u.array()[0] == 1.0)
+    assert np.shares_memory(u[0].values,u.array())
+
+
+def test_level_pool():
+    import pySDC.datatype_classes.mesh as m
+    from pySDC.Problem import ptype
+    from pySDC.Level import level
+    from pySDC.Hooks import hooks
+    from pySDC.CollocationClasses import CollGaussLegendre
+    from pySDC.sweeper_classes.generic_LU import generic_LU
+
+    class prob(ptype):
+        def __init__(self,cparams,dtype_u,dtype_f):
+            super(prob,self).__init__(10,dtype_u,dtype_f)
+
+    L = level(prob,{},m.mesh,m.mesh,CollGaussLegendre,3,generic_LU,{'pool':True},hooks,'L0')
+
+    u0 = m.mesh(10,val=1.0)
+    for j in range(4):
+        L.u[j] = L.acquire_copy(m.mesh,u0)
+    old = list(L.u)
+
+    # after a reset, the old objects are reused (and filled with the new values)
+    L.reset_level()
+    assert all(u is None for u in L.u)
+    u1 = L.acquire_copy(m.mesh,m.mesh(10,val=2.0))
+    assert any(u1 is u for u in old)
+    assert np.all(u1.values == 2.0)
+
+    # releasing twice does not hand out the same object twice
+    L.release(u1,u1)
+    assert L.acquire(m.mesh) is u1
+    assert L.acquire(m.mesh) is not u1
+
+
+def test_mesh_transfer_nd():
+    shapes = [((31,),(15,)),((31,10),(15,10)),((64,32,6),(32,16,6))]
+    for shape_f,shape_c in shapes:
+        yield check_mesh_transfer_nd, shape_f, shape_c
+
+
+def check_mesh_transfer_nd(shape_f,shape_c):
+    import pySDC.datatype_classes.mesh as m
+    from pySDC.transfer_classes.mesh_to_mesh_nd import mesh_to_mesh_nd
+
+    from pySDC.CollocationClasses import CollGaussRadau_Right
+
+    class level():
+        class prob():
+            pass
+        class sweep():
+            coll = CollGaussRadau_Right(3,0,1)
+        def __init__(self,init):
+            self.prob = level.prob()
+            self.prob.init = init
+            self.sweep = level.sweep()
+
+    T = mesh_to_mesh_nd(level(shape_f),level(shape_c))
+
+    # smooth function on a mesh: x^2(1-x) for meshes without the (zero) boundary points, sin(2*pi*x) for periodic ones
+    def grid_function(shape):
+        values = np.ones(shape)
+        for axis,(n,nf,nc) in enumerate(zip(shape,shape_f,shape_c)):
+            if nf == nc:
+                x = np.arange(n)
+            elif nf == 2*nc:
+                x = np.sin(2*np.pi*np.arange(n)/n)
+            else:
+                x = ((np.arange(n)+1)/(n+1))**2*(1-(np.arange(n)+1)/(n+1))
+            values = values*x.reshape([-1 if a == axis else 1 for a in range(len(shape))])
+        return values
+
+    G = m.rhs_imex_mesh(shape_c)
+    G.impl.values = grid_function(shape_c)
+    G.expl.values = 2*G.impl.values
+    F = T.prolong_space(G)
+
+    assert isinstance(F,m.rhs_imex_mesh)
+    assert np.shape(F.impl.values) == shape_f
+    assert np.allclose(F.expl.values,2*F.impl.values)
+    assert np.allclose(F.impl.values,grid_function(shape_f),atol=1E-03)
+
+    # the restriction keeps constants
+    F.impl.values = np.ones(shape_f)
+    assert np.allclose(T.restrict_space(F).impl.values,1.0)
+
+    # the identity transfer is a copy
+    H = mesh_to_mesh_nd(level(shape_c),level(shape_c)).restrict_space(G)
+    assert H is not G and np.array_equal(H.impl.values,G.impl.values)
+
+
+def test_mesh_transfer_fft():
+    shapes = [((32,),(16,)),((30,8),(15,8)),((24,12),(8,6))]
+    modules = ['mesh','complex_mesh']
+    for shape_f,shape_c in shapes:
+        for module in modules:
+            yield check_mesh_transfer_fft, shape_f, shape_c, module
+
+
+def check_mesh_transfer_fft(shape_f,shape_c,module):
+    import importlib
+    from pySDC.transfer_classes.mesh_to_mesh_fft import mesh_to_mesh_fft
+
+    m = importlib.import_module('pySDC.datatype_classes.'+module)
+
+    from pySDC.CollocationClasses import CollGaussRadau_Right
+
+    class level():
+        class prob():
+            pass
+        class sweep():
+            coll = CollGaussRadau_Right(3,0,1)
+        def __init__(self,init):
+            self.prob = level.prob()
+            self.prob.init = init
+            self.sweep = level.sweep()
+
+    T = mesh_to_mesh_fft(level(shape_f),level(shape_c))
+
+    # periodic function which is resolved on the coarse mesh (including the Nyquist mode)
+    def grid_function(shape):
+        values = np.ones(shape)
+        for axis,(n,nc) in enumerate(zip(shape,shape_c)):
+            x = np.arange(n)/n
+            x = 1 + np.sin(2*np.pi*x) + np.cos(2*np.pi*((nc-1)//2)*x) + (np.cos(np.pi*nc*x) if nc % 2 == 0 else 0)
+            values = values*x.reshape([-1 if a == axis else 1 for a in range(len(shape))])
+        return values
+
+    G = m.rhs_imex_mesh(shape_c)
+    G.impl.values[:] = grid_function(shape_c)
+    G.expl.values[:] = 2*grid_function(shape_c)
+    F = T.prolong_space(G)
+
+    assert isinstance(F,m.rhs_imex_mesh)
+    assert F.impl.values.dtype == G.impl.values.dtype
+    assert np.allclose(F.impl.values,grid_function(shape_f))
+    assert np.allclose(F.expl.values,2*grid_function(shape_f))
+
+    # restriction is exact for resolved functions
+    u = m.mesh(shape_f)
+    u.values[:] = grid_function(shape_f)
+    assert np.allclose(T.restrict_space(u).values,grid_function(shape_c))
+
+
+def test_transfer_time():
+    for num_nodes in [[5,3],[3,5],[4,4]]:
+        for coll in ['CollGaussRadau_Right','CollGaussLobatto','CollGaussLegendre']:
+            for frestrict in [False,True]:
+                yield check_transfer_time, coll, num_nodes, frestrict
+
+
+def check_transfer_time(coll,num_nodes,frestrict):
+    import pySDC.CollocationClasses as collclass
+    import pySDC.datatype_classes.mesh as m
+    from pySDC.Problem import ptype
+    from pySDC.Step import step
+    from pySDC.Transfer import transfer, interpolation_matrix
+    from pySDC.sweeper_classes.generic_LU import generic_LU
+
+    # the interpolation is exact for polynomials
+    x = np.linspace(0,1,5)
+    y = np.random.rand(7)
+    assert np.allclose(interpolation_matrix(x,y).dot(x**4-x),y**4-y)
+
+    class prob(ptype):
+        lam = -2.0
+        def __init__(self,cparams,dtype_u,dtype_f):
+            super(prob,self).__init__(3,dtype_u,dtype_f)
+            self.nevals = 0
+        def eval_f(self,u,t):
+            self.nevals += 1
+            return self.lam*u
+        def solve_system(self,rhs,factor,u0,t):
+            return 1/(1-factor*self.lam)*rhs
+
+    class identity(transfer):
+        def restrict_space(self,F):
+            return m.mesh(F)
+        def prolong_space(self,G):
+            return m.mesh(G)
+
+    description = dict(problem_class=prob, problem_params={}, dtype_u=m.mesh, dtype_f=m.mesh,
+                       collocation_class=getattr(collclass,coll), num_nodes=num_nodes, sweeper_class=generic_LU,
+                       level_params={}, transfer_class=identity, transfer_params={'finter':False,'frestrict':frestrict})
+    S = step({})
+    S.generate_hierarchy(description)
+    S.status.time = 0.0
+    S.status.dt = 0.5
+    S.init_step(m.mesh(3,val=1.0))
+    F,G = S.levels
+
+    # fine collocation solution: u = (I - dt*lam*Q)^{-1} u0
+    Q = F.sweep.coll.Qmat[1:,1:]
+    u = np.linalg.solve(np.eye(len(Q))-S.status.dt*prob.lam*Q,np.ones(len(Q)))
+    F.u[0] = m.mesh(3,val=1.0)
+    F.f[0] = F.prob.eval_f(F.u[0],0.0)
+    for j in range(len(Q)):
+        F.u[j+1] = m.mesh(3,val=u[j])
+        F.f[j+1] = F.prob.eval_f(F.u[j+1],0.0)
+    F.status.unlocked = True
+
+    # FAS: the restricted collocation solution solves the coarse problem, so the coarse residual vanishes
+    S.transfer(source=F,target=G)
+    # restricting f saves all evaluations on the coarse level except for the one at u[0]
+    assert G.prob.nevals == (1 if frestrict else G.sweep.coll.num_nodes+1)
+    G.status.updated = True
+    G.sweep.compute_residual()
+    assert G.status.residual < 1E-12, 'coarse residual is %s' % G.status.residual
+
+    # the coarse end value is the restricted fine one, also if the right end point is not a node
+    F.sweep.compute_end_point()
+    G.sweep.compute_end_point()
+    assert np.allclose(G.uend.values,F.uend.values), 'coarse end value differs by %s' % abs(G.uend-F.uend)
+
+    # ... and the coarse correction of an unchanged coarse level is zero
+    S.transfer(source=G,target=F)
+    for j in range(len(Q)):
+        assert np.allclose(F.u[j+1].values,u[j])
+
+
+def test_restrict_f():
+    import pySDC.PFASST_blockwise as mp
+    from pySDC.Stats import stats, grep_stats
+
+    def run(nvars,frestrict):
+        stats.return_stats().clear()
+        description = heat1d_description()
+        description.update(problem_params={'nu':0.1,'nvars':nvars},num_nodes=[5,3],
+                           transfer_params={'finter':True,'frestrict':frestrict})
+        MS = mp.generate_steps(4,{'maxiter':50},description)
+        uend,st = mp.run_pfasst(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.25,Tend=2.0)
+        return uend,max(grep_stats(st,type='niter').values())
+
+    # with coarsening in space, the restricted f is not the coarse f, so this is not allowed
+    try:
+        run([127,63],True)
+        assert False, 'restricting f with coarsening in space should fail'
+    except AssertionError as e:
+        assert 'same size' in str(e)
+
+    # with coarsening in time only, the same solution is found with the same number of iterations
+    uref,niter_ref = run([63,63],False)
+    uend,niter = run([63,63],True)
+    assert niter == niter_ref
+    assert np.linalg.norm(uend.values-uref.values,np.inf) < 1E-09
+
+
+def test_collocation_cache():
+    import tempfile
+    import pySDC.Collocation as collocation
+    from pySDC.CollocationClasses import CollGaussLobatto, CollGaussRadau_Right
+
+    # same collocation: same (read-only) object, different ones are not mixed up
+    coll = collocation.get_collocation(CollGaussRadau_Right,4,0,1)
+    assert coll is collocation.get_collocation(CollGaussRadau_Right,4,0,1)
+    assert coll is not collocation.get_collocation(CollGaussLobatto,4,0,1)
+    assert not coll.Qmat.flags.writeable
+
+    # on-disk cache: written by the first call, read back (without computing) after the in-process cache is gone
+    cache_dir = tempfile.mkdtemp()
+    ref = CollGaussRadau_Right(5,0,1)
+    for j in range(2):
+        collocation.cache.pop((CollGaussRadau_Right,5,0,1),None)
+        coll = collocation.get_collocation(CollGaussRadau_Right,5,0,1,cache_dir=cache_dir)
+        assert type(coll) is CollGaussRadau_Right
+        for name in collocation.CACHED_ATTRIBUTES:
+            assert np.array_equal(getattr(coll,name),getattr(ref,name)), 'wrong %s' % name
+    assert coll.right_is_node and not coll.left_is_node
+
+
+def heat1d_description(restol=1E-10):
+    from pySDC.CollocationClasses import CollGaussRadau_Right
+    from pySDC.datatype_classes.mesh import mesh, rhs_imex_mesh
+    from pySDC.sweeper_classes.imex_1st_order import imex_1st_order
+    from examples.heat1d.ProblemClass import heat1d
+    from examples.heat1d.TransferClass import mesh_to_mesh_1d
+
+    return dict(problem_class=heat1d, problem_params={'nu':0.1,'nvars':[127,63]}, dtype_u=mesh,
+                dtype_f=rhs_imex_mesh, collocation_class=CollGaussRadau_Right, num_nodes=5,
+                sweeper_class=imex_1st_order, level_params={'restol':restol}, transfer_class=mesh_to_mesh_1d,
+                transfer_params={'finter':True})
+
+
+def test_parareal():
+    import pySDC.PFASST_blockwise as mp
+    import pySDC.Parareal as pr
+    from pySDC.Stats import stats, grep_stats
+
+    def run(run_method,sparams):
+        stats.return_stats().clear()
+        MS = mp.generate_steps(8,sparams,heat1d_description())
+        uend,st = run_method(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.25,Tend=2.0)
+        return uend,sum(grep_stats(st,type='niter').values())
+
+    uref,_ = run(mp.run_pfasst,{'maxiter':20})
+
+    # iterating until exactness: step k needs k iterations
+    uend,niter_exact = run(pr.run_parareal,{'maxiter':20,'coarse_sweeps':3,'parareal_tol':0.0})
+    assert niter_exact == sum(range(1,9))
+    assert np.linalg.norm(uend.values-uref.values,np.inf) < 1E-09
+
+    # default tolerance (restol): same result, fewer iterations
+    uend,niter_default = run(pr.run_parareal,{'maxiter':20,'coarse_sweeps':3})
+    assert niter_default < niter_exact
+    assert np.linalg.norm(uend.values-uref.values,np.inf) < 1E-09
+
+    # larger tolerance: even fewer iterations
+    uend,niter = run(pr.run_parareal,{'maxiter':20,'coarse_sweeps':3,'parareal_tol':1E-06})
+    assert niter < niter_default
+    assert np.linalg.norm(uend.values-uref.values,np.inf) < 1E-06
+
+
+def run_heat1d(controller,num_procs,sparams,nvars=None):
+    import importlib
+    from pySDC.Stats import stats, grep_stats
+
+    mp = importlib.import_module('pySDC.'+controller)
+    stats.return_stats().clear()
+    description = heat1d_description()
+    if nvars is not None:
+        description['problem_params'] = {'nu':0.1,'nvars':nvars}
+        if len(nvars) == 1:
+            del description['transfer_class'], description['transfer_params']
+    MS = mp.generate_steps(num_procs,sparams,description)
+    uend,st = mp.run_pfasst(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.25,Tend=2.0)
+
+    # iterations and sweeps on the finest level per step
+    niter = [v for k,v in sorted(grep_stats(st,type='niter').items(),key=lambda kv: kv[0].step)]
+    nsweeps = [len(grep_stats(st,step=k,type='residual',level='L0')) for k in range(len(niter))]
+    return uend,niter,nsweeps
+
+
+def test_adaptivity():
+    import pySDC.PFASST_blockwise as mp
+    import pySDC.datatype_classes.mesh as m
+    from pySDC.Problem import ptype
+    from pySDC.Hooks import hooks
+    from pySDC.CollocationClasses import CollGaussRadau_Right
+    from pySDC.sweeper_classes.generic_LU import generic_LU
+    from pySDC.Stats import stats
+
+    lam = -1.0
+    e_tol = 1E-06
+    steps = {}
+
+    class prob(ptype):
+        def __init__(self,cparams,dtype_u,dtype_f):
+            super(prob,self).__init__(1,dtype_u,dtype_f)
+        def eval_f(self,u,t):
+            return lam*u
+        def solve_system(self,rhs,factor,u0,t):
+            return 1/(1-factor*lam)*rhs
+
+    class local_error(hooks):
+        def dump_step(self,status):
+            super(local_error,self).dump_step(status)
+            L = self.level
+            L.sweep.compute_error_estimate()
+            # a repeated step (after a rejection) overwrites the old entry
+            err = abs(L.uend.values[0]-np.exp(lam*status.dt)*L.u[0].values[0])
+            steps[status.time] = (status.dt,L.status.error_estimate,err)
+
+    stats.return_stats().clear()
+    description = dict(problem_class=prob, problem_params={}, dtype_u=m.mesh, dtype_f=m.mesh,
+                       collocation_class=CollGaussRadau_Right, num_nodes=3, sweeper_class=generic_LU,
+                       level_params={'restol':1E-14}, hook_class=local_error)
+    MS = mp.generate_steps(4,{'maxiter':50,'adaptivity':True,'e_tol':e_tol},description)
+    uend,_ = mp.run_pfasst(MS,u0=m.mesh(1,val=1.0),t0=0,dt=0.1,Tend=1.0)
+
+    # follow the accepted steps from t0, the last one ends exactly at Tend
+    t = 0.0
+    accepted = []
+    while t in steps:
+        accepted.append(steps[t])
+        t += steps[t][0]
+    assert t == 1.0, 'last step ends at %s' % t
+    assert abs(uend.values[0]-np.exp(lam)) < 1E-10
+
+    # the estimate stays near e_tol (except for the last, shortened step) and bounds the actual local error
+    for dt,est,err in accepted:
+        assert err <= est <= e_tol
+    assert all(est > 0.5*e_tol for dt,est,err in accepted[:-1])
+
+
+def test_ring():
+    uref,niter_ref,_ = run_heat1d('PFASST_stepwise',4,{'maxiter':20})
+    uend,niter,_ = run_heat1d('PFASST_stepwise',4,{'maxiter':20,'ring':True})
+
+    # the steps start from less converged values, but need the same number of iterations to get to restol
+    assert niter == niter_ref
+    assert np.linalg.norm(uend.values-uref.values,np.inf) < 1E-09
+
+
+def test_freeze_converged():
+    uref,niter_ref,_ = run_heat1d('PFASST_blockwise',4,{'maxiter':30},nvars=[63,31])
+    uend,niter,nsweeps = run_heat1d('PFASST_blockwise',4,{'maxiter':30,'freeze_converged':True},nvars=[63,31])
+
+    # frozen steps stop sweeping, so the first steps of a block need fewer sweeps than the rest of the block
+    assert nsweeps == niter
+    assert all(n <= n_ref for n,n_ref in zip(niter,niter_ref))
+    assert niter[0] < niter[3] and niter[4] < niter[7]
+    assert np.linalg.norm(uend.values-uref.values,np.inf) < 1E-10
+
+
+def test_mssdc():
+    uref,_,_ = run_heat1d('PFASST_blockwise',1,{'maxiter':50},nvars=[63])
+    uend,niter,_ = run_heat1d('PFASST_blockwise',4,{'maxiter':50},nvars=[63])
+
+    # multi-step SDC converges to the same collocation solution as serial SDC
+    assert max(niter) < 50
+    assert np.linalg.norm(uend.values-uref.values,np.inf) < 1E-09
+
+
+def test_pfasst_legendre():
+    import pySDC.PFASST_blockwise as mp
+    from pySDC.CollocationClasses import CollGaussLegendre
+    from pySDC.Stats import stats, grep_stats
+
+    def run(num_procs,nvars,num_nodes,restol):
+        stats.return_stats().clear()
+        description = heat1d_description(restol)
+        description.update(problem_params={'nu':0.1,'nvars':nvars},collocation_class=CollGaussLegendre,
+                           num_nodes=num_nodes)
+        if len(nvars) == 1:
+            del description['transfer_class'], description['transfer_params']
+        MS = mp.generate_steps(num_procs,{'maxiter':50},description)
+        uend,st = mp.run_pfasst(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.25,Tend=2.0)
+        return uend,max(grep_stats(st,type='niter').values())
+
+    # serial SDC on the fine level
+    uref,_ = run(1,[63],5,1E-13)
+
+    # PFASST with coarsening in space and time, the right end point is not a node on both levels
+    uend,niter = run(4,[63,31],[5,3],1E-10)
+    assert niter < 50
+    assert np.linalg.norm(uend.values-uref.values,np.inf) < 1E-09
+
+
+def test_pfasst_parallel():
+    uref,niter_ref,_ = run_heat1d('PFASST_blockwise',4,{'maxiter':20})
+    uend,niter,_ = run_heat1d('PFASST_parallel',4,{'maxiter':20})
+
+    # one process per step does exactly the same as the virtual parallelism
+    assert niter == niter_ref
+    assert np.array_equal(uend.values,uref.values)
+
+
+def test_pfasst_parallel_dead_worker():
+    import os
+    import pySDC.PFASST_parallel as mp
+    from pySDC.Hooks import hooks
+    from pySDC.Errors import CommunicationError
+
+    class crash(hooks):
+        def dump_iteration(self,status):
+            super(crash,self).dump_iteration(status)
+            if status.slot == 2 and status.iter == 2:
+                os._exit(3)
+
+    description = heat1d_description()
+    description['hook_class'] = crash
+    MS = mp.generate_steps(4,{'maxiter':20},description)
+
+    # the master must not wait forever for the dead worker
+    try:
+        mp.run_pfasst(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.25,Tend=2.0)
+        assert False
+    except CommunicationError as e:
+        assert 'exit code 3' in str(e)
+
+
+def test_resume_pfasst():
+    controllers = ['PFASST_blockwise','PFASST_stepwise','PFASST_parallel']
+    for controller in controllers:
+        yield check_resume_pfasst, controller
+
+
+def check_resume_pfasst(controller):
+    import os
+    import tempfile
+    import importlib
+    from pySDC.Checkpoint import resume_pfasst
+    from pySDC.Stats import stats, grep_stats
+
+    mp = importlib.import_module('pySDC.'+controller)
+    filename = os.path.join(tempfile.mkdtemp(),'checkpoint.npz')
+    sparams = {'maxiter':20,'checkpoint_file':filename}
+
+    # uninterrupted run over two blocks
+    stats.return_stats().clear()
+    MS = mp.generate_steps(4,sparams,heat1d_description())
+    uref,stats_ref = mp.run_pfasst(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.25,Tend=2.0)
+    niter_ref = grep_stats(stats_ref,type='niter')
+
+    # run stopped after the first block, then resumed from its checkpoint
+    stats.return_stats().clear()
+    MS = mp.generate_steps(4,sparams,heat1d_description())
+    mp.run_pfasst(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.25,Tend=1.0)
+    assert os.path.isfile(filename)
+
+    stats.return_stats().clear()
+    uend,stats_resumed = resume_pfasst(filename,mp,4,sparams,heat1d_description(),Tend=2.0)
+
+    assert np.array_equal(uend.values,uref.values)
+    assert grep_stats(stats_resumed,type='niter') == niter_ref
+
+
+def test_generic_LU_loops():
+    for QI in ['LU','CN','EE']:
+        yield check_generic_LU_loops, QI
+
+
+def check_generic_LU_loops(QI):
+    import pySDC.PFASST_blockwise as mp
+    from pySDC.CollocationClasses import CollGaussLegendre
+    from pySDC.datatype_classes.mesh import mesh
+    from pySDC.sweeper_classes.generic_LU import generic_LU
+    from pySDC.Stats import stats, grep_stats
+    from examples.vanderpol.ProblemClass import vanderpol
+
+    class generic_LU_loops(generic_LU):
+        # the path taken for data types which are not ndarray-backed
+        _generic_LU__vectorized = False
+
+    def run(sweeper_class):
+        stats.return_stats().clear()
+        description = dict(problem_class=vanderpol,
+                           problem_params={'newton_tol':1E-12,'maxiter':50,'mu':5,'u0':np.array([2.0,0])},
+                           dtype_u=mesh, dtype_f=mesh, collocation_class=CollGaussLegendre, num_nodes=3,
+                           sweeper_class=sweeper_class, level_params={'restol':1E-10,'QI':QI})
+        MS = mp.generate_steps(4,{'maxiter':100},description)
+        uend,st = mp.run_pfasst(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.1,Tend=0.8)
+        return uend,sum(grep_stats(st,type='niter').values())
+
+    # loops and matrix products use all columns of QI (incl. the one for u0), so they give the same sweeps
+    uref,niter_ref = run(generic_LU)
+    uend,niter = run(generic_LU_loops)
+    assert np.allclose(uend.values,uref.values,rtol=0,atol=1E-12), 'different results with QI %s' % QI
+    assert niter == niter_ref, 'different number of iterations with QI %s' % QI
+
+
+def test_node_parallel():
+    for node_pool in ['thread','process']:
+        for batch in [False,True]:
+            yield check_node_parallel, node_pool, batch
+
+
+def check_node_parallel(node_pool,batch):
+    import concurrent.futures as cf
+    import pySDC.PFASST_blockwise as mp
+    import pySDC.sweeper_classes.node_parallel as np_sweeper
+    from pySDC.CollocationClasses import CollGaussLegendre
+    from pySDC.datatype_classes.mesh import mesh
+    from pySDC.sweeper_classes.generic_LU import generic_LU
+    from pySDC.Stats import stats, grep_stats
+    from examples.vanderpol.ProblemClass import vanderpol
+
+    class vanderpol_batch(vanderpol):
+        def solve_system_batch(self,rhs,factors,u0,t):
+            return [self.solve_system(*args) for args in zip(rhs,factors,u0,t)]
+
+    def run(sweeper_class,QI):
+        stats.return_stats().clear()
+        description = dict(problem_class=vanderpol_batch if batch else vanderpol,
+                           problem_params={'newton_tol':1E-12,'maxiter':50,'mu':5,'u0':np.array([2.0,0])},
+                           dtype_u=mesh, dtype_f=mesh, collocation_class=CollGaussLegendre, num_nodes=3,
+                           sweeper_class=sweeper_class, level_params={'restol':1E-10,'QI':QI,'node_pool':node_pool})
+        MS = mp.generate_steps(4,{'maxiter':100},description)
+        uend,st = mp.run_pfasst(MS,u0=MS[0].levels[0].prob.u_exact(0),t0=0,dt=0.1,Tend=0.8)
+        return MS,uend,sum(grep_stats(st,type='niter').values())
+
+    # with the same diagonal QI, the node-parallel sweeps are the same as the sequential ones (up to round-off)
+    for QI in ['MIN','IEpar']:
+        _,uref,niter_ref = run(generic_LU,QI)
+        MS,uend,niter = run(np_sweeper.node_parallel,QI)
+        assert np.allclose(uend.values,uref.values,rtol=0,atol=1E-14), 'different results with QI %s' % QI
+        assert niter == niter_ref, 'different number of iterations with QI %s' % QI
+
+        # each sweeper has its own pool, which is shut down by close
+        pool_class = cf.ThreadPoolExecutor if node_pool == 'thread' else cf.ProcessPoolExecutor
+        for S in MS:
+            assert isinstance(S.levels[0].sweep.pool,pool_class)
+            S.levels[0].sweep.close()
+            assert S.levels[0].sweep.pool is None
+
+
+def test_penningtrap_vectorized():
+    modules = ['particles','particles_soa']
+    for module in modules:
+        yield check_penningtrap_vectorized, module
+
+
+def check_penningtrap_vectorized(module):
+    import importlib
+    from examples.penningtrap.ProblemClass import penningtrap
+
+    dtypes = importlib.import_module('pySDC.datatype_classes.'+module)
+
+    # tile size does not divide the number of particles
+    N = 7
+    pparams = {'omega_E':4.9,'omega_B':25.0,'u0':np.array([[10,0,0],[100,0,100],[1],[1]]),'nparts':N,'sig':0.1,
+               'tile_size':3}
+    P = penningtrap(pparams,dtypes.particles,dtypes.fields)
+
+    np.random.seed(1)
+    part = dtypes.particles(N)
+    part.pos.values[:] = np.random.rand(3*N)
+    part.vel.values[:] = np.random.rand(3*N)
+    part.q[:] = 1+np.random.rand(N)
+    part.m[:] = 1+np.random.rand(N)
+    old_fields = dtypes.fields(N)
+    new_fields = dtypes.fields(N)
+    for f in [old_fields,new_fields]:
+        f.elec.values[:] = np.random.rand(3*N)
+        f.magn.values[:] = np.random.rand(3*N)
+    c = dtypes.particles.velocity(N)
+    c.values[:] = np.random.rand(3*N)
+    dt = 0.1
+
+    # loop versions (particle by particle)
+    Eref = np.zeros(3*N)
+    for i in range(N):
+        for j in range(N):
+            diff = part.pos.values[3*i:3*i+3]-part.pos.values[3*j:3*j+3]
+            Eref[3*i:3*i+3] += part.q[j]*diff/(np.linalg.norm(diff,2)**2+P.sig**2)**(3/2)
+
+    cref = c.values.copy()
+    vref = np.zeros(3*N)
+    Emean = 1/2*(old_fields.elec.values + new_fields.elec.values)
+    for n in range(N):
+        a = part.q[n]/part.m[n]
+        cref[3*n:3*n+3] += dt/2*a*np.cross(part.vel.values[3*n:3*n+3],
+                                           old_fields.magn.values[3*n:3*n+3]-new_fields.magn.values[3*n:3*n+3])
+        vm = part.vel.values[3*n:3*n+3] + dt/2*a*Emean[3*n:3*n+3] + cref[3*n:3*n+3]/2
+        t = dt/2*a*new_fields.magn.values[3*n:3*n+3]
+        s = 2*t/(1+np.linalg.norm(t,2)**2)
+        vp = vm + np.cross(vm+np.cross(vm,t),s)
+        vref[3*n:3*n+3] = vp + dt/2*a*Emean[3*n:3*n+3] + cref[3*n:3*n+3]/2
+
+    assert np.allclose(P.get_interactions(part),Eref,rtol=1E-14,atol=1E-14)
+    vel = P.boris_solver(c,dt,old_fields,new_fields,part)
+    assert np.allclose(vel.values,vref,rtol=1E-14,atol=1E-14)
+    assert np.allclose(c.values,cref,rtol=1E-14,atol=1E-14)
+
+
+def test_barnes_hut():
+    from examples.penningtrap.BarnesHut import octree
+
+    np.random.seed(2)
+    N = 500
+    sig = 0.1
+    pos = np.random.rand(N,3)
+    q = 1+np.random.rand(N)
+
+    def direct_sum(pos,q):
+        diff = pos[:,np.newaxis,:] - pos[np.newaxis,:,:]
+        dist2 = np.sum(diff**2,axis=2) + sig**2
+        return np.einsum('ij,ijk->ik',q/dist2**(3/2),diff)
+
+    # theta = 0 gives the direct sum (up to round-off), the error grows with theta
+    Eref = direct_sum(pos,q)
+    tree = octree(pos,q,leaf_size=8)
+    assert np.allclose(tree.get_field(0,sig),Eref,rtol=1E-12,atol=1E-12)
+    errors = [np.linalg.norm(tree.get_field(theta,sig)-Eref,np.inf) for theta in [0.2,0.5,1.0]]
+    assert 0 < errors[0] < errors[1] < errors[2], 'errors %s do not grow with theta' % errors
+    assert errors[2] < 0.1*np.linalg.norm(Eref,np.inf)
+
+    # all particles at the same position: the tree stops at max_depth, the field vanishes (up to round-off)
+    pos = np.ones((20,3))
+    tree = octree(pos,q[:20],leaf_size=4,max_depth=5)
+    cube,depth = tree.root,0
+    while cube.children:
+        cube,depth = cube.children[0],depth+1
+    assert depth == 5 and len(cube.idx) == 20
+    assert np.allclose(tree.get_field(0.5,sig),0.0,atol=1E-10)